@@ -0,0 +1,8 @@
+"""
+Benchmarks for the Psycho-Color Analysis System
+
+This package times every stage of the analysis pipeline and writes the
+results as stable JSON, so runs before and after a change can be compared:
+    
+    python -m benchmarks.run --output results.json
+"""
@@ -0,0 +1,304 @@
+"""
+Regression Gate for Psycho-Color Analysis System
+
+This module runs the pipeline benchmarks and compares them to a committed
+baseline, failing when a benchmark has become slower or allocates more
+memory. A latency regression must be both large, beyond a relative
+tolerance, and statistically significant: the per-round median latencies
+of the run and the baseline are compared with a one-sided Mann-Whitney U
+test, so a noisy machine does not fail the gate on its own.
+
+Run from the repository root:
+    
+    python -m benchmarks.gate
+
+Record a new baseline after an intended change with --update.
+"""
+
+import os
+import sys
+import json
+import math
+import argparse
+import itertools
+from statistics import median
+from .harness import SCHEMA_VERSION, run_benchmarks
+from .run import BENCHMARKS, write_results
+
+# Baseline compared against by default
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Relative change below which a metric is not a regression
+DEFAULT_TOLERANCE = 0.20
+
+# Significance level of the latency comparison
+DEFAULT_ALPHA = 0.05
+
+# Allocation growth in bytes ignored on top of the tolerance
+ALLOCATION_SLACK_BYTES = 256
+
+# Largest number of rank assignments enumerated for an exact p-value
+EXACT_LIMIT = 20000
+
+def mann_whitney_p(baseline, current):
+    """
+    Get the one-sided p-value that current values are larger than baseline values.
+    
+    The p-value is exact, from every assignment of the pooled values to the
+    two groups, for small samples, and from the normal approximation otherwise.
+    
+    Args:
+        baseline (list): Baseline measurements
+        current (list): Current measurements
+        
+    Returns:
+        float: Probability of a U statistic at least as large if both
+            samples came from the same distribution
+    """
+    def u_statistic(larger, smaller):
+        return sum(1.0 if a > b else 0.5 if a == b else 0.0 for a in larger for b in smaller)
+    
+    n, m = len(current), len(baseline)
+    observed = u_statistic(current, baseline)
+    
+    if math.comb(n + m, n) <= EXACT_LIMIT:
+        pooled = list(current) + list(baseline)
+        at_least = total = 0
+        for chosen in itertools.combinations(range(n + m), n):
+            chosen_set = set(chosen)
+            group = [pooled[i] for i in chosen]
+            rest = [pooled[i] for i in range(n + m) if i not in chosen_set]
+            total += 1
+            if u_statistic(group, rest) >= observed:
+                at_least += 1
+        return at_least / total
+    
+    mean = n * m / 2
+    deviation = math.sqrt(n * m * (n + m + 1) / 12)
+    z = (observed - mean - 0.5) / deviation
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def _format_value(value, unit):
+    """
+    Format a metric value for the report.
+    
+    Args:
+        value (float): The value
+        unit (str): "ns" or "bytes"
+        
+    Returns:
+        str: The value in a readable unit
+    """
+    if unit == "ns":
+        for scale, suffix in ((1e9, "s"), (1e6, "ms"), (1e3, "us")):
+            if value >= scale:
+                return f"{value / scale:.2f} {suffix}"
+        return f"{value:.0f} ns"
+    
+    if value >= 1024:
+        return f"{value / 1024:.1f} KiB"
+    return f"{value:.0f} B"
+
+def compare(baseline, current, tolerance=DEFAULT_TOLERANCE, alpha=DEFAULT_ALPHA):
+    """
+    Compare benchmark results to a baseline.
+    
+    Args:
+        baseline (dict): Baseline results from run_benchmarks
+        current (dict): Current results from run_benchmarks
+        tolerance (float, optional): Relative change below which a metric is
+            not a regression
+        alpha (float, optional): Significance level of the latency comparison
+        
+    Returns:
+        list: One dict per benchmark metric with the benchmark, metric, unit,
+            baseline and current values, relative change, p-value (latency
+            only) and a status of "regressed", "improved", "unchanged",
+            "new" or "missing"
+    """
+    rows = []
+    baseline_benchmarks = baseline["benchmarks"]
+    current_benchmarks = current["benchmarks"]
+    
+    for name in sorted(set(baseline_benchmarks) | set(current_benchmarks)):
+        if name not in current_benchmarks or name not in baseline_benchmarks:
+            rows.append({
+                "benchmark": name,
+                "metric": "-",
+                "status": "missing" if name not in current_benchmarks else "new"
+            })
+            continue
+        
+        before = baseline_benchmarks[name]
+        after = current_benchmarks[name]
+        
+        # Latency: large and significant changes in the per-round medians
+        before_rounds = before["round_p50_ns"]
+        after_rounds = after["round_p50_ns"]
+        before_value = median(before_rounds)
+        after_value = median(after_rounds)
+        change = (after_value - before_value) / before_value if before_value else 0.0
+        slower = mann_whitney_p(before_rounds, after_rounds)
+        faster = mann_whitney_p(after_rounds, before_rounds)
+        
+        status = "unchanged"
+        if change > tolerance and slower < alpha:
+            status = "regressed"
+        elif change < -tolerance and faster < alpha:
+            status = "improved"
+        rows.append({
+            "benchmark": name,
+            "metric": "median latency",
+            "unit": "ns",
+            "baseline": before_value,
+            "current": after_value,
+            "change": change,
+            "p_value": slower if change >= 0 else faster,
+            "status": status
+        })
+        
+        # Allocations are repeatable, so any growth beyond the slack counts
+        for metric in ("peak_bytes", "retained_bytes_per_op"):
+            before_value = before["allocations"][metric]
+            after_value = after["allocations"][metric]
+            margin = before_value * tolerance + ALLOCATION_SLACK_BYTES
+            
+            status = "unchanged"
+            if after_value > before_value + margin:
+                status = "regressed"
+            elif after_value < before_value - margin:
+                status = "improved"
+            rows.append({
+                "benchmark": name,
+                "metric": metric.replace("_", " "),
+                "unit": "bytes",
+                "baseline": before_value,
+                "current": after_value,
+                "change": (after_value - before_value) / before_value if before_value else None,
+                "p_value": None,
+                "status": status
+            })
+    
+    return rows
+
+def format_report(rows, verbose=False):
+    """
+    Format a comparison as a table.
+    
+    Args:
+        rows (list): Rows from compare
+        verbose (bool, optional): Include unchanged metrics
+        
+    Returns:
+        str: The table followed by a count of rows in each status
+    """
+    header = ("benchmark", "metric", "baseline", "current", "change", "p", "status")
+    table = [header]
+    for row in rows:
+        if row["status"] == "unchanged" and not verbose:
+            continue
+        if row["metric"] == "-":
+            table.append((row["benchmark"], "-", "-", "-", "-", "-", row["status"].upper()))
+            continue
+        
+        table.append((
+            row["benchmark"],
+            row["metric"],
+            _format_value(row["baseline"], row["unit"]),
+            _format_value(row["current"], row["unit"]),
+            f"{row['change']:+.1%}" if row["change"] is not None else "-",
+            f"{row['p_value']:.3f}" if row["p_value"] is not None else "-",
+            row["status"].upper()
+        ))
+    
+    counts = {}
+    for row in rows:
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+    summary = ", ".join(f"{counts[status]} {status}" for status in
+                        ("regressed", "improved", "unchanged", "new", "missing") if status in counts)
+    
+    if len(table) == 1:
+        return summary + "\n"
+    
+    widths = [max(len(line[column]) for line in table) for column in range(len(header))]
+    lines = []
+    for line in table:
+        cells = [line[0].ljust(widths[0]), line[1].ljust(widths[1])]
+        cells.extend(cell.rjust(width) for cell, width in zip(line[2:6], widths[2:6]))
+        cells.append(line[6])
+        lines.append("  ".join(cells))
+    
+    return "\n".join(lines) + "\n\n" + summary + "\n"
+
+def load_results(path):
+    """
+    Load benchmark results written by write_results.
+    
+    Args:
+        path (str): The JSON file
+        
+    Returns:
+        dict: The results
+    """
+    with open(path, encoding="utf-8") as results_file:
+        results = json.load(results_file)
+    
+    if results.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(
+            f"{path} has schema version {results.get('schema_version')}, expected {SCHEMA_VERSION}; "
+            "record it again with --update"
+        )
+    return results
+
+def main(argv=None):
+    """
+    Run the regression gate from the command line.
+    
+    Args:
+        argv (list, optional): Command line arguments; sys.argv if not provided
+        
+    Returns:
+        int: Exit status, 1 if any metric regressed or a benchmark is missing
+    """
+    parser = argparse.ArgumentParser(description="Fail when pipeline benchmarks regress against a baseline.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--results", help="compare these results instead of running the benchmarks")
+    parser.add_argument("--output", help="also write the current results to this JSON file")
+    parser.add_argument("--update", action="store_true", help="record the current results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative change below which a metric is not a regression")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA,
+                        help="significance level of the latency comparison")
+    parser.add_argument("--iterations", type=int, help="timed calls per benchmark, overriding the defaults")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--verbose", action="store_true", help="also list unchanged metrics")
+    args = parser.parse_args(argv)
+    
+    if args.results:
+        current = load_results(args.results)
+    else:
+        current = run_benchmarks(BENCHMARKS, args.iterations, args.filter)
+    if args.output:
+        write_results(current, args.output)
+    
+    if args.update:
+        write_results(current, args.baseline)
+        print(f"Recorded {len(current['benchmarks'])} benchmarks in {args.baseline}")
+        return 0
+    
+    baseline = load_results(args.baseline)
+    if args.filter:
+        baseline = dict(baseline, benchmarks={
+            name: result for name, result in baseline["benchmarks"].items() if args.filter in name
+        })
+    
+    if baseline["environment"] != current["environment"]:
+        print(f"Warning: baseline was recorded on {baseline['environment']}, "
+              f"running on {current['environment']}", file=sys.stderr)
+    
+    rows = compare(baseline, current, args.tolerance, args.alpha)
+    print(format_report(rows, args.verbose), end="")
+    return 1 if any(row["status"] in ("regressed", "missing") for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
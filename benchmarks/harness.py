@@ -0,0 +1,241 @@
+"""
+Benchmark Harness Module for Psycho-Color Analysis System
+
+This module measures the latency, throughput and memory allocations of a
+single operation. Timing follows the approach of timeit: the operation is
+warmed up first and the garbage collector is disabled while it is timed,
+so results are repeatable between runs on the same machine. Allocations
+are traced with tracemalloc in a separate pass, because tracing slows
+every allocation down and would distort the timings.
+
+The timed calls are split into consecutive rounds and the median latency
+of each round is reported too, so that comparisons between runs can tell
+a real change from noise.
+"""
+
+import gc
+import sys
+import time
+import platform
+import tracemalloc
+
+# Version of the result format; bump when keys change
+SCHEMA_VERSION = 2
+
+# Latency percentiles reported for every benchmark
+PERCENTILES = (50, 90, 99)
+
+# Rounds the timed calls of a benchmark are split into
+ROUNDS = 5
+
+def percentile(sorted_values, pct):
+    """
+    Get a percentile of sorted values by the nearest-rank method.
+    
+    Args:
+        sorted_values (list): Values in ascending order
+        pct (float): Percentile between 0 and 100
+        
+    Returns:
+        The value at the percentile
+    """
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+def _round_sizes(iterations, rounds):
+    """
+    Split timed calls into rounds of nearly equal size.
+    
+    Args:
+        iterations (int): Number of timed calls
+        rounds (int): Number of rounds
+        
+    Returns:
+        list: Number of calls in each round
+    """
+    rounds = max(1, min(rounds, iterations))
+    return [(index + 1) * iterations // rounds - index * iterations // rounds for index in range(rounds)]
+
+def time_calls(operation, count):
+    """
+    Time consecutive calls of an operation with the garbage collector disabled.
+    
+    Args:
+        operation (callable): Zero-argument function running the operation once
+        count (int): Number of calls
+        
+    Returns:
+        list: Latency of each call in nanoseconds
+    """
+    timings = []
+    clock = time.perf_counter_ns
+    gc.collect()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(count):
+            start = clock()
+            operation()
+            timings.append(clock() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return timings
+
+def summarize(round_timings):
+    """
+    Summarize the timings of an operation.
+    
+    Args:
+        round_timings (list): Lists of call latencies in nanoseconds, one per round
+        
+    Returns:
+        dict: Number of calls, latency statistics and the median latency of
+            each round in nanoseconds, and throughput in operations per second
+    """
+    round_p50 = [percentile(sorted(timings), 50) for timings in round_timings]
+    timings = sorted(timing for timings in round_timings for timing in timings)
+    iterations = len(timings)
+    total = sum(timings)
+    latency = {
+        "min": timings[0],
+        "mean": total // iterations,
+        "max": timings[-1]
+    }
+    for pct in PERCENTILES:
+        latency[f"p{pct}"] = percentile(timings, pct)
+    
+    return {
+        "iterations": iterations,
+        "latency_ns": latency,
+        "round_p50_ns": round_p50,
+        "ops_per_sec": round(iterations * 1e9 / total, 1) if total else None
+    }
+
+def measure(operation, iterations, warmup=None, alloc_iterations=None, rounds=ROUNDS):
+    """
+    Measure one operation.
+    
+    Args:
+        operation (callable): Zero-argument function running the operation once
+        iterations (int): Number of timed calls
+        warmup (int, optional): Untimed calls made first; a tenth of the
+            iterations if not provided
+        alloc_iterations (int, optional): Calls made with allocation
+            tracing; a tenth of the iterations if not provided
+        rounds (int, optional): Rounds the timed calls are split into
+        
+    Returns:
+        dict: Latency statistics and the median latency of each round in
+            nanoseconds, throughput in operations per second and allocation
+            statistics in bytes
+    """
+    if warmup is None:
+        warmup = max(1, iterations // 10)
+    if alloc_iterations is None:
+        alloc_iterations = max(1, iterations // 10)
+    
+    for _ in range(warmup):
+        operation()
+    
+    result = summarize([time_calls(operation, count) for count in _round_sizes(iterations, rounds)])
+    result["allocations"] = measure_allocations(operation, alloc_iterations)
+    return result
+
+def measure_allocations(operation, iterations):
+    """
+    Measure the memory allocated by an operation.
+    
+    Args:
+        operation (callable): Zero-argument function running the operation once
+        iterations (int): Number of traced calls
+        
+    Returns:
+        dict: Largest peak of traced memory during a call, and memory still
+            allocated after a call on average, in bytes
+    """
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    
+    peak_bytes = 0
+    gc.collect()
+    start_current, _ = tracemalloc.get_traced_memory()
+    try:
+        for _ in range(iterations):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            operation()
+            _, peak = tracemalloc.get_traced_memory()
+            peak_bytes = max(peak_bytes, peak - before)
+        gc.collect()
+        end_current, _ = tracemalloc.get_traced_memory()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    
+    return {
+        "peak_bytes": peak_bytes,
+        "retained_bytes_per_op": max(0, (end_current - start_current) // iterations)
+    }
+
+def environment():
+    """
+    Describe the environment the benchmarks run in.
+    
+    Returns:
+        dict: Python version and implementation, platform and machine
+    """
+    return {
+        "python": platform.python_version(),
+        "implementation": sys.implementation.name,
+        "platform": platform.system(),
+        "machine": platform.machine()
+    }
+
+def run_benchmarks(benchmarks, iterations=None, name_filter=None, rounds=ROUNDS):
+    """
+    Run a set of benchmarks.
+    
+    The rounds of all benchmarks are interleaved, so that a slow period of
+    the machine affects one round of many benchmarks rather than every
+    round of one benchmark.
+    
+    Args:
+        benchmarks (iterable): (name, default iterations, setup) tuples; setup
+            is called once and returns the operation to time
+        iterations (int, optional): Timed calls per benchmark, overriding
+            each benchmark's default
+        name_filter (str, optional): Only run benchmarks whose name contains it
+        rounds (int, optional): Rounds the timed calls of each benchmark are
+            split into
+            
+    Returns:
+        dict: Results keyed by benchmark name, with the environment
+    """
+    selected = []
+    for name, default_iterations, setup in benchmarks:
+        if name_filter and name_filter not in name:
+            continue
+        count = iterations or default_iterations
+        operation = setup()
+        for _ in range(max(1, count // 10)):
+            operation()
+        selected.append((name, operation, count, _round_sizes(count, rounds)))
+    
+    timings = {name: [] for name, _, _, _ in selected}
+    for index in range(max(len(sizes) for _, _, _, sizes in selected) if selected else 0):
+        for name, operation, _, sizes in selected:
+            if index < len(sizes):
+                timings[name].append(time_calls(operation, sizes[index]))
+    
+    results = {}
+    for name, operation, count, _ in selected:
+        results[name] = summarize(timings[name])
+        results[name]["allocations"] = measure_allocations(operation, max(1, count // 10))
+    
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "environment": environment(),
+        "benchmarks": results
+    }
@@ -0,0 +1,158 @@
+"""
+Pipeline Benchmarks for Psycho-Color Analysis System
+
+This module defines a benchmark for every stage of the analysis pipeline:
+color normalization, preference processing, each color analysis, parsing
+of LLM responses of realistic size, and the full API call against the
+simulated LLM. Every input is fixed so results are comparable between runs.
+
+Run from the repository root:
+    
+    python -m benchmarks.run --output results.json
+"""
+
+import sys
+import json
+import argparse
+from code.color_analysis.api import PsychoColorAPI
+from code.color_analysis.color_analyzer import ColorAnalyzer
+from code.color_analysis.data_processor import ColorDataProcessor
+from code.llm_integration import (
+    LLMIntegration,
+    ResponseProcessor,
+    create_color_preference_prompt,
+    create_jung_energy_prompt,
+    create_comprehensive_profile_prompt,
+    create_recommendations_prompt
+)
+from .harness import run_benchmarks
+
+# A complete assessment, using aliases and mixed case like real submissions
+COLOR_DATA = {
+    "primary_color": "Navy",
+    "secondary_color": "sage",
+    "color_ranking": ["blue", "green", "Purple", "yellow", "red", "orange", "Charcoal", "white"],
+    "work_color": "cobalt",
+    "relaxation_color": "mint",
+    "social_color": "gold",
+    "creative_color": "lavender",
+    "stress_color": "crimson",
+    "color_emotion_associations": {
+        "blue": ["calm", "trust"],
+        "green": "growth, harmony",
+        "red": ["anger", "passion"]
+    }
+}
+
+# Color names covering each normalization path: standard, alias, substring, unknown
+COLOR_NAMES = ("blue", "Navy", "  emerald ", "dark forest green", "chartreuse")
+
+def _normalize_color():
+    """
+    Set up normalization of one color name of each kind per operation.
+    """
+    processor = ColorDataProcessor()
+    names = COLOR_NAMES
+    
+    def operation():
+        for name in names:
+            processor._normalize_color(name)
+    return operation
+
+def _process_color_preferences():
+    """
+    Set up processing of the complete assessment.
+    """
+    processor = ColorDataProcessor()
+    return lambda: processor.process_color_preferences(COLOR_DATA)
+
+def _analyzer(method):
+    """
+    Get the setup for a ColorAnalyzer method on the processed assessment.
+    
+    Args:
+        method (str): Name of the analyze_* method
+        
+    Returns:
+        callable: The setup
+    """
+    def setup():
+        analyze = getattr(ColorAnalyzer(), method)
+        color_data = ColorDataProcessor().process_color_preferences(COLOR_DATA)
+        return lambda: analyze(color_data)
+    return setup
+
+def _response_processor(method, prompt):
+    """
+    Get the setup for a ResponseProcessor method on the simulated response to a prompt.
+    
+    Args:
+        method (str): Name of the process_* method
+        prompt (str): Prompt whose simulated response is parsed
+        
+    Returns:
+        callable: The setup
+    """
+    def setup():
+        process = getattr(ResponseProcessor(), method)
+        raw_response = LLMIntegration()._simulate_llm_response(prompt)
+        # Read every field so lazily parsed sections are included
+        return lambda: process(raw_response).copy()
+    return setup
+
+def _api():
+    """
+    Set up the full API call against the simulated LLM.
+    """
+    api = PsychoColorAPI()
+    return lambda: api.analyze_color_preferences(COLOR_DATA)
+
+# (name, default iterations, setup returning the operation to time)
+BENCHMARKS = (
+    ("data_processor.normalize_color", 20000, _normalize_color),
+    ("data_processor.process_color_preferences", 10000, _process_color_preferences),
+    ("color_analyzer.analyze_color_preferences", 5000, _analyzer("analyze_color_preferences")),
+    ("color_analyzer.analyze_jung_energies", 10000, _analyzer("analyze_jung_energies")),
+    ("color_analyzer.analyze_personality_dimensions", 10000, _analyzer("analyze_personality_dimensions")),
+    ("color_analyzer.analyze_emotional_tendencies", 10000, _analyzer("analyze_emotional_tendencies")),
+    ("color_analyzer.analyze_contextual_preferences", 10000, _analyzer("analyze_contextual_preferences")),
+    ("response_processor.process_color_preference_analysis", 5000,
+        _response_processor("process_color_preference_analysis", create_color_preference_prompt(COLOR_DATA))),
+    ("response_processor.process_jung_energy_analysis", 5000,
+        _response_processor("process_jung_energy_analysis", create_jung_energy_prompt(COLOR_DATA["color_ranking"]))),
+    ("response_processor.process_comprehensive_profile", 5000,
+        _response_processor("process_comprehensive_profile", create_comprehensive_profile_prompt(COLOR_DATA))),
+    ("response_processor.process_recommendations", 5000,
+        _response_processor("process_recommendations", create_recommendations_prompt(""))),
+    ("api.analyze_color_preferences", 500, _api)
+)
+
+def write_results(results, output=None):
+    """
+    Write benchmark results as JSON with a stable key order.
+    
+    Args:
+        results (dict): Results from run_benchmarks
+        output (str, optional): File to write; standard output if not provided
+    """
+    text = json.dumps(results, indent=2, sort_keys=True) + "\n"
+    if output is None:
+        sys.stdout.write(text)
+    else:
+        with open(output, "w", encoding="utf-8") as output_file:
+            output_file.write(text)
+
+def main():
+    """
+    Run the pipeline benchmarks from the command line.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the Psycho-Color analysis pipeline.")
+    parser.add_argument("--output", help="JSON file to write; standard output if omitted")
+    parser.add_argument("--iterations", type=int, help="timed calls per benchmark, overriding the defaults")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    args = parser.parse_args()
+    
+    write_results(run_benchmarks(BENCHMARKS, args.iterations, args.filter), args.output)
+
+if __name__ == "__main__":
+    main()
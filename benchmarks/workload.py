@@ -0,0 +1,234 @@
+"""
+Synthetic Workload Module for Psycho-Color Analysis System
+
+This module generates synthetic color assessment payloads in the input
+format of ColorDataProcessor.process_color_preferences, in any quantity,
+for load tests and cache experiments. Rankings are drawn from a pool of
+distinct rankings with Zipfian popularity, so a few rankings are very
+common and most are rare, as with real users. Payloads also mix in
+contextual colors, alias spellings, typos and color-emotion associations
+at configurable rates.
+
+Generation is deterministic for a given seed and streams payloads one at
+a time, so millions of records can be written without holding them in
+memory:
+    
+    python -m benchmarks.workload --count 1000000 --output samples.jsonl
+"""
+
+import sys
+import json
+import random
+import argparse
+import itertools
+from code.color_analysis.color_analyzer import ColorAnalyzer
+from code.color_analysis.data_processor import ColorDataProcessor
+
+# Contextual color fields of the assessment
+CONTEXTUAL_KEYS = ("work_color", "relaxation_color", "social_color", "creative_color", "stress_color")
+
+class SyntheticWorkload:
+    """
+    Generates synthetic color assessment payloads.
+    """
+    
+    def __init__(self, seed=0, distinct_rankings=1000, zipf_exponent=1.1, ranking_length=(4, 8),
+                 contextual_rate=0.5, emotion_rate=0.3, alias_rate=0.2, typo_rate=0.02, string_ranking_rate=0.1):
+        """
+        Initialize the generator.
+        
+        Args:
+            seed (int, optional): Seed making the generated workload reproducible
+            distinct_rankings (int, optional): Number of distinct color rankings
+            zipf_exponent (float, optional): Skew of ranking popularity; the
+                k-th most popular ranking has weight 1 / k ** zipf_exponent,
+                and 0 makes every ranking equally popular
+            ranking_length (tuple, optional): Minimum and maximum colors per ranking
+            contextual_rate (float, optional): Probability of each contextual color field
+            emotion_rate (float, optional): Probability of color-emotion associations
+            alias_rate (float, optional): Probability of spelling a color with
+                an alias, such as "navy" for blue, or in mixed case
+            typo_rate (float, optional): Probability of a typo in a color name
+            string_ranking_rate (float, optional): Probability of sending the
+                ranking as a comma-separated string rather than a list
+        """
+        if distinct_rankings < 1:
+            raise ValueError("distinct_rankings must be at least 1")
+        
+        self.seed = seed
+        self.contextual_rate = contextual_rate
+        self.emotion_rate = emotion_rate
+        self.alias_rate = alias_rate
+        self.typo_rate = typo_rate
+        self.string_ranking_rate = string_ranking_rate
+        
+        self._colors = tuple(ColorDataProcessor.COLOR_MAPPINGS)
+        self._aliases = {
+            color: tuple(variation for variation in variations if variation != color)
+            for color, variations in ColorDataProcessor.COLOR_MAPPINGS.items()
+        }
+        
+        # The pool and its popularity are fixed by the seed
+        pool_random = random.Random(seed)
+        minimum, maximum = ranking_length
+        self.rankings = tuple(
+            tuple(pool_random.sample(self._colors, pool_random.randint(minimum, min(maximum, len(self._colors)))))
+            for _ in range(distinct_rankings)
+        )
+        self._cum_weights = list(itertools.accumulate(1.0 / rank ** zipf_exponent for rank in range(1, distinct_rankings + 1)))
+    
+    def generate(self, count, seed=None):
+        """
+        Generate payloads.
+        
+        Args:
+            count (int): Number of payloads
+            seed (int, optional): Seed for this stream; the generator's seed
+                if not provided
+                
+        Yields:
+            dict: Raw color preference data
+        """
+        rng = random.Random(self.seed if seed is None else seed)
+        for _ in range(count):
+            yield self._payload(rng)
+    
+    def _payload(self, rng):
+        """
+        Generate one payload.
+        
+        Args:
+            rng (random.Random): Random source
+            
+        Returns:
+            dict: Raw color preference data
+        """
+        ranking = rng.choices(self.rankings, cum_weights=self._cum_weights)[0]
+        
+        payload = {
+            "primary_color": self._spell(rng, ranking[0]),
+            "secondary_color": self._spell(rng, ranking[1])
+        }
+        
+        spelled = [self._spell(rng, color) for color in ranking]
+        if rng.random() < self.string_ranking_rate:
+            payload["color_ranking"] = ", ".join(spelled)
+        else:
+            payload["color_ranking"] = spelled
+        
+        for key in CONTEXTUAL_KEYS:
+            if rng.random() < self.contextual_rate:
+                # Contextual choices lean toward the user's favorite colors
+                if rng.random() < 0.7:
+                    color = rng.choice(ranking[:3])
+                else:
+                    color = rng.choice(self._colors)
+                payload[key] = self._spell(rng, color)
+        
+        emotional_colors = [color for color in ranking if color in ColorAnalyzer.COLOR_EMOTIONS]
+        if emotional_colors and rng.random() < self.emotion_rate:
+            associations = {}
+            for color in rng.sample(emotional_colors, rng.randint(1, min(3, len(emotional_colors)))):
+                emotions = rng.sample(ColorAnalyzer.COLOR_EMOTIONS[color], rng.randint(1, 3))
+                associations[self._spell(rng, color)] = emotions if rng.random() < 0.5 else ", ".join(emotions)
+            payload["color_emotion_associations"] = associations
+        
+        return payload
+    
+    def _spell(self, rng, color):
+        """
+        Spell a color name as a user might.
+        
+        Args:
+            rng (random.Random): Random source
+            color (str): Standard color name
+            
+        Returns:
+            str: The color as submitted, possibly an alias, in other case or misspelled
+        """
+        if rng.random() < self.alias_rate:
+            if rng.random() < 0.5:
+                color = rng.choice(self._aliases[color])
+            else:
+                color = rng.choice((color.title(), color.upper(), f" {color} "))
+        
+        if rng.random() < self.typo_rate:
+            color = _typo(rng, color)
+        
+        return color
+
+def _typo(rng, word):
+    """
+    Introduce a typo: drop, double or swap a character.
+    
+    Args:
+        rng (random.Random): Random source
+        word (str): The word
+        
+    Returns:
+        str: The misspelled word
+    """
+    if len(word) < 3:
+        return word
+    
+    position = rng.randrange(len(word) - 1)
+    kind = rng.randrange(3)
+    if kind == 0:
+        return word[:position] + word[position + 1:]
+    if kind == 1:
+        return word[:position] + word[position] + word[position:]
+    return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+
+def write_jsonl(payloads, output):
+    """
+    Write payloads as JSON lines.
+    
+    Args:
+        payloads (iterable): Raw color preference data
+        output (file): Text file to write to
+        
+    Returns:
+        int: Number of payloads written
+    """
+    count = 0
+    for payload in payloads:
+        output.write(json.dumps(payload))
+        output.write("\n")
+        count += 1
+    return count
+
+def main():
+    """
+    Write a synthetic workload from the command line.
+    """
+    parser = argparse.ArgumentParser(description="Generate synthetic Psycho-Color assessment payloads.")
+    parser.add_argument("--count", type=int, required=True, help="number of payloads")
+    parser.add_argument("--output", help="JSONL file to write; standard output if omitted")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--distinct-rankings", type=int, default=1000, help="number of distinct color rankings")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of ranking popularity; 0 for uniform")
+    parser.add_argument("--contextual-rate", type=float, default=0.5, help="probability of each contextual color")
+    parser.add_argument("--emotion-rate", type=float, default=0.3, help="probability of color-emotion associations")
+    parser.add_argument("--alias-rate", type=float, default=0.2, help="probability of an alias spelling")
+    parser.add_argument("--typo-rate", type=float, default=0.02, help="probability of a typo")
+    args = parser.parse_args()
+    
+    workload = SyntheticWorkload(
+        seed=args.seed,
+        distinct_rankings=args.distinct_rankings,
+        zipf_exponent=args.zipf,
+        contextual_rate=args.contextual_rate,
+        emotion_rate=args.emotion_rate,
+        alias_rate=args.alias_rate,
+        typo_rate=args.typo_rate
+    )
+    payloads = workload.generate(args.count)
+    
+    if args.output is None:
+        write_jsonl(payloads, sys.stdout)
+    else:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            write_jsonl(payloads, output_file)
+
+if __name__ == "__main__":
+    main()
@@ -8,10 +8,16 @@ from .color_analyzer import ColorAnalyzer
 from .data_processor import ColorDataProcessor
 from .profile_generator import ProfileGenerator
 from .api import PsychoColorAPI
+from .archetypes import ArchetypeTable, build_archetype_table
+from .job_queue import JobQueue, ProfileWorker
 
 __all__ = [
     'ColorAnalyzer',
     'ColorDataProcessor',
     'ProfileGenerator',
-    'PsychoColorAPI'
+    'PsychoColorAPI',
+    'ArchetypeTable',
+    'build_archetype_table',
+    'JobQueue',
+    'ProfileWorker'
 ]
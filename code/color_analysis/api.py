@@ -5,49 +5,281 @@ This module provides the API for the Psycho-Color Analysis system,
 integrating the color analysis algorithms and LLM integration framework.
 """
 
+import copy
+import json
+import time
+from contextlib import nullcontext
 from .color_analyzer import ColorAnalyzer
 from .data_processor import ColorDataProcessor
-from .profile_generator import ProfileGenerator
+from .profile_generator import ProfileGenerator, CompactProfile
+from .jobs import ProfileJobStore
+from ..llm_integration import SingleFlight
+from ..observability import span
+from ..observability.metrics import REGISTRY
+
+_ANALYSES = REGISTRY.counter("psycho_color_analyses_total", "Color preference analyses by profile mode and outcome.", ("mode", "outcome"))
+_ANALYSIS_SECONDS = REGISTRY.histogram("psycho_color_analysis_seconds", "Latency of complete color preference analyses.", ("mode",))
+_CACHE_LOOKUPS = REGISTRY.counter("psycho_color_cache_lookups_total", "Cache and request coalescing lookups by result.", ("cache", "result"))
 
 class PsychoColorAPI:
     """
     Main API for the Psycho-Color Analysis system.
     """
     
-    def __init__(self, api_key=None):
+    # Deterministic analysis sections, in the order they are streamed
+    ANALYSIS_SECTIONS = [
+        "jung_color_energies",
+        "personality_dimensions",
+        "emotional_tendencies",
+        "contextual_analysis"
+    ]
+    
+    # Seconds between checks when waiting on a durable queue job
+    JOB_POLL_INTERVAL = 0.1
+    
+    def __init__(self, api_key=None, job_queue=None, archetype_table=None, profiler=None, router=None,
+                 latency_budget=None):
         """
         Initialize the PsychoColorAPI.
         
         Args:
             api_key (str, optional): API key for the LLM service
+            job_queue (JobQueue, optional): Durable queue for background
+                profile jobs, processed by separate workers; jobs run
+                in-process and are not persisted if not provided
+            archetype_table (ArchetypeTable, optional): Pre-generated profiles
+                served instead of calling the LLM for covered archetypes
+            profiler (SamplingProfiler, optional): Profiler for a sampled
+                fraction of requests
+            router (ModelRouter, optional): Chooses the model for each type
+                of LLM call; one model is used for every call if not provided
+            latency_budget (float, optional): Seconds each LLM call may take;
+                the router downgrades to a faster model tier expected to fit
         """
         self.data_processor = ColorDataProcessor()
-        self.profile_generator = ProfileGenerator(api_key=api_key)
+        self.profile_generator = ProfileGenerator(
+            api_key=api_key,
+            router=router,
+            archetype_table=archetype_table,
+            latency_budget=latency_budget
+        )
+        self._inflight = SingleFlight()
+        self.jobs = ProfileJobStore()
+        self.job_queue = job_queue
+        self.profiler = profiler
+    
+    def _sample(self, name):
+        """
+        Get a context profiling a request if it is selected for sampling.
+        
+        Args:
+            name (str): Name of the request
+            
+        Returns:
+            context manager: Sampling context, or a no-op without a profiler
+        """
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.sample(name)
     
-    def analyze_color_preferences(self, color_data):
+    def analyze_color_preferences(self, color_data, use_llm=True, compact=False):
         """
         Analyze color preferences and generate a comprehensive psychological profile.
         
+        Concurrent requests with the same normalized color data share one run
+        of the pipeline, and each caller receives its own copy of the result.
+        
         Args:
             color_data (dict): Raw color preference data
+            use_llm (bool, optional): Generate the profile with the LLM; if
+                False, it is rendered from templates without an LLM call
+            compact (bool, optional): Return the profile in the dictionary
+                form of a CompactProfile, which keeps the LLM text once; load
+                it with CompactProfile.from_dict and expand it with materialize()
+                
+        Returns:
+            dict: Analysis results and the comprehensive psychological profile,
+                JSON-serializable in either form
+        """
+        mode = "llm" if use_llm else "template"
+        start = time.perf_counter()
+        with self._sample("analyze_color_preferences"), \
+                span("api.analyze_color_preferences", use_llm=use_llm) as request_span:
+            try:
+                # Process the color data
+                processed_data = self.data_processor.process_color_preferences(color_data)
+                
+                key = json.dumps([processed_data, use_llm], sort_keys=True, default=str)
+                result, shared = self._inflight.do(key, self._analyze_processed_data, processed_data, use_llm)
+            except Exception:
+                _ANALYSES.inc(mode=mode, outcome="error")
+                raise
+            
+            request_span.set_attribute("coalesced", shared)
+            _CACHE_LOOKUPS.inc(cache="analysis_inflight", result="hit" if shared else "miss")
+            _ANALYSES.inc(mode=mode, outcome="ok")
+            _ANALYSIS_SECONDS.observe(time.perf_counter() - start, mode=mode)
+            
+            if compact:
+                # The response text is immutable, so only the analysis is copied
+                analysis_results = copy.deepcopy(result["analysis_results"]) if shared else result["analysis_results"]
+                return {
+                    "analysis_results": analysis_results,
+                    "profile": CompactProfile.from_profile(analysis_results, result["profile"]).to_dict()
+                }
+            return copy.deepcopy(result) if shared else result
+    
+    def _analyze_processed_data(self, processed_data, use_llm=True):
+        """
+        Analyze processed color data and generate a comprehensive profile.
+        
+        Args:
+            processed_data (dict): Normalized color preference data
+            use_llm (bool, optional): Generate the profile with the LLM
             
         Returns:
             dict: Comprehensive psychological profile
         """
-        # Process the color data
-        processed_data = self.data_processor.process_color_preferences(color_data)
-        
         # Analyze the processed data
         analysis_results = self.data_processor.analyze_color_data(processed_data)
         
         # Generate a comprehensive profile
-        profile = self.profile_generator.generate_profile(analysis_results)
+        if use_llm:
+            profile = self.profile_generator.generate_profile(analysis_results)
+        else:
+            profile = self.profile_generator.render_profile(analysis_results)
         
         return {
             "analysis_results": analysis_results,
             "profile": profile
         }
     
+    def submit_color_preferences(self, color_data, priority=0, idempotency_key=None):
+        """
+        Analyze color preferences now and generate the profile in the background.
+        
+        The deterministic color analysis is returned immediately together
+        with a job ID; the LLM-generated profile is collected later with
+        get_profile_job.
+        
+        Args:
+            color_data (dict): Raw color preference data
+            priority (int, optional): Queue priority; higher runs first.
+                Only used with a durable job queue.
+            idempotency_key (str, optional): Key identifying the submission;
+                resubmitting with the same key returns the existing job.
+                Only used with a durable job queue.
+                
+        Returns:
+            dict: Job ID, status and the analysis results
+        """
+        with self._sample("submit_color_preferences"):
+            # Process the color data
+            processed_data = self.data_processor.process_color_preferences(color_data)
+            
+            # Analyze the processed data
+            analysis_results = self.data_processor.analyze_color_data(processed_data)
+            
+            if self.job_queue is not None:
+                job_id = self.job_queue.enqueue(
+                    {"analysis_results": analysis_results},
+                    priority=priority,
+                    idempotency_key=idempotency_key
+                )
+                return self.get_profile_job(job_id)
+            
+            # The caller may modify its results while the profile is generated
+            job = self.jobs.submit(
+                analysis_results,
+                self.profile_generator.generate_profile,
+                copy.deepcopy(analysis_results)
+            )
+            return job.to_dict()
+    
+    def get_profile_job(self, job_id, wait=None):
+        """
+        Get a background profile job, optionally waiting for it to finish.
+        
+        Args:
+            job_id (str): Job ID returned by submit_color_preferences
+            wait (float, optional): Maximum seconds to wait for the profile
+            
+        Returns:
+            dict: Job ID, status, analysis results and, once the job has
+                finished, the profile or error; None if the job is unknown
+        """
+        if self.job_queue is not None:
+            return self._get_queued_job(job_id, wait)
+        
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        
+        if wait:
+            job.wait(wait)
+        return job.to_dict()
+    
+    def _get_queued_job(self, job_id, wait=None):
+        """
+        Get a job from the durable job queue, optionally waiting for it to finish.
+        
+        Args:
+            job_id (str): The job ID
+            wait (float, optional): Maximum seconds to wait for the profile
+            
+        Returns:
+            dict: The job in the same form as in-process jobs, or None if unknown
+        """
+        deadline = time.monotonic() + (wait or 0)
+        job = self.job_queue.get(job_id)
+        while job is not None and job["status"] in ("queued", "running") and time.monotonic() < deadline:
+            time.sleep(self.JOB_POLL_INTERVAL)
+            job = self.job_queue.get(job_id)
+        
+        if job is None:
+            return None
+        
+        result = {
+            "job_id": job["job_id"],
+            "status": "pending" if job["status"] in ("queued", "running") else job["status"],
+            "analysis_results": job["payload"]["analysis_results"]
+        }
+        if job["status"] == "complete":
+            result["profile"] = job["result"]
+            if CompactProfile.is_compact(result["profile"]):
+                result["profile"] = CompactProfile.from_dict(result["profile"], result["analysis_results"]).materialize()
+        elif job["status"] == "failed":
+            result["error"] = job["error"]
+        
+        return result
+    
+    def stream_color_preferences(self, color_data):
+        """
+        Analyze color preferences, yielding profile sections as they become available.
+        
+        The deterministic color analysis sections are yielded immediately,
+        followed by each LLM-generated section as soon as it is complete.
+        
+        Args:
+            color_data (dict): Raw color preference data
+            
+        Yields:
+            tuple: (section key, section value)
+        """
+        # Process the color data
+        processed_data = self.data_processor.process_color_preferences(color_data)
+        
+        # Analyze the processed data
+        analysis_results = self.data_processor.analyze_color_data(processed_data)
+        
+        for key in self.ANALYSIS_SECTIONS:
+            if key in analysis_results:
+                yield key, analysis_results[key]
+        
+        # Stream the LLM-generated profile sections
+        for section in self.profile_generator.stream_profile(analysis_results):
+            yield section
+    
     def get_jung_color_energies(self, color_data):
         """
         Get Jung's Four Color Energies analysis.
@@ -0,0 +1,227 @@
+"""
+Archetype Module for Psycho-Color Analysis System
+
+This module pre-generates LLM profile content for frequent personality
+archetypes and serves it from an indexed local SQLite file. The LLM
+input is largely determined by a few variables of the color analysis: the
+primary and secondary Jung energies, the dominant personality traits and
+the emotional patterns. Users sharing those variables share an archetype,
+so the profile text and recommendations for frequent archetypes can be
+generated once offline and looked up at request time.
+
+The table is built from a sample of color preference submissions, one
+JSON object per line:
+    
+    python -m code.color_analysis.archetypes --samples samples.jsonl --db archetypes.db --top 200
+"""
+
+import os
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from collections import Counter
+from .data_processor import ColorDataProcessor
+from ..llm_integration import llm_priority, BATCH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archetypes (
+    key TEXT PRIMARY KEY,
+    sample_count INTEGER NOT NULL,
+    llm_profile TEXT NOT NULL,
+    recommendations TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+def archetype_key(analysis_results):
+    """
+    Get the archetype of a color analysis.
+    
+    Args:
+        analysis_results (dict): Results from color analysis
+        
+    Returns:
+        str: Key identifying the archetype
+    """
+    jung_energies = analysis_results.get("jung_color_energies", {})
+    personality_dimensions = analysis_results.get("personality_dimensions", {})
+    emotional_tendencies = analysis_results.get("emotional_tendencies", {})
+    
+    return json.dumps([
+        jung_energies.get("primary_energy", ""),
+        jung_energies.get("secondary_energy", ""),
+        sorted(personality_dimensions.get("dominant_traits", [])),
+        sorted(emotional_tendencies.get("emotional_patterns", []))
+    ])
+
+class ArchetypeTable:
+    """
+    Pre-generated LLM profile content indexed by archetype.
+    """
+    
+    def __init__(self, path):
+        """
+        Open the table, creating the file if needed.
+        
+        Args:
+            path (str): Path to the SQLite file
+        """
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+    
+    def _connection(self):
+        """
+        Get this thread's connection to the table.
+        
+        Returns:
+            sqlite3.Connection: The connection
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.connection = connection
+        return connection
+    
+    def close(self):
+        """
+        Close this thread's connection to the table.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+    
+    def lookup(self, analysis_results):
+        """
+        Look up the pre-generated content for a color analysis.
+        
+        Args:
+            analysis_results (dict): Results from color analysis
+            
+        Returns:
+            tuple: (structured comprehensive profile, structured
+                recommendations), or None if the archetype is not covered
+        """
+        row = self._connection().execute(
+            "SELECT llm_profile, recommendations FROM archetypes WHERE key = ?",
+            (archetype_key(analysis_results),)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), json.loads(row[1])
+    
+    def store(self, key, llm_profile, recommendations, sample_count=0):
+        """
+        Store the content for an archetype, replacing any existing entry.
+        
+        Args:
+            key (str): Archetype key from archetype_key
+            llm_profile (dict): Structured comprehensive profile
+            recommendations (dict): Structured recommendations
+            sample_count (int, optional): How often the archetype was seen
+        """
+        self._connection().execute(
+            "INSERT OR REPLACE INTO archetypes (key, sample_count, llm_profile, recommendations, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, sample_count, json.dumps(llm_profile), json.dumps(recommendations), time.time())
+        )
+    
+    def __contains__(self, key):
+        """
+        Check whether an archetype is covered.
+        
+        Args:
+            key (str): Archetype key from archetype_key
+            
+        Returns:
+            bool: True if the table has content for the archetype
+        """
+        row = self._connection().execute("SELECT 1 FROM archetypes WHERE key = ?", (key,)).fetchone()
+        return row is not None
+    
+    def __len__(self):
+        """
+        Get the number of covered archetypes.
+        
+        Returns:
+            int: Number of archetypes in the table
+        """
+        return self._connection().execute("SELECT COUNT(*) FROM archetypes").fetchone()[0]
+
+def build_archetype_table(table, color_samples, profile_generator, top=None, min_count=1, rebuild=False):
+    """
+    Pre-generate profile content for the most frequent archetypes in a sample.
+    
+    LLM calls are made at batch priority so that a build running next to
+    live traffic does not starve it.
+    
+    Args:
+        table (ArchetypeTable): Table to fill
+        color_samples (iterable): Raw color preference data, one dict per submission
+        profile_generator (ProfileGenerator): Generator used to call the LLM
+        top (int, optional): Maximum number of archetypes to generate
+        min_count (int, optional): Minimum occurrences for an archetype to be generated
+        rebuild (bool, optional): Regenerate archetypes already in the table
+        
+    Returns:
+        int: Number of archetypes generated
+    """
+    data_processor = ColorDataProcessor()
+    counts = Counter()
+    representatives = {}
+    
+    for color_data in color_samples:
+        processed_data = data_processor.process_color_preferences(color_data)
+        analysis_results = data_processor.analyze_color_data(processed_data)
+        key = archetype_key(analysis_results)
+        counts[key] += 1
+        representatives.setdefault(key, analysis_results)
+    
+    generated = 0
+    for key, count in counts.most_common(top):
+        if count < min_count:
+            break
+        if not rebuild and key in table:
+            continue
+        
+        profile_data = profile_generator._prepare_profile_data(representatives[key])
+        with llm_priority(BATCH):
+            llm_profile, recommendations = profile_generator._generate_llm_content(profile_data)
+        table.store(key, llm_profile, recommendations, count)
+        generated += 1
+    
+    return generated
+
+def main():
+    """
+    Build an archetype table from a file of sample submissions.
+    """
+    from .profile_generator import ProfileGenerator
+    
+    parser = argparse.ArgumentParser(description="Pre-generate Psycho-Color profiles for frequent archetypes.")
+    parser.add_argument("--samples", required=True, help="JSONL file of color preference submissions")
+    parser.add_argument("--db", default=os.environ.get("ARCHETYPE_DB", "archetypes.db"), help="archetype table path")
+    parser.add_argument("--top", type=int, default=None, help="maximum number of archetypes to generate")
+    parser.add_argument("--min-count", type=int, default=1, help="minimum occurrences of an archetype")
+    parser.add_argument("--rebuild", action="store_true", help="regenerate archetypes already in the table")
+    args = parser.parse_args()
+    
+    with open(args.samples, encoding="utf-8") as samples_file:
+        samples = [json.loads(line) for line in samples_file if line.strip()]
+    
+    table = ArchetypeTable(args.db)
+    generated = build_archetype_table(
+        table,
+        samples,
+        ProfileGenerator(api_key=os.environ.get("LLM_API_KEY")),
+        top=args.top,
+        min_count=args.min_count,
+        rebuild=args.rebuild
+    )
+    print(f"Generated {generated} archetypes; {len(table)} in {args.db}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""
+ASGI Entrypoint for Psycho-Color Analysis System
+
+This module creates the application from environment configuration for
+ASGI servers. Importing it builds the shared API, LLM client and optional
+job queue, so it is imported only by the server process, for example:
+    
+    gunicorn -w 4 -k uvicorn.workers.UvicornWorker code.color_analysis.asgi:app
+"""
+
+from .server import create_app
+
+# Application instance for ASGI servers
+app = create_app()
@@ -5,13 +5,64 @@ This module contains the core algorithms for analyzing color preferences
 and generating psychological insights based on color psychology frameworks.
 """
 
+import sys
+from ..observability import traced
+
+class FrozenDict(dict):
+    """
+    A dictionary that cannot be modified.
+    
+    Unlike a read-only mapping view, it is still a dict, so frozen tables and
+    values read from them can be JSON-encoded, pickled for worker processes
+    and deep-copied; copies are the table itself.
+    """
+    
+    __slots__ = ()
+    
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"'{type(self).__name__}' object is read-only")
+    
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+    
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+    
+    def __copy__(self):
+        return self
+    
+    def __deepcopy__(self, memo):
+        return self
+
+def freeze(value):
+    """
+    Make a framework table immutable.
+    
+    Dictionaries become FrozenDicts, lists become tuples and strings are
+    interned, recursively, so the table and any value read from it can be
+    shared by every analysis and thread without copying.
+    
+    Args:
+        value: The table or value to freeze
+        
+    Returns:
+        The frozen value
+    """
+    if isinstance(value, dict):
+        return FrozenDict({freeze(key): freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
 class ColorAnalyzer:
     """
     Core class for analyzing color preferences and generating psychological insights.
     """
     
-    # Jung's Four Color Energies
-    JUNG_COLORS = {
+    # Jung's Four Color Energies; frozen, so traits can be returned without copying
+    JUNG_COLORS = freeze({
         "Cool Blue": {
             "traits": ["analytical", "objective", "detached", "logical", "methodical", "precise"],
             "colors": ["blue", "navy", "teal", "cyan", "indigo"]
@@ -28,10 +79,10 @@ class ColorAnalyzer:
             "traits": ["decisive", "assertive", "bold", "competitive", "direct", "action-oriented"],
             "colors": ["red", "crimson", "scarlet", "maroon", "burgundy"]
         }
-    }
+    })
     
     # Color-Emotion Associations
-    COLOR_EMOTIONS = {
+    COLOR_EMOTIONS = freeze({
         "red": ["passion", "excitement", "love", "anger", "energy", "danger"],
         "blue": ["calm", "trust", "wisdom", "peace", "loyalty", "sadness"],
         "green": ["growth", "harmony", "nature", "balance", "fertility", "envy"],
@@ -42,10 +93,10 @@ class ColorAnalyzer:
         "black": ["power", "elegance", "formality", "death", "evil", "mystery"],
         "white": ["purity", "innocence", "cleanliness", "simplicity", "sterility", "emptiness"],
         "brown": ["reliability", "stability", "earthiness", "warmth", "dullness", "heaviness"]
-    }
+    })
     
     # Personality Dimensions
-    PERSONALITY_DIMENSIONS = {
+    PERSONALITY_DIMENSIONS = freeze({
         "introversion_extraversion": {
             "introversion": ["blue", "purple", "green", "black", "brown"],
             "extraversion": ["red", "orange", "yellow", "pink"]
@@ -66,7 +117,7 @@ class ColorAnalyzer:
             "analytical": ["blue", "black", "white", "gray"],
             "creative": ["purple", "yellow", "orange", "pink"]
         }
-    }
+    })
     
     def __init__(self):
         """
@@ -74,6 +125,7 @@ class ColorAnalyzer:
         """
         pass
     
+    @traced("color_analyzer.analyze_color_preferences")
     def analyze_color_preferences(self, color_data):
         """
         Analyze color preferences and generate psychological insights.
@@ -101,6 +153,7 @@ class ColorAnalyzer:
         
         return results
     
+    @traced("color_analyzer.analyze_jung_energies")
     def analyze_jung_energies(self, color_data):
         """
         Analyze Jung's Four Color Energies based on color preferences.
@@ -175,6 +228,7 @@ class ColorAnalyzer:
             "secondary_traits": secondary_traits
         }
     
+    @traced("color_analyzer.analyze_personality_dimensions")
     def analyze_personality_dimensions(self, color_data):
         """
         Analyze personality dimensions based on color preferences.
@@ -261,6 +315,7 @@ class ColorAnalyzer:
             "dominant_traits": dominant_traits
         }
     
+    @traced("color_analyzer.analyze_emotional_tendencies")
     def analyze_emotional_tendencies(self, color_data):
         """
         Analyze emotional tendencies based on color preferences.
@@ -290,15 +345,15 @@ class ColorAnalyzer:
                 color_ranking.append(secondary_color)
         
         # Get color-emotion associations
-        primary_emotions = self.COLOR_EMOTIONS.get(primary_color, [])
-        secondary_emotions = self.COLOR_EMOTIONS.get(secondary_color, [])
+        primary_emotions = self.COLOR_EMOTIONS.get(primary_color, ())
+        secondary_emotions = self.COLOR_EMOTIONS.get(secondary_color, ())
         
         # Calculate emotion scores
         emotion_scores = {}
         
         for color in color_ranking[:5]:  # Consider top 5 colors
             weight = 10 - color_ranking.index(color) * 2  # 10, 8, 6, 4, 2
-            emotions = self.COLOR_EMOTIONS.get(color, [])
+            emotions = self.COLOR_EMOTIONS.get(color, ())
             
             for emotion in emotions:
                 if emotion in emotion_scores:
@@ -344,6 +399,7 @@ class ColorAnalyzer:
             "emotional_patterns": emotional_patterns
         }
     
+    @traced("color_analyzer.analyze_contextual_preferences")
     def analyze_contextual_preferences(self, color_data):
         """
         Analyze contextual color preferences.
@@ -7,7 +7,8 @@ for the Psycho-Color Analysis system.
 
 import re
 import json
-from .color_analyzer import ColorAnalyzer
+from .color_analyzer import ColorAnalyzer, freeze
+from ..observability import traced, current_span
 
 class ColorDataProcessor:
     """
@@ -15,7 +16,7 @@ class ColorDataProcessor:
     """
     
     # Standard color names and their variations
-    COLOR_MAPPINGS = {
+    COLOR_MAPPINGS = freeze({
         "red": ["red", "crimson", "scarlet", "maroon", "burgundy", "ruby"],
         "blue": ["blue", "navy", "teal", "cyan", "indigo", "azure", "cobalt"],
         "green": ["green", "olive", "sage", "mint", "emerald", "forest", "lime"],
@@ -27,7 +28,7 @@ class ColorDataProcessor:
         "white": ["white", "ivory", "cream", "eggshell"],
         "brown": ["brown", "tan", "beige", "khaki", "chocolate", "coffee"],
         "gray": ["gray", "grey", "silver", "slate", "ash"]
-    }
+    })
     
     def __init__(self):
         """
@@ -35,6 +36,7 @@ class ColorDataProcessor:
         """
         self.color_analyzer = ColorAnalyzer()
     
+    @traced("data_processor.process_color_preferences")
     def process_color_preferences(self, raw_data):
         """
         Process raw color preference data.
@@ -45,6 +47,7 @@ class ColorDataProcessor:
         Returns:
             dict: Processed color data ready for analysis
         """
+        current_span().set_attribute("fields", len(raw_data))
         processed_data = {}
         
         # Process primary and secondary colors
@@ -80,6 +83,7 @@ class ColorDataProcessor:
         
         return processed_data
     
+    @traced("data_processor.analyze_color_data")
     def analyze_color_data(self, color_data):
         """
         Analyze processed color data.
@@ -0,0 +1,400 @@
+"""
+Job Queue Module for Psycho-Color Analysis System
+
+This module provides a durable, SQLite-backed queue for background profile
+generation. Queued profiles survive restarts and traffic bursts are
+absorbed by the queue rather than the request handlers. Jobs are claimed
+by worker processes under a visibility timeout, so a job whose worker dies
+becomes available again; failed jobs are retried with backoff up to a
+maximum number of attempts. Higher priority jobs are claimed first, and an
+idempotency key lets a client resubmit without creating a duplicate job.
+
+Workers run on the same host as the queue database, for example:
+    
+    python -m code.color_analysis.job_queue --db profiles.db --processes 4
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import sqlite3
+import argparse
+import multiprocessing
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    idempotency_key TEXT UNIQUE,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease TEXT,
+    available_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority DESC, available_at, created_at);
+"""
+
+class JobQueue:
+    """
+    Durable priority job queue stored in a SQLite database.
+    
+    Job statuses are "queued", "running", "complete" and "failed". The
+    queue may be shared by any number of threads and processes on one host.
+    """
+    
+    def __init__(self, path, visibility_timeout=300, max_attempts=3, retry_delay=5):
+        """
+        Initialize the queue, creating the database if needed.
+        
+        Args:
+            path (str): Path to the SQLite database file
+            visibility_timeout (float, optional): Seconds a claimed job stays
+                invisible to other workers before it is considered abandoned
+            max_attempts (int, optional): Attempts before a job is marked failed
+            retry_delay (float, optional): Seconds before the first retry,
+                doubling with each further attempt
+        """
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+    
+    @contextmanager
+    def _connect(self):
+        """
+        Open a connection for one operation.
+        
+        Yields:
+            sqlite3.Connection: Connection in autocommit mode
+        """
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+    
+    @contextmanager
+    def _transaction(self):
+        """
+        Open a connection and run one write transaction on it.
+        
+        The transaction is committed when the block exits normally and
+        rolled back if it raises.
+        
+        Yields:
+            sqlite3.Connection: Connection inside an immediate transaction
+        """
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+    
+    def enqueue(self, payload, priority=0, idempotency_key=None):
+        """
+        Add a job to the queue.
+        
+        Args:
+            payload (dict): JSON-serializable job payload
+            priority (int, optional): Higher priority jobs are claimed first
+            idempotency_key (str, optional): Key identifying the submission;
+                resubmitting with the same key returns the existing job
+                
+        Returns:
+            str: The job ID
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        
+        with self._transaction() as db:
+            if idempotency_key is not None:
+                row = db.execute("SELECT id FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+                if row is not None:
+                    return row["id"]
+            
+            db.execute(
+                "INSERT INTO jobs (id, idempotency_key, priority, status, payload, available_at, created_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, idempotency_key, priority, json.dumps(payload), now, now)
+            )
+        
+        return job_id
+    
+    def claim(self):
+        """
+        Claim the highest priority job that is ready to run.
+        
+        Jobs whose visibility timeout has expired are reclaimed, or marked
+        failed if they have no attempts left.
+        
+        Returns:
+            dict: The job, including its payload and the lease token needed
+                to complete or fail it; None if no job is ready
+        """
+        now = time.time()
+        lease = uuid.uuid4().hex
+        
+        with self._transaction() as db:
+            # Abandoned jobs go back on the queue or fail for good
+            db.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Visibility timeout expired', lease = NULL, finished_at = ? "
+                "WHERE status = 'running' AND available_at <= ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            )
+            db.execute(
+                "UPDATE jobs SET status = 'queued', lease = NULL WHERE status = 'running' AND available_at <= ?",
+                (now,)
+            )
+            
+            row = db.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' AND available_at <= ? "
+                "ORDER BY priority DESC, created_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            db.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease = ?, available_at = ? WHERE id = ?",
+                (lease, now + self.visibility_timeout, row["id"])
+            )
+            job = db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+        
+        return self._to_dict(job)
+    
+    def complete(self, job, result):
+        """
+        Record the result of a claimed job.
+        
+        Args:
+            job (dict): The job as returned by claim
+            result (dict): JSON-serializable job result
+            
+        Returns:
+            bool: False if the lease had expired and the job was reclaimed
+        """
+        with self._connect() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET status = 'complete', result = ?, error = NULL, lease = NULL, finished_at = ? "
+                "WHERE id = ? AND lease = ?",
+                (json.dumps(result), time.time(), job["job_id"], job["lease"])
+            )
+        return cursor.rowcount == 1
+    
+    def fail(self, job, error):
+        """
+        Record a failed attempt, scheduling a retry if attempts remain.
+        
+        Args:
+            job (dict): The job as returned by claim
+            error (str): Description of the failure
+            
+        Returns:
+            bool: False if the lease had expired and the job was reclaimed
+        """
+        now = time.time()
+        if job["attempts"] >= self.max_attempts:
+            query = ("UPDATE jobs SET status = 'failed', error = ?, lease = NULL, finished_at = ? "
+                     "WHERE id = ? AND lease = ?")
+            params = (error, now, job["job_id"], job["lease"])
+        else:
+            query = ("UPDATE jobs SET status = 'queued', error = ?, lease = NULL, available_at = ? "
+                     "WHERE id = ? AND lease = ?")
+            delay = self.retry_delay * 2 ** (job["attempts"] - 1)
+            params = (error, now + delay, job["job_id"], job["lease"])
+        
+        with self._connect() as db:
+            cursor = db.execute(query, params)
+        return cursor.rowcount == 1
+    
+    def get(self, job_id):
+        """
+        Look up a job.
+        
+        Args:
+            job_id (str): The job ID
+            
+        Returns:
+            dict: The job, or None if unknown
+        """
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+    
+    def stats(self):
+        """
+        Count jobs by status.
+        
+        Returns:
+            dict: Number of jobs in each status
+        """
+        with self._connect() as db:
+            rows = db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+    
+    def _to_dict(self, row):
+        """
+        Convert a database row to a job dictionary.
+        
+        Args:
+            row (sqlite3.Row): The job row
+            
+        Returns:
+            dict: The job
+        """
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "priority": row["priority"],
+            "payload": json.loads(row["payload"]),
+            "result": json.loads(row["result"]) if row["result"] is not None else None,
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "lease": row["lease"]
+        }
+
+class ProfileWorker:
+    """
+    Worker generating profiles for jobs claimed from a JobQueue.
+    """
+    
+    def __init__(self, queue, profile_generator=None, api_key=None, poll_interval=0.5, compact=False):
+        """
+        Initialize the worker.
+        
+        Args:
+            queue (JobQueue): Queue to claim jobs from
+            profile_generator (ProfileGenerator, optional): Generator to use;
+                one is created from the API key if not provided
+            api_key (str, optional): API key for the LLM service
+            poll_interval (float, optional): Seconds to sleep when the queue is empty
+            compact (bool, optional): Store profiles in compact form, with the
+                LLM text kept once; they are expanded when the job is read
+        """
+        if profile_generator is None:
+            from .profile_generator import ProfileGenerator
+            profile_generator = ProfileGenerator(api_key=api_key)
+        
+        self.queue = queue
+        self.profile_generator = profile_generator
+        self.poll_interval = poll_interval
+        self.compact = compact
+    
+    def run_once(self):
+        """
+        Claim and process one job.
+        
+        Returns:
+            bool: True if a job was processed, False if none was ready
+        """
+        job = self.queue.claim()
+        if job is None:
+            return False
+        
+        analysis_results = job["payload"]["analysis_results"]
+        try:
+            profile = self.profile_generator.generate_profile(analysis_results)
+        except Exception as e:
+            self.queue.fail(job, str(e))
+        else:
+            if self.compact:
+                from .profile_generator import CompactProfile
+                profile = CompactProfile.from_profile(analysis_results, profile).to_dict()
+            self.queue.complete(job, profile)
+        return True
+    
+    def run(self, stop_event=None):
+        """
+        Process jobs until the stop event is set.
+        
+        Database errors, such as a lock held past the busy timeout, are
+        logged and the worker polls again; the job being processed, if
+        any, is reclaimed after its visibility timeout.
+        
+        Args:
+            stop_event (Event, optional): Event that stops the worker
+        """
+        while stop_event is None or not stop_event.is_set():
+            try:
+                processed = self.run_once()
+            except sqlite3.Error:
+                logger.exception("Profile worker failed to process a job")
+                processed = False
+            if not processed:
+                time.sleep(self.poll_interval)
+
+def _run_worker(path, api_key, stop_event, compact=False):
+    """
+    Entry point for a worker process.
+    
+    Args:
+        path (str): Path to the queue database
+        api_key (str): API key for the LLM service
+        stop_event (Event): Event that stops the worker
+        compact (bool, optional): Store profiles in compact form
+    """
+    ProfileWorker(JobQueue(path), api_key=api_key, compact=compact).run(stop_event)
+
+def start_workers(path, processes=2, api_key=None, compact=False):
+    """
+    Start worker processes for a queue.
+    
+    Args:
+        path (str): Path to the queue database
+        processes (int, optional): Number of worker processes
+        api_key (str, optional): API key for the LLM service
+        compact (bool, optional): Store profiles in compact form
+        
+    Returns:
+        tuple: (list of processes, stop event shared by the workers)
+    """
+    stop_event = multiprocessing.Event()
+    workers = [
+        multiprocessing.Process(target=_run_worker, args=(path, api_key, stop_event, compact), daemon=True)
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    return workers, stop_event
+
+def main():
+    """
+    Run profile workers until interrupted.
+    """
+    parser = argparse.ArgumentParser(description="Run Psycho-Color profile generation workers.")
+    parser.add_argument("--db", default=os.environ.get("JOB_QUEUE_DB", "profile_jobs.db"), help="queue database path")
+    parser.add_argument("--processes", type=int, default=2, help="number of worker processes")
+    parser.add_argument("--compact", action="store_true", help="store profiles with the LLM text kept once")
+    args = parser.parse_args()
+    
+    # Create the schema before the workers race to do so
+    JobQueue(args.db)
+    workers, stop_event = start_workers(args.db, args.processes, os.environ.get("LLM_API_KEY"), args.compact)
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        stop_event.set()
+        for worker in workers:
+            worker.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Profile Job Module for Psycho-Color Analysis System
+
+This module runs LLM profile enrichment in the background so that the
+deterministic color analysis can be returned immediately, with the
+completed profile collected later by job ID. The number of jobs waiting
+or running is bounded; submissions beyond the bound are rejected rather
+than queued in memory.
+"""
+
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+class JobStoreFull(Exception):
+    """
+    Raised when a job is submitted while the store has max_pending unfinished jobs.
+    """
+
+class ProfileJob:
+    """
+    A background profile generation job.
+    """
+    
+    def __init__(self, job_id, analysis_results, future):
+        """
+        Initialize the job.
+        
+        Args:
+            job_id (str): Unique job identifier
+            analysis_results (dict): Deterministic color analysis results
+            future (Future): Future for the profile being generated
+        """
+        self.job_id = job_id
+        self.analysis_results = analysis_results
+        self.future = future
+        self.created_at = time.time()
+        self.finished_at = None
+    
+    @property
+    def status(self):
+        """
+        Get the job status.
+        
+        Returns:
+            str: "pending", "complete" or "failed"
+        """
+        if not self.future.done():
+            return "pending"
+        if self.future.exception() is not None:
+            return "failed"
+        return "complete"
+    
+    def wait(self, timeout=None):
+        """
+        Wait for the job to finish.
+        
+        Args:
+            timeout (float, optional): Maximum seconds to wait
+            
+        Returns:
+            bool: True if the job has finished
+        """
+        wait([self.future], timeout=timeout)
+        return self.future.done()
+    
+    def to_dict(self):
+        """
+        Describe the job for API responses.
+        
+        Returns:
+            dict: Job ID, status, analysis results and, once available, the
+                profile or error
+        """
+        status = self.status
+        job = {
+            "job_id": self.job_id,
+            "status": status,
+            "analysis_results": self.analysis_results
+        }
+        
+        if status == "complete":
+            job["profile"] = self.future.result()
+        elif status == "failed":
+            job["error"] = str(self.future.exception())
+        
+        return job
+
+class ProfileJobStore:
+    """
+    Runs profile generation jobs on a thread pool and keeps them for lookup.
+    """
+    
+    def __init__(self, max_workers=4, ttl=3600, max_pending=256):
+        """
+        Initialize the job store.
+        
+        Args:
+            max_workers (int, optional): Threads running profile generation
+            ttl (float, optional): Seconds finished jobs are kept for lookup
+            max_pending (int, optional): Unfinished jobs allowed at once;
+                further submissions raise JobStoreFull
+        """
+        self.ttl = ttl
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="profile-job")
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+    
+    def submit(self, analysis_results, fn, *args):
+        """
+        Start a background job.
+        
+        Args:
+            analysis_results (dict): Deterministic color analysis results
+            fn (callable): Function producing the profile
+            *args: Arguments for the function
+            
+        Returns:
+            ProfileJob: The submitted job
+            
+        Raises:
+            JobStoreFull: If max_pending jobs are already unfinished
+        """
+        self._expire()
+        
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobStoreFull(f"{self._pending} profile jobs are already pending")
+            self._pending += 1
+        
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        
+        job = ProfileJob(uuid.uuid4().hex, analysis_results, future)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        future.add_done_callback(lambda _: self._finish(job))
+        return job
+    
+    def _finish(self, job):
+        """
+        Record that a job has finished and release its pending slot.
+        
+        Args:
+            job (ProfileJob): The finished job
+        """
+        with self._lock:
+            job.finished_at = time.time()
+            self._pending -= 1
+    
+    def get(self, job_id):
+        """
+        Look up a job.
+        
+        Args:
+            job_id (str): The job identifier
+            
+        Returns:
+            ProfileJob: The job, or None if unknown or expired
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def stats(self):
+        """
+        Count jobs by status.
+        
+        Returns:
+            dict: Number of jobs in each status
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+        
+        counts = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+    
+    def _expire(self):
+        """
+        Drop finished jobs older than the TTL.
+        """
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+    
+    def drain(self, timeout=None):
+        """
+        Stop accepting jobs and wait for submitted ones to finish.
+        
+        Args:
+            timeout (float, optional): Maximum seconds to wait
+            
+        Returns:
+            bool: True if every job finished within the timeout
+        """
+        with self._lock:
+            futures = [job.future for job in self._jobs.values()]
+        
+        self.executor.shutdown(wait=False)
+        _, not_done = wait(futures, timeout=timeout)
+        return not not_done
@@ -5,71 +5,161 @@ This module generates comprehensive psychological profiles based on
 color analysis results and LLM-generated insights.
 """
 
-from ..llm_integration import LLMFramework
+import copy
+from .template_renderer import TemplateRenderer
+from ..llm_integration import LLMFramework, LLMError, ResponseProcessor, SingleFlight, create_comprehensive_profile_prompt
+from ..observability import span, traced, current_span
+from ..observability.metrics import REGISTRY
+
+_PROFILES = REGISTRY.counter("psycho_color_profiles_total", "Profiles produced, by where their content came from.", ("source",))
+_CACHE_LOOKUPS = REGISTRY.counter("psycho_color_cache_lookups_total", "Cache and request coalescing lookups by result.", ("cache", "result"))
 
 class ProfileGenerator:
     """
     Generates comprehensive psychological profiles based on color analysis results.
     """
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, router=None, archetype_table=None, renderer=None, template_fallback=False,
+                 latency_budget=None):
         """
         Initialize the ProfileGenerator.
         
         Args:
             api_key (str, optional): API key for the LLM service
+            router (ModelRouter, optional): Chooses the model for each type
+                of LLM call; one model is used for every call if not provided
+            archetype_table (ArchetypeTable, optional): Pre-generated profiles
+                served instead of calling the LLM for covered archetypes
+            renderer (TemplateRenderer, optional): Renders profiles without the LLM
+            template_fallback (bool, optional): Render the profile from templates
+                if the LLM call fails with an LLMError instead of raising the
+                error; such profiles have "source" set to "template". Leave
+                it off where failed calls are retried, such as queue workers.
+            latency_budget (float, optional): Seconds each LLM call may take;
+                the router downgrades to a faster model tier expected to fit
         """
-        self.llm_framework = LLMFramework(api_key=api_key)
+        self.llm_framework = LLMFramework(api_key=api_key, router=router)
+        self.archetype_table = archetype_table
+        self.renderer = renderer if renderer is not None else TemplateRenderer()
+        self.template_fallback = template_fallback
+        self.latency_budget = latency_budget
+        self._inflight = SingleFlight()
     
     def generate_profile(self, analysis_results):
         """
         Generate a comprehensive psychological profile.
         
+        Profiles for archetypes covered by the archetype table are served
+        from it without calling the LLM. Otherwise, concurrent requests that
+        render the same profile prompt share one generation, and each caller
+        receives its own copy of the result.
+        
         Args:
             analysis_results (dict): Results from color analysis
             
         Returns:
             dict: Comprehensive psychological profile
         """
-        # Extract key information from analysis results
-        jung_energies = analysis_results.get("jung_color_energies", {})
-        personality_dimensions = analysis_results.get("personality_dimensions", {})
-        emotional_tendencies = analysis_results.get("emotional_tendencies", {})
-        contextual_analysis = analysis_results.get("contextual_analysis", {})
-        processed_data = analysis_results.get("processed_data", {})
+        with span("profile_generator.generate_profile") as profile_span:
+            if self.archetype_table is not None:
+                content = self.archetype_table.lookup(analysis_results)
+                profile_span.set_attribute("archetype_hit", content is not None)
+                _CACHE_LOOKUPS.inc(cache="archetype", result="miss" if content is None else "hit")
+                if content is not None:
+                    _PROFILES.inc(source="archetype")
+                    return self._assemble_profile(analysis_results, *content)
+            
+            # Prepare data for LLM
+            profile_data = self._prepare_profile_data(analysis_results)
+            
+            key = create_comprehensive_profile_prompt(profile_data)
+            profile, shared = self._inflight.do(key, self._generate_profile, analysis_results, profile_data)
+            profile_span.set_attribute("coalesced", shared)
+            _CACHE_LOOKUPS.inc(cache="profile_inflight", result="hit" if shared else "miss")
+            return copy.deepcopy(profile) if shared else profile
+    
+    def _generate_profile(self, analysis_results, profile_data):
+        """
+        Generate a comprehensive psychological profile from prepared data.
         
-        # Prepare data for LLM
-        profile_data = {
-            "primary_energy": jung_energies.get("primary_energy", ""),
-            "secondary_energy": jung_energies.get("secondary_energy", ""),
-            "energy_distribution": jung_energies.get("energy_distribution", {}),
-            "primary_traits": jung_energies.get("primary_traits", []),
-            "secondary_traits": jung_energies.get("secondary_traits", []),
-            "dimension_scores": personality_dimensions.get("dimension_scores", {}),
-            "dominant_traits": personality_dimensions.get("dominant_traits", []),
-            "primary_emotions": emotional_tendencies.get("primary_emotions", []),
-            "secondary_emotions": emotional_tendencies.get("secondary_emotions", []),
-            "top_emotions": emotional_tendencies.get("top_emotions", []),
-            "emotional_patterns": emotional_tendencies.get("emotional_patterns", []),
-            "color_preferences": processed_data
-        }
+        Args:
+            analysis_results (dict): Results from color analysis
+            profile_data (dict): Profile data prepared for the LLM
+            
+        Returns:
+            dict: Comprehensive psychological profile
+        """
+        try:
+            llm_profile, recommendations = self._generate_llm_content(profile_data)
+        except LLMError:
+            if not self.template_fallback:
+                raise
+            current_span().set_attribute("template_fallback", True)
+            _PROFILES.inc(source="template_fallback")
+            profile = self._assemble_profile(analysis_results, *self.renderer.render(analysis_results))
+            profile["source"] = "template"
+            return profile
+        _PROFILES.inc(source="llm")
+        return self._assemble_profile(analysis_results, llm_profile, recommendations)
+    
+    @traced("profile_generator.render_profile")
+    def render_profile(self, analysis_results):
+        """
+        Render a comprehensive psychological profile without calling the LLM.
         
-        # Add contextual analysis if available
-        if contextual_analysis:
-            profile_data.update({
-                "consistency_score": contextual_analysis.get("consistency_score", 0),
-                "contextual_patterns": contextual_analysis.get("contextual_patterns", []),
-                "work_insights": contextual_analysis.get("work_insights", []),
-                "relaxation_insights": contextual_analysis.get("relaxation_insights", []),
-                "social_insights": contextual_analysis.get("social_insights", [])
-            })
+        The profile text is composed from the template renderer's fragment
+        library and has the same keys as a generated profile.
+        
+        Args:
+            analysis_results (dict): Results from color analysis
+            
+        Returns:
+            dict: Comprehensive psychological profile
+        """
+        _PROFILES.inc(source="template")
+        return self._assemble_profile(analysis_results, *self.renderer.render(analysis_results))
+    
+    def _generate_llm_content(self, profile_data):
+        """
+        Generate the LLM-written parts of a profile.
         
+        Args:
+            profile_data (dict): Profile data prepared for the LLM
+            
+        Returns:
+            tuple: (structured comprehensive profile, structured recommendations)
+        """
         # Generate comprehensive profile using LLM
-        llm_profile = self.llm_framework.generate_comprehensive_profile(profile_data)
+        llm_profile = self.llm_framework.generate_comprehensive_profile(profile_data, latency_budget=self.latency_budget)
         
         # Generate recommendations based on profile
         profile_summary = self._create_profile_summary(profile_data)
-        recommendations = self.llm_framework.generate_recommendations(profile_summary)
+        recommendations = self.llm_framework.generate_recommendations(profile_summary, latency_budget=self.latency_budget)
+        
+        return llm_profile, recommendations
+    
+    @staticmethod
+    def _assemble_profile(analysis_results, llm_profile, recommendations):
+        """
+        Combine color analysis results and LLM-written content into a profile.
+        
+        Args:
+            analysis_results (dict): Results from color analysis
+            llm_profile (dict): Structured comprehensive profile from the LLM
+            recommendations (dict): Structured recommendations from the LLM
+            
+        Returns:
+            dict: Comprehensive psychological profile
+        """
+        # Extract key information from analysis results
+        jung_energies = analysis_results.get("jung_color_energies", {})
+        personality_dimensions = analysis_results.get("personality_dimensions", {})
+        emotional_tendencies = analysis_results.get("emotional_tendencies", {})
+        
+        # The Jung energy section is structured; its description is the section text
+        jung_energy_description = llm_profile.get("jung_energy", "")
+        if isinstance(jung_energy_description, dict):
+            jung_energy_description = jung_energy_description.get("full_description", "")
         
         # Combine all profile components
         complete_profile = {
@@ -78,7 +168,7 @@ class ProfileGenerator:
                 "primary_energy": jung_energies.get("primary_energy", ""),
                 "secondary_energy": jung_energies.get("secondary_energy", ""),
                 "energy_distribution": jung_energies.get("energy_distribution", {}),
-                "description": llm_profile.get("jung_energy", "")
+                "description": jung_energy_description
             },
             "personality_dimensions": {
                 "dimension_scores": personality_dimensions.get("dimension_scores", {}),
@@ -99,6 +189,73 @@ class ProfileGenerator:
         
         return complete_profile
     
+    def stream_profile(self, analysis_results):
+        """
+        Generate the LLM sections of a profile, yielding each as it completes.
+        
+        Args:
+            analysis_results (dict): Results from color analysis
+            
+        Yields:
+            tuple: (section key, section text) for the comprehensive profile
+                sections, followed by ("recommendations.<key>", section text)
+                for each recommendation section
+        """
+        profile_data = self._prepare_profile_data(analysis_results)
+        
+        for section in self.llm_framework.stream_comprehensive_profile(profile_data, latency_budget=self.latency_budget):
+            yield section
+        
+        profile_summary = self._create_profile_summary(profile_data)
+        for key, text in self.llm_framework.stream_recommendations(profile_summary, latency_budget=self.latency_budget):
+            yield "recommendations." + key, text
+    
+    def _prepare_profile_data(self, analysis_results):
+        """
+        Prepare the profile data sent to the LLM from color analysis results.
+        
+        Args:
+            analysis_results (dict): Results from color analysis
+            
+        Returns:
+            dict: Profile data
+        """
+        # Extract key information from analysis results
+        jung_energies = analysis_results.get("jung_color_energies", {})
+        personality_dimensions = analysis_results.get("personality_dimensions", {})
+        emotional_tendencies = analysis_results.get("emotional_tendencies", {})
+        contextual_analysis = analysis_results.get("contextual_analysis", {})
+        processed_data = analysis_results.get("processed_data", {})
+        
+        # Prepare data for LLM; the shared trait and emotion tuples are listed
+        # so the prompt text does not depend on the sequence type
+        profile_data = {
+            "primary_energy": jung_energies.get("primary_energy", ""),
+            "secondary_energy": jung_energies.get("secondary_energy", ""),
+            "energy_distribution": jung_energies.get("energy_distribution", {}),
+            "primary_traits": list(jung_energies.get("primary_traits", [])),
+            "secondary_traits": list(jung_energies.get("secondary_traits", [])),
+            "dimension_scores": personality_dimensions.get("dimension_scores", {}),
+            "dominant_traits": personality_dimensions.get("dominant_traits", []),
+            "primary_emotions": list(emotional_tendencies.get("primary_emotions", [])),
+            "secondary_emotions": list(emotional_tendencies.get("secondary_emotions", [])),
+            "top_emotions": emotional_tendencies.get("top_emotions", []),
+            "emotional_patterns": emotional_tendencies.get("emotional_patterns", []),
+            "color_preferences": processed_data
+        }
+        
+        # Add contextual analysis if available
+        if contextual_analysis:
+            profile_data.update({
+                "consistency_score": contextual_analysis.get("consistency_score", 0),
+                "contextual_patterns": contextual_analysis.get("contextual_patterns", []),
+                "work_insights": contextual_analysis.get("work_insights", []),
+                "relaxation_insights": contextual_analysis.get("relaxation_insights", []),
+                "social_insights": contextual_analysis.get("social_insights", [])
+            })
+        
+        return profile_data
+    
     def _create_profile_summary(self, profile_data):
         """
         Create a summary of the profile for generating recommendations.
@@ -126,3 +283,143 @@ class ProfileGenerator:
             summary += f"In work environments, {profile_data['work_insights'][0]}. "
         
         return summary
+
+
+class CompactProfile:
+    """
+    A profile that keeps each LLM response only once.
+    
+    A full profile repeats the LLM text several times: every section is a
+    copy of part of the response, and the response itself is kept again in
+    full_profile and full_recommendations. A compact profile stores the two
+    responses and the offsets of each section within them. Sections are
+    sliced from the responses when read, and the full profile is rebuilt
+    only when materialize() is called.
+    """
+    
+    __slots__ = ("analysis_results", "profile_text", "recommendations_text", "sections")
+    
+    # Marks the dictionary form of a compact profile
+    FORMAT = "compact-profile-v1"
+    
+    def __init__(self, analysis_results, profile_text, recommendations_text, sections=None):
+        """
+        Initialize the compact profile.
+        
+        Args:
+            analysis_results (dict): Results from color analysis
+            profile_text (str): The comprehensive profile response
+            recommendations_text (str): The recommendations response
+            sections (dict, optional): Section offsets by response, as
+                {"profile": {key: (start, end)}, "recommendations": {...}};
+                located in the responses if not provided
+        """
+        if sections is None:
+            processor = ResponseProcessor()
+            sections = {
+                "profile": processor.section_bounds(profile_text, ResponseProcessor.COMPREHENSIVE_PROFILE_SECTIONS),
+                "recommendations": processor.section_bounds(recommendations_text, ResponseProcessor.RECOMMENDATIONS_SECTIONS)
+            }
+        
+        self.analysis_results = analysis_results
+        self.profile_text = profile_text
+        self.recommendations_text = recommendations_text
+        self.sections = sections
+    
+    @classmethod
+    def from_profile(cls, analysis_results, profile):
+        """
+        Create a compact profile from a full profile.
+        
+        Args:
+            analysis_results (dict): Results from color analysis the profile
+                was generated from
+            profile (dict): Comprehensive psychological profile
+            
+        Returns:
+            CompactProfile: The compact profile
+        """
+        return cls(
+            analysis_results,
+            profile.get("full_profile", ""),
+            profile.get("recommendations", {}).get("full_recommendations", "")
+        )
+    
+    @classmethod
+    def from_dict(cls, data, analysis_results):
+        """
+        Load a compact profile from its dictionary form.
+        
+        Args:
+            data (dict): Dictionary from to_dict
+            analysis_results (dict): Results from color analysis
+            
+        Returns:
+            CompactProfile: The compact profile
+        """
+        return cls(analysis_results, data["profile_text"], data["recommendations_text"], {
+            source: {key: tuple(bounds) for key, bounds in offsets.items()}
+            for source, offsets in data["sections"].items()
+        })
+    
+    @classmethod
+    def is_compact(cls, data):
+        """
+        Check whether a stored profile is in compact form.
+        
+        Args:
+            data (dict): A stored profile
+            
+        Returns:
+            bool: True if the data came from to_dict
+        """
+        return isinstance(data, dict) and data.get("format") == cls.FORMAT
+    
+    def section(self, key):
+        """
+        Read a section of the profile or recommendations response.
+        
+        Args:
+            key (str): Section key from COMPREHENSIVE_PROFILE_SECTIONS or
+                RECOMMENDATIONS_SECTIONS
+                
+        Returns:
+            str: The section text, or "" if it is missing from the response
+            
+        Raises:
+            KeyError: If the key is not a section of either layout
+        """
+        if key in self.sections["profile"]:
+            start, end = self.sections["profile"][key]
+            return self.profile_text[start:end]
+        start, end = self.sections["recommendations"][key]
+        return self.recommendations_text[start:end]
+    
+    def materialize(self):
+        """
+        Build the full profile.
+        
+        Returns:
+            dict: Comprehensive psychological profile, equal to the profile
+                this compact profile was created from
+        """
+        processor = ResponseProcessor()
+        return ProfileGenerator._assemble_profile(
+            self.analysis_results,
+            processor.process_comprehensive_profile(self.profile_text),
+            processor.process_recommendations(self.recommendations_text)
+        )
+    
+    def to_dict(self):
+        """
+        Get the JSON-serializable form, without the analysis results.
+        
+        Returns:
+            dict: The responses and section offsets
+        """
+        return {
+            "format": self.FORMAT,
+            "profile_text": self.profile_text,
+            "recommendations_text": self.recommendations_text,
+            "sections": self.sections
+        }
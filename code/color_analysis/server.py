@@ -0,0 +1,558 @@
+"""
+HTTP Server Module for Psycho-Color Analysis System
+
+This module exposes the Psycho-Color Analysis API over HTTP as an
+ASGI application, including a server-sent events endpoint that streams
+profile sections as they are generated.
+
+The application shares one PsychoColorAPI (and therefore one analyzer and
+LLM client) across all requests, bounds the number of requests in flight
+and sheds load with 503 responses beyond that bound, and drains in-flight
+requests on shutdown. Build the application with create_app, or run the
+code.color_analysis.asgi entrypoint under any ASGI server.
+"""
+
+import os
+import time
+import json
+import asyncio
+import logging
+import functools
+from urllib.parse import parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from .api import PsychoColorAPI
+from .jobs import JobStoreFull
+from .job_queue import JobQueue
+from .archetypes import ArchetypeTable
+from ..llm_integration import ModelRouter
+from ..observability import OpenTelemetrySink, set_sink
+from ..observability.profiling import SamplingProfiler
+from ..observability.metrics import REGISTRY, render_metrics
+
+logger = logging.getLogger(__name__)
+
+# Longest long-poll accepted by the job status endpoint, in seconds
+MAX_JOB_WAIT = 30.0
+
+# Largest request body accepted by default, in bytes
+MAX_BODY_BYTES = 64 * 1024
+
+# HTTP methods recorded by name in request metrics; others count as "other"
+_METRIC_METHODS = frozenset(("GET", "POST"))
+
+# Marks the end of a section iterator driven from the event loop
+_DONE = object()
+
+class _BodyTooLarge(Exception):
+    """
+    Raised while reading a request body longer than the configured limit.
+    """
+
+_HTTP_REQUESTS = REGISTRY.counter("psycho_color_http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status"))
+_HTTP_SECONDS = REGISTRY.histogram("psycho_color_http_request_seconds", "HTTP request latency, including streamed bodies.", ("route",))
+_HTTP_IN_FLIGHT = REGISTRY.gauge("psycho_color_http_in_flight", "Admission-controlled requests running or queued.")
+_PROFILE_JOBS = REGISTRY.gauge("psycho_color_profile_jobs", "Background profile jobs by queue and status.", ("queue", "status"))
+
+class PsychoColorApp:
+    """
+    ASGI application serving the Psycho-Color Analysis API.
+    """
+    
+    def __init__(self, api=None, max_in_flight=64, worker_threads=8, drain_timeout=30.0,
+                 max_body_bytes=MAX_BODY_BYTES):
+        """
+        Initialize the application.
+        
+        Args:
+            api (PsychoColorAPI, optional): API instance shared by all requests;
+                a default instance is created if not provided
+            max_in_flight (int, optional): Maximum number of analysis requests
+                running or queued at once; further requests receive a 503
+            worker_threads (int, optional): Threads running the synchronous
+                analysis pipeline
+            drain_timeout (float, optional): Seconds to wait for in-flight
+                requests to finish on shutdown
+            max_body_bytes (int, optional): Largest request body accepted;
+                longer bodies receive a 413
+        """
+        self.api = api if api is not None else PsychoColorAPI()
+        self.max_in_flight = max_in_flight
+        self.drain_timeout = drain_timeout
+        self.max_body_bytes = max_body_bytes
+        self.executor = ThreadPoolExecutor(max_workers=worker_threads, thread_name_prefix="psycho-color")
+        self.in_flight = 0
+        self.draining = False
+        
+        # Routes as path -> (method, handler, admission controlled)
+        self.routes = {
+            "/api/analyze": ("POST", self._analyze, True),
+            "/api/analyze/stream": ("POST", self._stream_analysis, True),
+            "/api/analyze/async": ("POST", self._submit_analysis, True),
+            "/api/jobs/": ("GET", self._get_job, False),
+            "/health": ("GET", self._health, False),
+            "/metrics": ("GET", self._metrics, False)
+        }
+        REGISTRY.register_collector("http_server", self._collect_metrics)
+    
+    async def __call__(self, scope, receive, send):
+        """
+        Handle an ASGI connection.
+        
+        Args:
+            scope (dict): ASGI connection scope
+            receive (callable): ASGI receive channel
+            send (callable): ASGI send channel
+        """
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        
+        path = scope["path"]
+        if path.startswith("/api/jobs/"):
+            path = "/api/jobs/"
+        
+        start = time.perf_counter()
+        statuses = []
+        
+        async def send_and_record(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+            await send(message)
+        
+        try:
+            await self._dispatch(path, scope, receive, send_and_record)
+        finally:
+            route = path if path in self.routes else "unmatched"
+            method = scope["method"] if scope["method"] in _METRIC_METHODS else "other"
+            _HTTP_REQUESTS.inc(route=route, method=method, status=statuses[0] if statuses else "none")
+            _HTTP_SECONDS.observe(time.perf_counter() - start, route=route)
+    
+    async def _dispatch(self, path, scope, receive, send):
+        """
+        Route an HTTP request to its handler, applying admission control.
+        
+        Args:
+            path (str): Route path of the request
+            scope (dict): ASGI connection scope
+            receive (callable): ASGI receive channel
+            send (callable): ASGI send channel
+        """
+        route = self.routes.get(path)
+        if route is None:
+            await self._send_json(send, 404, {"error": "Not found"})
+            return
+        
+        method, handler, admission_controlled = route
+        if scope["method"] != method:
+            await self._send_json(send, 405, {"error": "Method not allowed"})
+            return
+        
+        if not admission_controlled:
+            await handler(scope, receive, send)
+            return
+        
+        # Shed load instead of queueing without bound
+        if self.draining or self.in_flight >= self.max_in_flight:
+            await self._send_json(send, 503, {"error": "Service overloaded"}, [(b"retry-after", b"1")])
+            return
+        
+        self.in_flight += 1
+        try:
+            await handler(scope, receive, send)
+        except _BodyTooLarge:
+            await self._send_json(send, 413, {"error": f"Request body exceeds {self.max_body_bytes} bytes"})
+        finally:
+            self.in_flight -= 1
+    
+    async def drain(self):
+        """
+        Stop admitting requests and wait for in-flight requests and
+        background profile jobs to finish.
+        
+        Returns:
+            bool: True if all requests and jobs finished within the drain timeout
+        """
+        self.draining = True
+        deadline = time.monotonic() + self.drain_timeout
+        while self.in_flight > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        
+        drained = self.in_flight == 0
+        self.executor.shutdown(wait=drained, cancel_futures=not drained)
+        
+        # Background profile jobs get whatever remains of the drain timeout
+        remaining = max(deadline - time.monotonic(), 0)
+        jobs_drained = await asyncio.to_thread(self.api.jobs.drain, remaining)
+        
+        # Keep the profiles sampled since the last report
+        profiler = getattr(self.api, "profiler", None)
+        if profiler is not None:
+            await asyncio.to_thread(profiler.flush)
+        return drained and jobs_drained
+    
+    async def _lifespan(self, receive, send):
+        """
+        Handle ASGI lifespan events, draining requests on shutdown.
+        
+        Args:
+            receive (callable): ASGI receive channel
+            send (callable): ASGI send channel
+        """
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.drain()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    
+    async def _health(self, scope, receive, send):
+        """
+        Report service health.
+        
+        Args:
+            scope (dict): ASGI connection scope
+            receive (callable): ASGI receive channel
+            send (callable): ASGI send channel
+        """
+        await self._send_json(send, 503 if self.draining else 200, {
+            "status": "draining" if self.draining else "healthy",
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight
+        })
+    
+    async def _metrics(self, scope, receive, send):
+        """
+        Respond with the metrics in the Prometheus text exposition format.
+        
+        Args:
+            scope (dict): ASGI connection scope
+            receive (callable): ASGI receive channel
+            send (callable): ASGI send channel
+        """
+        body = (await asyncio.to_thread(render_metrics)).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/plain; version=0.0.4; charset=utf-8"),
+                (b"content-length", str(len(body)).encode("ascii"))
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+    
+    def _collect_metrics(self):
+        """
+        Update the request and job queue gauges before metrics are rendered.
+        """
+        _HTTP_IN_FLIGHT.set(self.in_flight)
+        
+        if self.api.job_queue is not None:
+            queue, stats, statuses = "durable", self.api.job_queue.stats(), ("queued", "running", "complete", "failed")
+        else:
+            queue, stats, statuses = "memory", self.api.jobs.stats(), ("pending", "complete", "failed")
+        for status in statuses:
+            _PROFILE_JOBS.set(stats.get(status, 0), queue=queue, status=status)
+    
+    async def _analyze(self, scope, receive, send):
+        """
+        Analyze color preferences and respond with the complete profile.
+        
+        Args:
+            scope (dict): ASGI connection scope
+            receive (callable): ASGI receive channel
+            send (callable): ASGI send channel
+        """
+        color_data = await self._read_json(scope, receive)
+        if not isinstance(color_data, dict):
+            await self._send_json(send, 400, {"error": "Request body must be a JSON object"})
+            return
+        
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(self.executor, self.api.analyze_color_preferences, color_data)
+        except Exception as e:
+            await self._send_json(send, 500, {"error": str(e)})
+            return
+        
+        await self._send_json(send, 200, result)
+    
+    async def _submit_analysis(self, scope, receive, send):
+        """
+        Respond with the color analysis at once and generate the profile in the background.
+        
+        With a durable job queue, the optional Idempotency-Key and X-Priority
+        request headers are passed on to the queue.
+        
+        Args:
+            scope (dict): ASGI connection scope
+            receive (callable): ASGI receive channel
+            send (callable): ASGI send channel
+        """
+        color_data = await self._read_json(scope, receive)
+        if not isinstance(color_data, dict):
+            await self._send_json(send, 400, {"error": "Request body must be a JSON object"})
+            return
+        
+        headers = dict(scope.get("headers", []))
+        idempotency_key = headers.get(b"idempotency-key")
+        try:
+            priority = int(headers.get(b"x-priority", b"0"))
+        except ValueError:
+            await self._send_json(send, 400, {"error": "X-Priority must be an integer"})
+            return
+        
+        loop = asyncio.get_running_loop()
+        submit = functools.partial(
+            self.api.submit_color_preferences,
+            color_data,
+            priority=priority,
+            idempotency_key=idempotency_key.decode("latin-1") if idempotency_key else None
+        )
+        try:
+            job = await loop.run_in_executor(self.executor, submit)
+        except JobStoreFull:
+            await self._send_json(send, 503, {"error": "Too many pending profile jobs"}, [(b"retry-after", b"1")])
+            return
+        except Exception as e:
+            await self._send_json(send, 500, {"error": str(e)})
+            return
+        
+        await self._send_json(send, 202, job, [(b"location", f"/api/jobs/{job['job_id']}".encode("ascii"))])
+    
+    async def _get_job(self, scope, receive, send):
+        """
+        Report a background profile job.
+        
+        A "wait" query parameter long-polls for up to that many seconds
+        (capped at MAX_JOB_WAIT) until the profile is complete.
+        
+        Args:
+            scope (dict): ASGI connection scope
+            receive (callable): ASGI receive channel
+            send (callable): ASGI send channel
+        """
+        job_id = scope["path"][len("/api/jobs/"):]
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        try:
+            wait = min(float(query.get("wait", ["0"])[0]), MAX_JOB_WAIT)
+        except ValueError:
+            await self._send_json(send, 400, {"error": "wait must be a number of seconds"})
+            return
+        
+        if self.api.job_queue is not None:
+            job = await self._poll_queued_job(job_id, wait)
+        else:
+            job = self.api.jobs.get(job_id)
+            
+            # Wait on the job's future without occupying a worker thread
+            if job is not None and wait > 0 and not job.future.done():
+                try:
+                    await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job.future)), wait)
+                except Exception:
+                    pass
+            job = job.to_dict() if job is not None else None
+        
+        if job is None:
+            await self._send_json(send, 404, {"error": "Job not found"})
+            return
+        
+        await self._send_json(send, 200, job)
+    
+    async def _poll_queued_job(self, job_id, wait):
+        """
+        Poll the durable job queue until a job finishes or the wait expires.
+        
+        Args:
+            job_id (str): The job ID
+            wait (float): Maximum seconds to wait
+            
+        Returns:
+            dict: The job, or None if unknown
+        """
+        deadline = time.monotonic() + wait
+        while True:
+            job = await asyncio.to_thread(self.api.get_profile_job, job_id)
+            if job is None or job["status"] != "pending" or time.monotonic() >= deadline:
+                return job
+            await asyncio.sleep(self.api.JOB_POLL_INTERVAL)
+    
+    async def _stream_analysis(self, scope, receive, send):
+        """
+        Stream a color preference analysis as server-sent events.
+        
+        Each profile section is sent as an event named after the section,
+        with its value JSON-encoded in the data field. The deterministic
+        analysis sections are sent first, then each LLM section as it
+        completes, and finally a "done" event. If the pipeline fails, an
+        "error" event ends the stream. The section iterator is closed when
+        the stream ends for any reason, including a client disconnect, so
+        the LLM call behind it releases its scheduler slot.
+        
+        Args:
+            scope (dict): ASGI connection scope
+            receive (callable): ASGI receive channel
+            send (callable): ASGI send channel
+        """
+        color_data = await self._read_json(scope, receive)
+        if not isinstance(color_data, dict):
+            await self._send_json(send, 400, {"error": "Request body must be a JSON object"})
+            return
+        
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache")
+            ]
+        })
+        
+        # The pipeline is synchronous; advance it off the event loop
+        loop = asyncio.get_running_loop()
+        sections = self.api.stream_color_preferences(color_data)
+        try:
+            while True:
+                try:
+                    section = await loop.run_in_executor(self.executor, next, sections, _DONE)
+                except Exception:
+                    logger.exception("Streamed profile generation failed")
+                    await send({
+                        "type": "http.response.body",
+                        "body": format_event("error", {"error": "Profile generation failed"}),
+                        "more_body": False
+                    })
+                    return
+                if section is _DONE:
+                    break
+                
+                # A failed send means the client has gone; nothing more can be sent
+                key, value = section
+                await send({
+                    "type": "http.response.body",
+                    "body": format_event(key, value),
+                    "more_body": True
+                })
+            
+            await send({
+                "type": "http.response.body",
+                "body": format_event("done", {}),
+                "more_body": False
+            })
+        finally:
+            await loop.run_in_executor(self.executor, sections.close)
+    
+    async def _read_json(self, scope, receive):
+        """
+        Read and decode a JSON request body of at most max_body_bytes.
+        
+        Args:
+            scope (dict): ASGI connection scope
+            receive (callable): ASGI receive channel
+            
+        Returns:
+            object: The decoded body, or None if it is not valid JSON
+            
+        Raises:
+            _BodyTooLarge: If the declared or received body is too long
+        """
+        content_length = dict(scope.get("headers", [])).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_bytes:
+            raise _BodyTooLarge()
+        
+        chunks = []
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body_bytes:
+                raise _BodyTooLarge()
+            chunks.append(chunk)
+            more_body = message.get("more_body", False)
+        
+        try:
+            return json.loads(b"".join(chunks) or b"null")
+        except ValueError:
+            return None
+    
+    async def _send_json(self, send, status, payload, headers=None):
+        """
+        Send a complete JSON response.
+        
+        Args:
+            send (callable): ASGI send channel
+            status (int): HTTP status code
+            payload (object): JSON-serializable response body
+            headers (list, optional): Additional response headers
+        """
+        body = json.dumps(payload).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii"))
+            ] + (headers or [])
+        })
+        await send({"type": "http.response.body", "body": body})
+
+def format_event(event, data):
+    """
+    Format a server-sent event.
+    
+    Args:
+        event (str): Event name
+        data (object): JSON-serializable event payload
+        
+    Returns:
+        bytes: The encoded event
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+def create_app():
+    """
+    Create the application from environment configuration.
+    
+    Reads LLM_API_KEY, and optionally MAX_IN_FLIGHT, WORKER_THREADS,
+    DRAIN_TIMEOUT, MAX_BODY_BYTES, JOB_QUEUE_DB, ARCHETYPE_DB,
+    TRACE_EXPORTER, LLM_LATENCY_BUDGET, the MODEL_* routing variables
+    and the PROFILE_* variables. When JOB_QUEUE_DB is set, background
+    profile jobs go to that durable queue and must be processed by
+    separately started workers. When ARCHETYPE_DB is set, profiles for
+    archetypes in that pre-generated table are served without LLM calls.
+    When MODEL_ROUTES is set, each type of LLM call goes to its own
+    model tiers, downgraded to a faster tier when LLM_LATENCY_BUDGET
+    seconds would be exceeded. When TRACE_EXPORTER is "otel", pipeline
+    spans are sent to the OpenTelemetry tracer provider. When
+    PROFILE_SAMPLE_RATE is set, that fraction of requests is profiled
+    into reports in PROFILE_DIR.
+    
+    Returns:
+        PsychoColorApp: The configured application
+    """
+    if os.environ.get("TRACE_EXPORTER") == "otel":
+        set_sink(OpenTelemetrySink())
+    
+    job_queue_db = os.environ.get("JOB_QUEUE_DB")
+    archetype_db = os.environ.get("ARCHETYPE_DB")
+    return PsychoColorApp(
+        api=PsychoColorAPI(
+            api_key=os.environ.get("LLM_API_KEY"),
+            job_queue=JobQueue(job_queue_db) if job_queue_db else None,
+            archetype_table=ArchetypeTable(archetype_db) if archetype_db else None,
+            profiler=SamplingProfiler.from_environment(),
+            router=ModelRouter.from_environment(),
+            latency_budget=float(os.environ["LLM_LATENCY_BUDGET"]) if os.environ.get("LLM_LATENCY_BUDGET") else None
+        ),
+        max_in_flight=int(os.environ.get("MAX_IN_FLIGHT", "64")),
+        worker_threads=int(os.environ.get("WORKER_THREADS", "8")),
+        drain_timeout=float(os.environ.get("DRAIN_TIMEOUT", "30")),
+        max_body_bytes=int(os.environ.get("MAX_BODY_BYTES", str(MAX_BODY_BYTES)))
+    )
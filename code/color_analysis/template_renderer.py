@@ -0,0 +1,401 @@
+"""
+Template Renderer Module for Psycho-Color Analysis System
+
+This module renders psychological profiles without an LLM. Profile and
+recommendation sections are composed from a library of text fragments
+keyed by Jung color energy, dominant personality trait and emotional
+pattern. The library is compiled once at import: the fragments of every
+primary/secondary energy pair are joined ahead of time, so rendering a
+profile only selects fragments and joins a handful of strings.
+
+The rendered content has the same structure as the LLM-generated content,
+so it can be assembled into a profile with the same output keys. It is
+used for requests that should not call the LLM and as a fallback when the
+LLM is unavailable.
+"""
+
+from ..llm_integration.response_processor import ResponseProcessor
+
+# Fragments for each Jung color energy
+ENERGY_FRAGMENTS = {
+    "Cool Blue": {
+        "label": "Cool Blue (Analytical)",
+        "overview": "approaches life with careful analysis and logical reasoning, valuing accuracy, precision and a clear understanding of how things work",
+        "primary": "The dominant Cool Blue energy indicates someone who approaches situations with careful analysis and logical reasoning. They value accuracy, precision and thoroughness, and prefer to understand systems and processes in depth before acting.",
+        "secondary": "The secondary Cool Blue energy adds objectivity and a methodical streak, helping them check assumptions and think decisions through.",
+        "environment": "Organized, uncluttered spaces with minimal distractions and room for focused work",
+        "growth": "Practicing quicker decisions with incomplete information and sharing feelings as readily as facts",
+        "application": "Roles that reward analysis, planning and quality, such as research, engineering or finance",
+        "colors": ("Primary: Soft blues to promote focus and clear thinking", "Avoid: Excessive red or orange which may create unnecessary tension"),
+        "layout": ("Organized workspace with minimal clutter", "Dedicated zones for different types of tasks"),
+        "lighting": ("Natural light supplemented with cool-temperature lighting", "Task lighting for detailed work"),
+        "communication": ("Lead with data and logical frameworks when presenting ideas", "Use written communication for detailed or important information"),
+        "decision_making": ("Create decision matrices to compare options", "Set time limits for analysis to avoid overthinking"),
+        "stress_management": ("Schedule regular breaks for a mental reset", "Keep a decision journal to prevent rumination on past choices"),
+        "personal_development": ("Practice expressing emotions in low-stakes conversations", "Experiment with brainstorming before judging ideas"),
+        "relationship_dynamics": ("Explain your need for processing time to those close to you", "Show appreciation explicitly rather than assuming it is understood"),
+        "daily_practices": ("Plan the day's priorities each morning", "End the workday with a short review of what went well")
+    },
+    "Earth Green": {
+        "label": "Earth Green (Supportive)",
+        "overview": "brings a caring, supportive presence that values harmony, loyalty and meaningful connections",
+        "primary": "The dominant Earth Green energy reveals a caring, supportive nature that values harmony and meaningful connections. They are patient listeners who weigh decisions by their effect on people and stay true to their values.",
+        "secondary": "The secondary Earth Green energy adds emotional intelligence and consideration for others' needs and feelings.",
+        "environment": "Calm, comfortable spaces with natural elements and room for one-on-one conversation",
+        "growth": "Voicing disagreement openly and protecting their own needs while supporting others",
+        "application": "Roles built on trust and care, such as counseling, teaching, healthcare or team support",
+        "colors": ("Primary: Natural greens to create balance and reduce stress", "Accents: Warm earth tones for a sense of comfort"),
+        "layout": ("Shared spaces that make collaboration easy", "A quiet corner for reflection and personal conversations"),
+        "lighting": ("Warm, soft lighting that feels welcoming", "Plenty of daylight and views of greenery where possible"),
+        "communication": ("Open conversations by acknowledging people's feelings", "Practice stating your own view before asking for others'"),
+        "decision_making": ("Consult the people affected, then set a deadline to decide", "Write down the values each option serves"),
+        "stress_management": ("Use nature walks to restore calm", "Set gentle boundaries on requests for help"),
+        "personal_development": ("Practice constructive disagreement in safe settings", "Build confidence in taking the lead on small projects"),
+        "relationship_dynamics": ("Let others support you as you support them", "Address small tensions before they grow"),
+        "daily_practices": ("Spend a few minutes outdoors each day", "Check in with yourself on what you need, not just others")
+    },
+    "Sunshine Yellow": {
+        "label": "Sunshine Yellow (Inspiring)",
+        "overview": "radiates enthusiasm and optimism, generating ideas and energizing the people around them",
+        "primary": "The dominant Sunshine Yellow energy indicates an enthusiastic, sociable and expressive person. They generate ideas easily, enjoy variety and bring energy and optimism to the people around them.",
+        "secondary": "The secondary Sunshine Yellow energy adds warmth, creativity and a capacity for enthusiasm and idea generation.",
+        "environment": "Bright, open and stimulating spaces with variety and opportunities for interaction",
+        "growth": "Following ideas through to completion and giving details the same attention as the big picture",
+        "application": "Roles that reward creativity and connection, such as marketing, design, sales or facilitation",
+        "colors": ("Primary: Warm yellows and bright accents to sustain energy", "Accents: Varied colors that keep the space stimulating"),
+        "layout": ("Open layout that encourages interaction", "Visible boards for capturing and sharing ideas"),
+        "lighting": ("Bright, warm lighting throughout the day", "Natural light to lift mood and energy"),
+        "communication": ("Share the vision first, then the practical steps", "Pause to invite others' ideas before building on your own"),
+        "decision_making": ("Capture options quickly, then review them against clear criteria", "Ask a detail-minded colleague to check plans before committing"),
+        "stress_management": ("Channel restlessness into creative or social activities", "Limit open commitments to avoid overload"),
+        "personal_development": ("Practice finishing one project before starting the next", "Develop simple routines for follow-up and detail"),
+        "relationship_dynamics": ("Make space for quieter people to contribute", "Follow through on promises to build trust"),
+        "daily_practices": ("List the three tasks that must be finished today", "Schedule time for play and creative exploration")
+    },
+    "Fiery Red": {
+        "label": "Fiery Red (Driving)",
+        "overview": "is driven, decisive and action-oriented, focused on results and on meeting challenges head-on",
+        "primary": "The dominant Fiery Red energy indicates a competitive, determined and purposeful person. They make decisions quickly, take charge in uncertain situations and focus on results.",
+        "secondary": "The secondary Fiery Red energy adds drive and decisiveness, helping them move from thinking to action.",
+        "environment": "Dynamic, efficient spaces that support fast decisions and visible progress",
+        "growth": "Slowing down to include others in decisions and listening before acting",
+        "application": "Roles with autonomy and clear goals, such as management, entrepreneurship or operations",
+        "colors": ("Primary: Strong reds and bold contrasts to support drive", "Accents: Neutral tones to balance intensity"),
+        "layout": ("Efficient workspace arranged for speed", "Visible goals and progress trackers"),
+        "lighting": ("Bright, focused lighting", "Strong daylight for alertness"),
+        "communication": ("Be direct and concise, then invite questions", "Ask for input before announcing decisions"),
+        "decision_making": ("Set clear goals and decide quickly against them", "Pause on high-impact decisions to hear dissenting views"),
+        "stress_management": ("Release tension through physical exercise", "Notice impatience early and take a short break"),
+        "personal_development": ("Practice active listening in meetings", "Delegate and let others own outcomes"),
+        "relationship_dynamics": ("Soften directness with appreciation", "Make time for relationships beyond shared goals"),
+        "daily_practices": ("Start with the most important task of the day", "Build recovery time into a demanding schedule")
+    }
+}
+
+# Fragments for each dominant personality trait
+TRAIT_FRAGMENTS = {
+    "introverted": {
+        "overview": "They recharge through solitude and reflection.",
+        "interpersonal": "Prefers small groups or one-on-one interactions over large gatherings",
+        "development": "Prepare talking points before large meetings"
+    },
+    "extraverted": {
+        "overview": "They draw energy from people and activity.",
+        "interpersonal": "Builds connections quickly and enjoys lively group settings",
+        "development": "Schedule quiet time for reflection between social commitments"
+    },
+    "analytical thinker": {
+        "overview": "They weigh decisions through logic and evidence.",
+        "interpersonal": "Communicates with precision and clarity",
+        "development": "Balance logical arguments with attention to how others feel"
+    },
+    "empathetic feeler": {
+        "overview": "They weigh decisions by their effect on people.",
+        "interpersonal": "Listens attentively and picks up on others' feelings",
+        "development": "Check the facts behind a decision as carefully as its impact"
+    },
+    "stability-focused": {
+        "overview": "They value routine, reliability and predictability.",
+        "interpersonal": "Values reliability and consistency in others",
+        "development": "Try small changes to routine to build comfort with uncertainty"
+    },
+    "adaptability-focused": {
+        "overview": "They embrace change and adjust easily to new situations.",
+        "interpersonal": "Adapts style to the people and situation at hand",
+        "development": "Create a few anchoring routines to balance constant change"
+    },
+    "task-oriented": {
+        "overview": "They focus on goals, outcomes and getting things done.",
+        "interpersonal": "Shows care through practical help and reliable delivery",
+        "development": "Set aside time to connect with people beyond the task"
+    },
+    "people-oriented": {
+        "overview": "They put relationships and team harmony first.",
+        "interpersonal": "Offers support to those they care about",
+        "development": "Hold people to shared goals while keeping relationships warm"
+    },
+    "methodical": {
+        "overview": "They work step by step with structure and care.",
+        "interpersonal": "Follows through on commitments and expects the same of others",
+        "development": "Allow room for improvisation when plans change"
+    },
+    "creative": {
+        "overview": "They look for original ideas and new ways of doing things.",
+        "interpersonal": "Brings fresh perspectives to shared problems",
+        "development": "Pair new ideas with concrete next steps"
+    }
+}
+
+# Fragments for each emotional pattern
+PATTERN_FRAGMENTS = {
+    "predominantly positive emotional outlook": {
+        "emotional": "Approaches life with a predominantly positive emotional outlook",
+        "stress_management": "Use gratitude practices to keep perspective during setbacks"
+    },
+    "tendency toward emotional caution": {
+        "emotional": "Tends toward emotional caution and takes time to trust new situations",
+        "stress_management": "Name worries in writing to separate real risks from anxious thoughts"
+    },
+    "balanced emotional perspective": {
+        "emotional": "Holds a balanced emotional perspective, weighing positives and negatives",
+        "stress_management": "Keep a steady routine of rest to protect emotional balance"
+    },
+    "values emotional stability": {
+        "emotional": "Values calm, stable emotional states over intense or volatile ones",
+        "stress_management": "Practice slow breathing to return to calm after stressful moments"
+    },
+    "emotionally expressive": {
+        "emotional": "Expresses emotions openly and readily",
+        "stress_management": "Talk stress through with a trusted friend rather than holding it in"
+    },
+    "values emotional consistency in relationships": {
+        "emotional": "Prefers emotional consistency in relationships",
+        "stress_management": "Discuss expectations openly with close relationships"
+    }
+}
+
+# Fallback for energies outside the library
+_NEUTRAL_ENERGY = {
+    "label": "Balanced",
+    "overview": "draws on a balance of color energies without one clearly dominating",
+    "primary": "No single color energy clearly dominates, suggesting someone who adapts their approach to the situation.",
+    "secondary": "",
+    "environment": "Flexible spaces that can be adapted to different kinds of work",
+    "growth": "Noticing which approach works best in which situation",
+    "application": "Varied roles that combine different kinds of work",
+    "colors": ("Primary: Neutral tones with accents that can change with the task",),
+    "layout": ("Flexible workspace with zones for focused and collaborative work",),
+    "lighting": ("Adjustable lighting for different times of day",),
+    "communication": ("Adapt your style to the people you are speaking with",),
+    "decision_making": ("Match the depth of analysis to the importance of the decision",),
+    "stress_management": ("Try several relaxation techniques and keep the ones that work",),
+    "personal_development": ("Reflect on which energies you draw on most and least",),
+    "relationship_dynamics": ("Let others know which style of support you prefer",),
+    "daily_practices": ("Review the day each evening",)
+}
+
+# Recommendation list keys, with the energy fragment filling each
+_RECOMMENDATION_LISTS = (
+    ("communication_strategies", "communication"),
+    ("decision_making_approaches", "decision_making"),
+    ("stress_management", "stress_management"),
+    ("personal_development", "personal_development"),
+    ("relationship_dynamics", "relationship_dynamics"),
+    ("daily_practices", "daily_practices")
+)
+
+def _bullets(items):
+    """
+    Format items as a markdown bullet list.
+    
+    Args:
+        items (iterable): The items
+        
+    Returns:
+        str: One "- item" line per item
+    """
+    return "\n".join("- " + item for item in items)
+
+def _compile_pair(primary, secondary):
+    """
+    Join the fragments of a primary/secondary energy pair ahead of rendering.
+    
+    Args:
+        primary (dict): Fragments of the primary energy
+        secondary (dict): Fragments of the secondary energy
+        
+    Returns:
+        dict: Compiled fragments for the pair
+    """
+    jung_description = (
+        f"**Primary Energy: {primary['label']}**\n{primary['primary']}\n\n"
+        f"**Secondary Energy: {secondary['label']}**\n{secondary['secondary']}"
+    )
+    environment = {
+        "colors": _bullets(primary["colors"] + (secondary["colors"][0].replace("Primary:", "Accents:", 1),)),
+        "layout": _bullets(primary["layout"] + secondary["layout"][:1]),
+        "lighting": _bullets(primary["lighting"])
+    }
+    lists = {
+        key: primary[fragment] + secondary[fragment][:1]
+        for key, fragment in _RECOMMENDATION_LISTS
+    }
+    
+    return {
+        "overview": f"Based on the color preference data provided, this individual {primary['overview']}, with a secondary tendency that {secondary['overview']}.",
+        "primary_label": primary["label"],
+        "secondary_label": secondary["label"],
+        "jung_description": jung_description,
+        "environmental_preferences": "Optimal settings for this individual's productivity and well-being include:\n\n" + _bullets((primary["environment"], secondary["environment"])),
+        "growth_opportunities": "Areas for growth include:\n\n" + _bullets((primary["growth"], secondary["growth"])),
+        "practical_applications": "This profile can be applied in:\n\n" + _bullets((primary["application"], secondary["application"])),
+        "environment": environment,
+        "environment_text": (
+            f"**Colors:**\n{environment['colors']}\n\n"
+            f"**Layout:**\n{environment['layout']}\n\n"
+            f"**Lighting:**\n{environment['lighting']}"
+        ),
+        "lists": lists
+    }
+
+def _compile_library():
+    """
+    Compile the fragments of every pair of energies in the library.
+    
+    Returns:
+        dict: (primary energy, secondary energy) -> compiled fragments
+    """
+    return {
+        (primary, secondary): _compile_pair(ENERGY_FRAGMENTS[primary], ENERGY_FRAGMENTS[secondary])
+        for primary in ENERGY_FRAGMENTS
+        for secondary in ENERGY_FRAGMENTS
+    }
+
+def _join_sections(title, headings, sections):
+    """
+    Join sections under their headings into a full document.
+    
+    Args:
+        title (str): Document title
+        headings (tuple): Section headings
+        sections (iterable): Section texts in heading order
+        
+    Returns:
+        str: The document
+    """
+    parts = [title]
+    for heading, section in zip(headings, sections):
+        parts.append(heading)
+        parts.append(section)
+    return "\n\n".join(parts)
+
+_COMPILED_PAIRS = _compile_library()
+
+_PROFILE_HEADINGS = tuple(heading for _, heading, _ in ResponseProcessor.COMPREHENSIVE_PROFILE_SECTIONS)
+_RECOMMENDATION_HEADINGS = tuple(heading for _, heading, _ in ResponseProcessor.RECOMMENDATIONS_SECTIONS)
+
+class TemplateRenderer:
+    """
+    Renders profile content from the compiled fragment library.
+    """
+    
+    def render(self, analysis_results):
+        """
+        Render the content of a profile.
+        
+        Args:
+            analysis_results (dict): Results from color analysis
+            
+        Returns:
+            tuple: (structured comprehensive profile, structured
+                recommendations), in the same structure as the LLM content
+        """
+        jung_energies = analysis_results.get("jung_color_energies", {})
+        personality_dimensions = analysis_results.get("personality_dimensions", {})
+        emotional_tendencies = analysis_results.get("emotional_tendencies", {})
+        
+        primary = jung_energies.get("primary_energy", "")
+        secondary = jung_energies.get("secondary_energy", "")
+        pair = _COMPILED_PAIRS.get((primary, secondary))
+        if pair is None:
+            pair = _compile_pair(ENERGY_FRAGMENTS.get(primary, _NEUTRAL_ENERGY), ENERGY_FRAGMENTS.get(secondary, _NEUTRAL_ENERGY))
+        
+        traits = [TRAIT_FRAGMENTS[trait] for trait in personality_dimensions.get("dominant_traits", []) if trait in TRAIT_FRAGMENTS]
+        patterns = [PATTERN_FRAGMENTS[pattern] for pattern in emotional_tendencies.get("emotional_patterns", []) if pattern in PATTERN_FRAGMENTS]
+        
+        return self._render_profile(pair, traits, patterns), self._render_recommendations(pair, traits, patterns)
+    
+    def _render_profile(self, pair, traits, patterns):
+        """
+        Render the comprehensive profile sections.
+        
+        Args:
+            pair (dict): Compiled fragments of the energy pair
+            traits (list): Fragments of the dominant traits
+            patterns (list): Fragments of the emotional patterns
+            
+        Returns:
+            dict: Structured comprehensive profile
+        """
+        overview = " ".join([pair["overview"]] + [trait["overview"] for trait in traits])
+        
+        if patterns:
+            emotional_landscape = "The individual's emotional patterns suggest they:\n\n" + _bullets(pattern["emotional"] for pattern in patterns)
+        else:
+            emotional_landscape = "The individual's emotional patterns are balanced without one clear tendency."
+        
+        if traits:
+            interpersonal_dynamics = "In relationships and communication, this individual likely:\n\n" + _bullets(trait["interpersonal"] for trait in traits)
+        else:
+            interpersonal_dynamics = "In relationships and communication, this individual adapts their style to the people around them."
+        
+        sections = (
+            overview,
+            pair["jung_description"],
+            emotional_landscape,
+            interpersonal_dynamics,
+            pair["environmental_preferences"],
+            pair["growth_opportunities"],
+            pair["practical_applications"]
+        )
+        
+        return {
+            "personality_overview": overview,
+            "jung_energy": {
+                "primary_energy": pair["primary_label"],
+                "secondary_energy": pair["secondary_label"],
+                "full_description": pair["jung_description"]
+            },
+            "emotional_landscape": emotional_landscape,
+            "interpersonal_dynamics": interpersonal_dynamics,
+            "environmental_preferences": pair["environmental_preferences"],
+            "growth_opportunities": pair["growth_opportunities"],
+            "practical_applications": pair["practical_applications"],
+            "full_profile": _join_sections("# Comprehensive Psychological Profile", _PROFILE_HEADINGS, sections)
+        }
+    
+    def _render_recommendations(self, pair, traits, patterns):
+        """
+        Render the recommendation sections.
+        
+        Args:
+            pair (dict): Compiled fragments of the energy pair
+            traits (list): Fragments of the dominant traits
+            patterns (list): Fragments of the emotional patterns
+            
+        Returns:
+            dict: Structured recommendations
+        """
+        lists = pair["lists"]
+        recommendations = {"environment": dict(pair["environment"])}
+        for key, _ in _RECOMMENDATION_LISTS:
+            recommendations[key] = list(lists[key])
+        
+        recommendations["stress_management"].extend(pattern["stress_management"] for pattern in patterns)
+        recommendations["personal_development"].extend(trait["development"] for trait in traits)
+        
+        sections = [pair["environment_text"]]
+        sections.extend(_bullets(recommendations[key]) for key, _ in _RECOMMENDATION_LISTS)
+        recommendations["full_recommendations"] = _join_sections("# Personalized Recommendations", _RECOMMENDATION_HEADINGS, sections)
+        
+        return recommendations
@@ -10,10 +10,19 @@ from .prompt_templates import (
     create_color_preference_prompt,
     create_jung_energy_prompt,
     create_comprehensive_profile_prompt,
-    create_recommendations_prompt
+    create_recommendations_prompt,
+    create_multi_user_recommendations_prompt,
+    create_section_repair_prompt
 )
 from .llm_integration import LLMIntegration
-from .response_processor import ResponseProcessor
+from .response_processor import ResponseProcessor, ParsedResponse, StreamingSectionParser
+from .singleflight import SingleFlight
+from .scheduler import PriorityScheduler, llm_priority, current_priority, INTERACTIVE, BATCH
+from .routing import ModelRouter
+from .batch import BatchBackend, LocalBatchBackend
+from .client_registry import get_shared_client, clear_shared_clients
+from .simulation import SimulatedProvider, LATENCY_PROFILES
+from .errors import LLMError, LLMServiceError, LLMRateLimitError, LLMTimeoutError
 
 __all__ = [
     'LLMFramework',
@@ -22,6 +31,27 @@ __all__ = [
     'create_jung_energy_prompt',
     'create_comprehensive_profile_prompt',
     'create_recommendations_prompt',
+    'create_multi_user_recommendations_prompt',
+    'create_section_repair_prompt',
     'LLMIntegration',
-    'ResponseProcessor'
+    'ResponseProcessor',
+    'ParsedResponse',
+    'StreamingSectionParser',
+    'SingleFlight',
+    'PriorityScheduler',
+    'llm_priority',
+    'current_priority',
+    'INTERACTIVE',
+    'BATCH',
+    'ModelRouter',
+    'BatchBackend',
+    'LocalBatchBackend',
+    'get_shared_client',
+    'clear_shared_clients',
+    'SimulatedProvider',
+    'LATENCY_PROFILES',
+    'LLMError',
+    'LLMServiceError',
+    'LLMRateLimitError',
+    'LLMTimeoutError'
 ]
@@ -0,0 +1,174 @@
+"""
+Batch Processing Module for Psycho-Color Analysis System
+
+This module runs bulk LLM work, such as profile backfills, as batch jobs.
+Prompts are accumulated into a JSONL batch file in the request format used
+by provider batch APIs, the file is submitted through a pluggable batch
+backend, and results are read back as they land. Per-call latency does
+not matter for this traffic, so backends are free to trade it for
+throughput and cost.
+"""
+
+import json
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .scheduler import llm_priority, BATCH
+
+# Endpoint recorded in batch request lines
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+def write_batch_file(path, prompts, model, system_prompt):
+    """
+    Write prompts to a JSONL batch file.
+    
+    Args:
+        path (str): Path of the batch file to write
+        prompts (iterable): (custom ID, prompt) pairs
+        model (str): Model to request
+        system_prompt (str): System prompt sent with every request
+        
+    Returns:
+        int: Number of requests written
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as batch_file:
+        for custom_id, prompt in prompts:
+            batch_file.write(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {
+                    "model": model,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ]
+                }
+            }) + "\n")
+            count += 1
+    return count
+
+def read_batch_file(path):
+    """
+    Read requests from a JSONL batch file.
+    
+    Args:
+        path (str): Path of the batch file
+        
+    Yields:
+        dict: Each batch request
+    """
+    with open(path, encoding="utf-8") as batch_file:
+        for line in batch_file:
+            if line.strip():
+                yield json.loads(line)
+
+class BatchBackend:
+    """
+    Interface for services that run batch files.
+    
+    A backend accepts a batch file and later yields one result per request,
+    in any order, as results become available. Each result is a dictionary
+    with the request's "custom_id" and either the completion text under
+    "response" or a description of the failure under "error".
+    """
+    
+    def submit(self, batch_path):
+        """
+        Submit a batch file.
+        
+        Args:
+            batch_path (str): Path of the JSONL batch file
+            
+        Returns:
+            str: Batch identifier
+        """
+        raise NotImplementedError
+    
+    def results(self, batch_id):
+        """
+        Yield the results of a batch as they land.
+        
+        Args:
+            batch_id (str): Batch identifier returned by submit
+            
+        Yields:
+            dict: Result with "custom_id" and "response" or "error"
+        """
+        raise NotImplementedError
+
+class LocalBatchBackend(BatchBackend):
+    """
+    Batch backend that runs batch files through a local LLM client.
+    
+    Requests are sent concurrently at batch priority, so a local backfill
+    only uses LLM capacity left over by interactive traffic.
+    """
+    
+    def __init__(self, llm_integration, max_workers=8):
+        """
+        Initialize the backend.
+        
+        Args:
+            llm_integration (LLMIntegration): Client used to run the requests
+            max_workers (int, optional): Requests run concurrently
+        """
+        self.llm_integration = llm_integration
+        self.max_workers = max_workers
+        self._batches = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, batch_path):
+        """
+        Start running a batch file.
+        
+        Args:
+            batch_path (str): Path of the JSONL batch file
+            
+        Returns:
+            str: Batch identifier
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm-batch")
+        futures = {}
+        for request in read_batch_file(batch_path):
+            prompt = request["body"]["messages"][-1]["content"]
+            futures[executor.submit(self._complete, prompt)] = request["custom_id"]
+        executor.shutdown(wait=False)
+        
+        batch_id = uuid.uuid4().hex
+        with self._lock:
+            self._batches[batch_id] = futures
+        return batch_id
+    
+    def results(self, batch_id):
+        """
+        Yield the results of a batch in order of completion.
+        
+        Args:
+            batch_id (str): Batch identifier returned by submit
+            
+        Yields:
+            dict: Result with "custom_id" and "response" or "error"
+        """
+        with self._lock:
+            futures = self._batches.pop(batch_id)
+        
+        for future in as_completed(futures):
+            try:
+                yield {"custom_id": futures[future], "response": future.result()}
+            except Exception as e:
+                yield {"custom_id": futures[future], "error": str(e)}
+    
+    def _complete(self, prompt):
+        """
+        Run one batch request at batch priority.
+        
+        Args:
+            prompt (str): The prompt to send to the LLM
+            
+        Returns:
+            str: The LLM's response
+        """
+        with llm_priority(BATCH):
+            return self.llm_integration._generate_response(prompt)
@@ -0,0 +1,50 @@
+"""
+Client Registry Module for Psycho-Color Analysis System
+
+This module keeps one LLM client per provider, model and API key for the
+whole process, so connection pools, in-flight request coalescing and
+concurrency limits are shared by every API instance in a worker. The
+scheduler gauges of each shared client are collected for metrics.
+"""
+
+import threading
+from .llm_integration import LLMIntegration
+from ..observability.metrics import REGISTRY
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_shared_client(api_key=None, model="gpt-4", provider="openai"):
+    """
+    Get the process-wide LLM client for a provider, model and API key.
+    
+    Args:
+        api_key (str, optional): API key for the LLM service
+        model (str, optional): Model to use for analysis
+        provider (str, optional): LLM provider name
+        
+    Returns:
+        LLMIntegration: The shared client, created on first use
+    """
+    key = (provider, model, api_key)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = LLMIntegration(api_key=api_key, model=model, provider=provider)
+            _clients[key] = client
+            REGISTRY.register_collector(("llm_scheduler",) + key, client.collect_metrics)
+        return client
+
+def clear_shared_clients():
+    """
+    Drop every shared client, closing their connection pools.
+    """
+    with _clients_lock:
+        clients = list(_clients.values())
+        for key in _clients:
+            REGISTRY.unregister_collector(("llm_scheduler",) + key)
+        _clients.clear()
+    
+    for client in clients:
+        if client._session is not None:
+            client._session.close()
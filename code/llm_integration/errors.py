@@ -0,0 +1,48 @@
+"""
+Errors Module for Psycho-Color Analysis System
+
+This module defines the errors raised when a call to the LLM service fails.
+"""
+
+class LLMError(Exception):
+    """
+    Base class for failed LLM calls.
+    """
+
+class LLMServiceError(LLMError):
+    """
+    The LLM service returned an error response.
+    """
+    
+    def __init__(self, message, status_code=500):
+        """
+        Initialize the error.
+        
+        Args:
+            message (str): Description of the error
+            status_code (int, optional): HTTP status of the response
+        """
+        super().__init__(message)
+        self.status_code = status_code
+
+class LLMRateLimitError(LLMServiceError):
+    """
+    The LLM service rejected the call because a rate limit was exceeded.
+    """
+    
+    def __init__(self, message, retry_after=None):
+        """
+        Initialize the error.
+        
+        Args:
+            message (str): Description of the error
+            retry_after (float, optional): Seconds the service asked to wait
+                before retrying
+        """
+        super().__init__(message, status_code=429)
+        self.retry_after = retry_after
+
+class LLMTimeoutError(LLMError):
+    """
+    The LLM service did not respond in time.
+    """
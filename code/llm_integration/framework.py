@@ -5,6 +5,9 @@ This module provides the main interface for the LLM Integration Framework
 of the Psycho-Color Analysis system.
 """
 
+import os
+import time
+import tempfile
 from .prompt_templates import (
     PromptTemplates,
     create_color_preference_prompt,
@@ -12,96 +15,262 @@ from .prompt_templates import (
     create_comprehensive_profile_prompt,
     create_recommendations_prompt
 )
-from .llm_integration import LLMIntegration
-from .response_processor import ResponseProcessor
+from .client_registry import get_shared_client
+from .batch import LocalBatchBackend, write_batch_file
+from .routing import ModelRouter, COLOR_PREFERENCE, JUNG_ENERGY, COMPREHENSIVE_PROFILE, RECOMMENDATIONS
+from ..observability.metrics import REGISTRY
+
+_LLM_CALL_SECONDS = REGISTRY.histogram(
+    "psycho_color_llm_call_seconds",
+    "Latency of each type of LLM call, including scheduling, retries and parsing.",
+    ("call_type", "model")
+)
 
 class LLMFramework:
     """
     Main interface for the LLM Integration Framework.
     """
     
-    def __init__(self, api_key=None, model="gpt-4"):
+    def __init__(self, api_key=None, model="gpt-4", provider="openai", llm_integration=None, router=None):
         """
         Initialize the LLM Framework.
         
         Args:
             api_key (str, optional): API key for the LLM service
             model (str, optional): Model to use for analysis
+            provider (str, optional): LLM provider name
+            llm_integration (LLMIntegration, optional): Client to use instead of
+                the process-wide shared client for the provider, model and key
+            router (ModelRouter, optional): Chooses the model for each call
+                type; every call uses the framework's model if not provided
         """
-        self.llm_integration = LLMIntegration(api_key=api_key, model=model)
-        self.response_processor = ResponseProcessor()
+        if llm_integration is None:
+            llm_integration = get_shared_client(api_key=api_key, model=model, provider=provider)
+        self.llm_integration = llm_integration
+        self.response_processor = self.llm_integration.response_processor
+        self.router = router if router is not None else ModelRouter.single_model(llm_integration.model)
+        self.api_key = api_key
+        self.provider = provider
     
-    def analyze_color_preferences(self, color_data):
+    def analyze_color_preferences(self, color_data, latency_budget=None):
         """
         Analyze color preferences and generate psychological insights.
         
         Args:
             color_data (dict): Dictionary containing color preference data
-            
+            latency_budget (float, optional): Seconds the call may take; a
+                faster model tier is used if the preferred one would exceed it
+                
         Returns:
             dict: Structured analysis results
         """
-        # Generate raw response from LLM
-        raw_response = self.llm_integration.analyze_color_preferences(color_data)
-        
-        # Process and structure the response
-        structured_response = self.response_processor.process_color_preference_analysis(raw_response)
-        
-        return structured_response
+        # The integration parses the response once into a structured result
+        return self._call(COLOR_PREFERENCE, latency_budget, lambda client: client.analyze_color_preferences(color_data))
     
-    def analyze_jung_color_energy(self, color_ranking):
+    def analyze_jung_color_energy(self, color_ranking, latency_budget=None):
         """
         Analyze Jung's Color Energy distribution.
         
         Args:
             color_ranking (list): Ordered list of colors from most to least preferred
-            
+            latency_budget (float, optional): Seconds the call may take; a
+                faster model tier is used if the preferred one would exceed it
+                
         Returns:
             dict: Structured analysis results with color energy distribution
         """
-        # Generate raw response from LLM
-        raw_response = self.llm_integration.analyze_jung_color_energy(color_ranking)
-        
-        # Process and structure the response
-        structured_response = self.response_processor.process_jung_energy_analysis(raw_response)
-        
-        return structured_response
+        # The integration parses the response once into a structured result
+        return self._call(JUNG_ENERGY, latency_budget, lambda client: client.analyze_jung_color_energy(color_ranking))
     
-    def generate_comprehensive_profile(self, all_color_data):
+    def generate_comprehensive_profile(self, all_color_data, latency_budget=None):
         """
         Generate a comprehensive psychological profile.
         
         Args:
             all_color_data (dict): Dictionary containing all color preference data
-            
+            latency_budget (float, optional): Seconds the call may take; a
+                faster model tier is used if the preferred one would exceed it
+                
         Returns:
             dict: Structured comprehensive profile
         """
-        # Generate raw response from LLM
-        raw_response = self.llm_integration.generate_comprehensive_profile(all_color_data)
+        # The integration parses the response once into a structured result
+        return self._call(COMPREHENSIVE_PROFILE, latency_budget, lambda client: client.generate_comprehensive_profile(all_color_data))
+    
+    def generate_recommendations(self, profile_summary, latency_budget=None):
+        """
+        Generate personalized recommendations based on profile.
+        
+        Args:
+            profile_summary (str): Summary of the psychological profile
+            latency_budget (float, optional): Seconds the call may take; a
+                faster model tier is used if the preferred one would exceed it
+                
+        Returns:
+            dict: Structured personalized recommendations
+        """
+        # The integration parses the response once into a structured result
+        return self._call(RECOMMENDATIONS, latency_budget, lambda client: client.generate_recommendations(profile_summary))
+    
+    def generate_recommendations_for_users(self, profile_summaries, users_per_call=8):
+        """
+        Generate recommendations for many users, several users per LLM call.
         
-        # Process and structure the response
-        structured_response = self.response_processor.process_comprehensive_profile(raw_response)
+        Args:
+            profile_summaries (dict): User ID -> summary of the psychological profile
+            users_per_call (int, optional): Maximum users packed into one call
+            
+        Returns:
+            dict: User ID -> structured personalized recommendations
+        """
+        client = self._client(self.router.route(RECOMMENDATIONS))
+        return client.generate_recommendations_for_users(profile_summaries, users_per_call)
+    
+    def stream_comprehensive_profile(self, all_color_data, latency_budget=None):
+        """
+        Generate a comprehensive profile, yielding sections as they complete.
         
-        return structured_response
+        Args:
+            all_color_data (dict): Dictionary containing all color preference data
+            latency_budget (float, optional): Seconds the call may take; a
+                faster model tier is used if the preferred one would exceed it
+                
+        Returns:
+            iterator: (section key, section text) tuples in order of completion
+        """
+        client = self._client(self.router.route(COMPREHENSIVE_PROFILE, latency_budget))
+        return client.stream_comprehensive_profile(all_color_data)
     
-    def generate_recommendations(self, profile_summary):
+    def stream_recommendations(self, profile_summary, latency_budget=None):
         """
-        Generate personalized recommendations based on profile.
+        Generate recommendations, yielding sections as they complete.
         
         Args:
             profile_summary (str): Summary of the psychological profile
+            latency_budget (float, optional): Seconds the call may take; a
+                faster model tier is used if the preferred one would exceed it
+                
+        Returns:
+            iterator: (section key, section text) tuples in order of completion
+        """
+        client = self._client(self.router.route(RECOMMENDATIONS, latency_budget))
+        return client.stream_recommendations(profile_summary)
+    
+    def run_profile_batch(self, profiles, batch_path=None, backend=None):
+        """
+        Generate comprehensive profiles for many users as one batch job.
+        
+        Args:
+            profiles (dict): Custom ID -> color preference data for each profile
+            batch_path (str, optional): Where to write the batch file; a
+                temporary file is used and removed after submission if not provided
+            backend (BatchBackend, optional): Backend running the batch;
+                defaults to running it through this framework's LLM client
+                
+        Yields:
+            tuple: (custom ID, structured profile, error) in order of
+                completion; the profile is None and the error describes the
+                failure if the request failed
+        """
+        prompts = ((custom_id, create_comprehensive_profile_prompt(data)) for custom_id, data in profiles.items())
+        return self._run_batch(prompts, COMPREHENSIVE_PROFILE, batch_path, backend)
+    
+    def run_recommendations_batch(self, profile_summaries, batch_path=None, backend=None):
+        """
+        Generate recommendations for many users as one batch job.
+        
+        Args:
+            profile_summaries (dict): Custom ID -> profile summary for each user
+            batch_path (str, optional): Where to write the batch file; a
+                temporary file is used and removed after submission if not provided
+            backend (BatchBackend, optional): Backend running the batch;
+                defaults to running it through this framework's LLM client
+                
+        Yields:
+            tuple: (custom ID, structured recommendations, error) in order of
+                completion; the recommendations are None and the error
+                describes the failure if the request failed
+        """
+        prompts = ((custom_id, create_recommendations_prompt(summary)) for custom_id, summary in profile_summaries.items())
+        return self._run_batch(prompts, RECOMMENDATIONS, batch_path, backend)
+    
+    def _run_batch(self, prompts, call_type, batch_path=None, backend=None):
+        """
+        Write prompts to a batch file, submit it and process results as they land.
+        
+        Args:
+            prompts (iterable): (custom ID, prompt) pairs
+            call_type (str): Call type of the prompts, COMPREHENSIVE_PROFILE
+                or RECOMMENDATIONS
+            batch_path (str, optional): Where to write the batch file
+            backend (BatchBackend, optional): Backend running the batch
+            
+        Yields:
+            tuple: (custom ID, structured result, error)
+        """
+        client = self._client(self.router.route(call_type))
+        if call_type == COMPREHENSIVE_PROFILE:
+            process = self.response_processor.process_comprehensive_profile
+        else:
+            process = self.response_processor.process_recommendations
+        
+        if backend is None:
+            backend = LocalBatchBackend(client)
+        
+        temporary = batch_path is None
+        if temporary:
+            descriptor, batch_path = tempfile.mkstemp(prefix="psycho-color-batch-", suffix=".jsonl")
+            os.close(descriptor)
+        
+        try:
+            write_batch_file(batch_path, prompts, client.model, client.system_prompt)
+            batch_id = backend.submit(batch_path)
+        finally:
+            if temporary:
+                os.remove(batch_path)
+        
+        for result in backend.results(batch_id):
+            if "error" in result:
+                yield result["custom_id"], None, result["error"]
+            else:
+                yield result["custom_id"], process(result["response"]), None
+    
+    def _call(self, call_type, latency_budget, call):
+        """
+        Make an LLM call on the routed model and record its latency.
+        
+        Args:
+            call_type (str): Type of the call
+            latency_budget (float): Seconds the call may take, or None
+            call (callable): Function making the call on a client
             
         Returns:
-            dict: Structured personalized recommendations
+            dict: The call's result
         """
-        # Generate raw response from LLM
-        raw_response = self.llm_integration.generate_recommendations(profile_summary)
+        model = self.router.route(call_type, latency_budget)
+        client = self._client(model)
         
-        # Process and structure the response
-        structured_response = self.response_processor.process_recommendations(raw_response)
+        start = time.monotonic()
+        result = call(client)
+        elapsed = time.monotonic() - start
+        self.router.record(model, elapsed)
+        _LLM_CALL_SECONDS.observe(elapsed, call_type=call_type, model=model)
+        return result
+    
+    def _client(self, model):
+        """
+        Get the LLM client for a model.
         
-        return structured_response
+        Args:
+            model (str): The model
+            
+        Returns:
+            LLMIntegration: This framework's client if it serves the model,
+                otherwise the shared client for the model
+        """
+        if model == self.llm_integration.model:
+            return self.llm_integration
+        return get_shared_client(api_key=self.api_key, model=model, provider=self.provider)
     
     def get_system_prompt(self):
         """
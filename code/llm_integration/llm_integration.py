@@ -5,32 +5,124 @@ This module handles the integration with Large Language Models for
 generating psychological insights based on color preference data.
 """
 
+import re
 import json
+import time
+import queue
+import logging
+import threading
+import contextvars
 import requests
 from .prompt_templates import (
     PromptTemplates,
     create_color_preference_prompt,
     create_jung_energy_prompt,
     create_comprehensive_profile_prompt,
-    create_recommendations_prompt
+    create_recommendations_prompt,
+    create_multi_user_recommendations_prompt,
+    create_section_repair_prompt
 )
+from .response_processor import ResponseProcessor
+from .singleflight import SingleFlight
+from .scheduler import PriorityScheduler, current_priority
+from .simulation import SimulatedProvider
+from .errors import LLMError, LLMRateLimitError, LLMTimeoutError
+from ..observability import span
+from ..observability.metrics import REGISTRY, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a buffered token stream
+_END_OF_STREAM = object()
+
+_LLM_REQUESTS = REGISTRY.counter("psycho_color_llm_requests_total", "LLM requests by outcome.", ("model", "outcome"))
+_LLM_REQUEST_SECONDS = REGISTRY.histogram("psycho_color_llm_request_seconds", "LLM request latency, excluding scheduler queueing.", ("model",))
+_LLM_QUEUE_SECONDS = REGISTRY.histogram("psycho_color_llm_queue_seconds", "Time LLM requests waited for a scheduler slot.", ("model",))
+_LLM_PROMPT_TOKENS = REGISTRY.counter("psycho_color_llm_prompt_tokens_total", "Estimated prompt tokens sent to the LLM.", ("model",))
+_LLM_COMPLETION_TOKENS = REGISTRY.counter("psycho_color_llm_completion_tokens_total", "Estimated completion tokens received from the LLM.", ("model",))
+_LLM_SCHEDULER = REGISTRY.gauge("psycho_color_llm_scheduler_requests", "LLM requests running or waiting for a slot.", ("model", "priority", "state"))
+_CACHE_LOOKUPS = REGISTRY.counter("psycho_color_cache_lookups_total", "Cache and request coalescing lookups by result.", ("cache", "result"))
+
+def _outcome(error):
+    """
+    Classify a failed LLM request for metrics.
+    
+    Args:
+        error (Exception): The error raised by the request
+        
+    Returns:
+        str: "rate_limited", "timeout" or "error"
+    """
+    if isinstance(error, LLMRateLimitError):
+        return "rate_limited"
+    if isinstance(error, LLMTimeoutError):
+        return "timeout"
+    return "error"
 
 class LLMIntegration:
     """
     Handles integration with Large Language Models for psychological analysis.
     """
     
-    def __init__(self, api_key=None, model="gpt-4"):
+    def __init__(self, api_key=None, model="gpt-4", provider="openai", max_concurrency=16, priority_classes=None, simulator=None):
         """
         Initialize the LLM integration.
         
+        Instances are normally obtained from get_shared_client so that every
+        caller in the process shares one client per provider, model and key.
+        
         Args:
             api_key (str, optional): API key for the LLM service
             model (str, optional): Model to use for analysis
+            provider (str, optional): LLM provider name
+            max_concurrency (int, optional): Maximum concurrent requests to the provider
+            priority_classes (dict, optional): Priority class name -> {"weight",
+                "reserved"} configuration for sharing the concurrency between
+                interactive and batch traffic; see PriorityScheduler
+            simulator (SimulatedProvider, optional): Simulated service
+                delivering the development responses; configured from the
+                environment if not provided
         """
         self.api_key = api_key
         self.model = model
+        self.provider = provider
+        self.max_concurrency = max_concurrency
         self.system_prompt = PromptTemplates.SYSTEM_PROMPT
+        self.response_processor = ResponseProcessor()
+        self._inflight = SingleFlight()
+        self.scheduler = PriorityScheduler(max_concurrency, priority_classes)
+        self.simulator = simulator if simulator is not None else SimulatedProvider.from_environment()
+        self._session = None
+        self._session_lock = threading.Lock()
+    
+    def collect_metrics(self):
+        """
+        Update the scheduler gauges before metrics are rendered.
+        
+        Shared clients are registered as metric collectors by the client
+        registry; other clients report their scheduler only if registered.
+        """
+        for priority_class, stats in self.scheduler.stats().items():
+            for state, count in stats.items():
+                _LLM_SCHEDULER.set(count, model=self.model, priority=priority_class, state=state)
+    
+    @property
+    def session(self):
+        """
+        HTTP session holding the connection pool to the provider.
+        
+        Returns:
+            requests.Session: The session, created on first use
+        """
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+                session.mount("https://", adapter)
+                if self.api_key:
+                    session.headers["Authorization"] = f"Bearer {self.api_key}"
+                self._session = session
+            return self._session
     
     def analyze_color_preferences(self, color_data):
         """
@@ -44,7 +136,7 @@ class LLMIntegration:
         """
         prompt = create_color_preference_prompt(color_data)
         response = self._generate_response(prompt)
-        return self._parse_color_preference_analysis(response)
+        return self.response_processor.process_color_preference_analysis(response)
     
     def analyze_jung_color_energy(self, color_ranking):
         """
@@ -58,7 +150,7 @@ class LLMIntegration:
         """
         prompt = create_jung_energy_prompt(color_ranking)
         response = self._generate_response(prompt)
-        return self._parse_jung_energy_analysis(response)
+        return self.response_processor.process_jung_energy_analysis(response)
     
     def generate_comprehensive_profile(self, all_color_data):
         """
@@ -72,7 +164,8 @@ class LLMIntegration:
         """
         prompt = create_comprehensive_profile_prompt(all_color_data)
         response = self._generate_response(prompt)
-        return self._parse_comprehensive_profile(response)
+        response = self._repair_sections(prompt, response, ResponseProcessor.COMPREHENSIVE_PROFILE_SECTIONS)
+        return self.response_processor.process_comprehensive_profile(response)
     
     def generate_recommendations(self, profile_summary):
         """
@@ -86,23 +179,238 @@ class LLMIntegration:
         """
         prompt = create_recommendations_prompt(profile_summary)
         response = self._generate_response(prompt)
-        return self._parse_recommendations(response)
+        response = self._repair_sections(prompt, response, ResponseProcessor.RECOMMENDATIONS_SECTIONS)
+        return self.response_processor.process_recommendations(response)
+    
+    def generate_recommendations_for_users(self, profile_summaries, users_per_call=8):
+        """
+        Generate recommendations for many users, several users per LLM call.
+        
+        Users are packed into multi-user prompts that share one copy of the
+        instructions, and each response is split back into per-user
+        recommendations. Users missing from a response are retried with a
+        single-user call.
+        
+        Args:
+            profile_summaries (dict): User ID -> summary of the psychological profile
+            users_per_call (int, optional): Maximum users packed into one call
+            
+        Returns:
+            dict: User ID -> personalized recommendations
+        """
+        user_ids = list(profile_summaries)
+        results = {}
+        
+        for i in range(0, len(user_ids), users_per_call):
+            group = user_ids[i:i + users_per_call]
+            
+            # Number users within the prompt so arbitrary IDs cannot break the delimiters
+            prompt = create_multi_user_recommendations_prompt({
+                str(n): profile_summaries[user_id] for n, user_id in enumerate(group, 1)
+            })
+            response = self._generate_response(prompt)
+            parts = self.response_processor.split_user_responses(response, [str(n) for n in range(1, len(group) + 1)])
+            
+            for n, user_id in enumerate(group, 1):
+                part = parts.get(str(n))
+                if part is None:
+                    results[user_id] = self.generate_recommendations(profile_summaries[user_id])
+                else:
+                    part = self._repair_sections(
+                        create_recommendations_prompt(profile_summaries[user_id]),
+                        part,
+                        ResponseProcessor.RECOMMENDATIONS_SECTIONS
+                    )
+                    results[user_id] = self.response_processor.process_recommendations(part)
+        
+        return results
+    
+    def _repair_sections(self, prompt, response, layout):
+        """
+        Re-ask for any sections missing from a response and merge them in.
+        
+        Only the missing sections are requested, so an incomplete or
+        malformed completion does not force a full regeneration. If the
+        follow-up call fails, the response is returned as it was.
+        
+        Args:
+            prompt (str): The prompt the response answered
+            response (str): The LLM's response
+            layout (tuple): Section layout the response should follow
+            
+        Returns:
+            str: The response, with missing sections filled in where the
+                follow-up provided them
+        """
+        missing = set(self.response_processor.find_missing_sections(response, layout))
+        if not missing:
+            return response
+        
+        headings = [start for key, start, _ in layout if key in missing]
+        try:
+            repair = self._generate_response(create_section_repair_prompt(prompt, headings))
+        except LLMError:
+            logger.warning("Re-asking for %d missing sections failed; keeping the partial response", len(missing), exc_info=True)
+            return response
+        return self.response_processor.merge_sections(response, repair, layout)
+    
+    def stream_comprehensive_profile(self, all_color_data):
+        """
+        Generate a comprehensive profile, yielding each section as it completes.
+        
+        Args:
+            all_color_data (dict): Dictionary containing all color preference data
+            
+        Yields:
+            tuple: (section key, section text) in order of completion
+        """
+        prompt = create_comprehensive_profile_prompt(all_color_data)
+        return self._stream_sections(prompt, ResponseProcessor.COMPREHENSIVE_PROFILE_SECTIONS)
+    
+    def stream_recommendations(self, profile_summary):
+        """
+        Generate recommendations, yielding each section as it completes.
+        
+        Args:
+            profile_summary (str): Summary of the psychological profile
+            
+        Yields:
+            tuple: (section key, section text) in order of completion
+        """
+        prompt = create_recommendations_prompt(profile_summary)
+        return self._stream_sections(prompt, ResponseProcessor.RECOMMENDATIONS_SECTIONS)
+    
+    def _stream_sections(self, prompt, layout):
+        """
+        Stream a response through an incremental section parser.
+        
+        Args:
+            prompt (str): The prompt to send to the LLM
+            layout (tuple): Section layout of the expected response
+            
+        Yields:
+            tuple: (section key, section text) in order of completion
+        """
+        parser = self.response_processor.stream_sections(layout)
+        for chunk in self._stream_response(prompt):
+            for section in parser.feed(chunk):
+                yield section
+        for section in parser.close():
+            yield section
+    
+    def _stream_response(self, prompt):
+        """
+        Generate a response from the LLM as a stream of tokens.
+        
+        The provider stream is read on a background thread into a buffer,
+        so the scheduler slot is held only while the provider is producing
+        tokens, however slowly the caller consumes them. Closing the
+        generator stops reading the provider stream at the next token.
+        
+        Args:
+            prompt (str): The prompt to send to the LLM
+            
+        Yields:
+            str: Pieces of the LLM's response as they are produced
+        """
+        tokens = queue.SimpleQueue()
+        cancelled = threading.Event()
+        
+        def produce():
+            try:
+                with self.scheduler.slot():
+                    _LLM_PROMPT_TOKENS.inc(estimate_tokens(prompt), model=self.model)
+                    started = time.perf_counter()
+                    completion = []
+                    try:
+                        # This is a placeholder for actual streaming API integration
+                        # In a real implementation, this would consume the provider's token stream
+                        for token in self.simulator.stream(prompt, self._simulate_llm_response):
+                            if cancelled.is_set():
+                                break
+                            completion.append(token)
+                            tokens.put(token)
+                    except Exception as e:
+                        _LLM_REQUESTS.inc(model=self.model, outcome=_outcome(e))
+                        raise
+                    _LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, model=self.model)
+                _LLM_REQUESTS.inc(model=self.model, outcome="ok")
+                _LLM_COMPLETION_TOKENS.inc(estimate_tokens("".join(completion)), model=self.model)
+            except Exception as e:
+                tokens.put(e)
+            finally:
+                tokens.put(_END_OF_STREAM)
+        
+        # The producer runs in the caller's context so it keeps its priority class
+        threading.Thread(target=contextvars.copy_context().run, args=(produce,), daemon=True).start()
+        try:
+            while True:
+                token = tokens.get()
+                if token is _END_OF_STREAM:
+                    return
+                if isinstance(token, Exception):
+                    raise token
+                yield token
+        finally:
+            cancelled.set()
     
     def _generate_response(self, prompt):
         """
         Generate a response from the LLM.
         
+        Identical prompts requested concurrently at the same priority share
+        a single LLM call. Calls are scheduled under the priority class of
+        the calling context (see llm_priority).
+        
         Args:
             prompt (str): The prompt to send to the LLM
             
         Returns:
             str: The LLM's response
         """
-        # This is a placeholder for actual API integration
-        # In a real implementation, this would make an API call to the LLM service
+        # Keying on the priority keeps interactive callers from waiting
+        # behind an identical batch call queued at lower priority
+        with span("llm.generate", model=self.model, prompt_chars=len(prompt)) as generate_span:
+            key = (self.model, current_priority(), prompt)
+            response, shared = self._inflight.do(key, self._request_completion, prompt)
+            generate_span.set_attributes(coalesced=shared, response_chars=len(response))
+            _CACHE_LOOKUPS.inc(cache="llm_inflight", result="hit" if shared else "miss")
+            return response
+    
+    def _request_completion(self, prompt):
+        """
+        Request a completion from the LLM service.
         
-        # Simulated response for development purposes
-        return self._simulate_llm_response(prompt)
+        Args:
+            prompt (str): The prompt to send to the LLM
+            
+        Returns:
+            str: The LLM's response
+        """
+        with span("llm.request", model=self.model, priority=current_priority()) as request_span:
+            queued = time.perf_counter()
+            with self.scheduler.slot():
+                started = time.perf_counter()
+                request_span.set_attribute("queue_seconds", started - queued)
+                _LLM_QUEUE_SECONDS.observe(started - queued, model=self.model)
+                _LLM_PROMPT_TOKENS.inc(estimate_tokens(prompt), model=self.model)
+                
+                try:
+                    # This is a placeholder for actual API integration
+                    # In a real implementation, this would make an API call to the LLM
+                    # service through self.session
+                    
+                    # Simulated response for development purposes
+                    response = self.simulator.complete(prompt, self._simulate_llm_response)
+                except Exception as e:
+                    _LLM_REQUESTS.inc(model=self.model, outcome=_outcome(e))
+                    raise
+                _LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, model=self.model)
+            
+            _LLM_REQUESTS.inc(model=self.model, outcome="ok")
+            _LLM_COMPLETION_TOKENS.inc(estimate_tokens(response), model=self.model)
+            request_span.set_attribute("response_chars", len(response))
+            return response
     
     def _simulate_llm_response(self, prompt):
         """
@@ -117,7 +425,15 @@ class LLMIntegration:
         # This is a placeholder that would be replaced with actual API calls
         # For now, we'll return template responses based on the prompt content
         
-        if "Jung color energy" in prompt:
+        if "=== USER <id> ===" in prompt:
+            # Answer every user in a multi-user prompt with the single-user response
+            single = self._simulate_llm_response(create_recommendations_prompt(""))
+            return "\n".join(
+                f"=== USER {user_id} ===\n{single}\n=== END USER {user_id} ==="
+                for user_id in re.findall(r"^\s*### User (\S+)$", prompt, re.MULTILINE)
+            )
+        
+        elif "Jung color energy" in prompt:
             return """
             Based on the color preference ranking provided, the user's Jung's Four Color Energy distribution is as follows:
             
@@ -329,157 +645,3 @@ class LLMIntegration:
             
             This color profile suggests someone who would thrive in environments that provide structure while allowing for meaningful connections, and in roles that value both analytical thinking and interpersonal sensitivity.
             """
-    
-    def _parse_color_preference_analysis(self, response):
-        """
-        Parse the LLM's response to color preference analysis.
-        
-        Args:
-            response (str): The LLM's response
-            
-        Returns:
-            dict: Structured analysis results
-        """
-        # In a real implementation, this would parse the response into a structured format
-        # For now, we'll return a simple dictionary
-        return {
-            "personality_traits": self._extract_section(response, "Potential strengths include:", "Areas for growth might include:"),
-            "emotional_tendencies": self._extract_section(response, "emotional", "strengths"),
-            "behavioral_patterns": self._extract_section(response, "This color profile suggests", "thrive in environments"),
-            "strengths": self._extract_section(response, "Potential strengths include:", "Areas for growth might include:"),
-            "growth_areas": self._extract_section(response, "Areas for growth might include:", "This color profile suggests"),
-            "full_analysis": response
-        }
-    
-    def _parse_jung_energy_analysis(self, response):
-        """
-        Parse the LLM's response to Jung's Color Energy analysis.
-        
-        Args:
-            response (str): The LLM's response
-            
-        Returns:
-            dict: Structured analysis results
-        """
-        # Extract primary and secondary color energies
-        primary_energy = self._extract_value(response, "Primary Color Energy:", "\n")
-        secondary_energy = self._extract_value(response, "Secondary Color Energy:", "\n")
-        
-        # Extract different aspects of the analysis
-        communication_style = self._extract_section(response, "Communication Style:", "Decision-making Approach:")
-        decision_making = self._extract_section(response, "Decision-making Approach:", "Relationship Dynamics:")
-        relationship_dynamics = self._extract_section(response, "Relationship Dynamics:", "Work Preferences:")
-        work_preferences = self._extract_section(response, "Work Preferences:", "Stress Responses:")
-        stress_responses = self._extract_section(response, "Stress Responses:", "")
-        
-        return {
-            "primary_energy": primary_energy,
-            "secondary_energy": secondary_energy,
-            "communication_style": communication_style,
-            "decision_making": decision_making,
-            "relationship_dynamics": relationship_dynamics,
-            "work_preferences": work_preferences,
-            "stress_responses": stress_responses,
-            "full_analysis": response
-        }
-    
-    def _parse_comprehensive_profile(self, response):
-        """
-        Parse the LLM's response to comprehensive profile analysis.
-        
-        Args:
-            response (str): The LLM's response
-            
-        Returns:
-            dict: Structured comprehensive profile
-        """
-        # Extract different sections of the profile
-        personality_overview = self._extract_section(response, "## 1. Personality Overview", "## 2.")
-        jung_energy = self._extract_section(response, "## 2. Jung Color Energy Distribution", "## 3.")
-        emotional_landscape = self._extract_section(response, "## 3. Emotional Landscape", "## 4.")
-        interpersonal_dynamics = self._extract_section(response, "## 4. Interpersonal Dynamics", "## 5.")
-        environmental_preferences = self._extract_section(response, "## 5. Environmental Preferences", "## 6.")
-        growth_opportunities = self._extract_section(response, "## 6. Growth Opportunities", "## 7.")
-        practical_applications = self._extract_section(response, "## 7. Practical Applications", "")
-        
-        return {
-            "personality_overview": personality_overview,
-            "jung_energy": jung_energy,
-            "emotional_landscape": emotional_landscape,
-            "interpersonal_dynamics": interpersonal_dynamics,
-            "environmental_preferences": environmental_preferences,
-            "growth_opportunities": growth_opportunities,
-            "practical_applications": practical_applications,
-            "full_profile": response
-        }
-    
-    def _parse_recommendations(self, response):
-        """
-        Parse the LLM's response to recommendations.
-        
-        Args:
-            response (str): The LLM's response
-            
-        Returns:
-            dict: Structured recommendations
-        """
-        # Extract different recommendation sections
-        work_environment = self._extract_section(response, "## 1. Optimal Work Environment", "## 2.")
-        communication = self._extract_section(response, "## 2. Communication Strategies", "## 3.")
-        decision_making = self._extract_section(response, "## 3. Decision-Making Approaches", "## 4.")
-        stress_management = self._extract_section(response, "## 4. Stress Management Techniques", "## 5.")
-        personal_development = self._extract_section(response, "## 5. Personal Development Opportunities", "## 6.")
-        relationship_dynamics = self._extract_section(response, "## 6. Relationship Dynamics", "## 7.")
-        daily_practices = self._extract_section(response, "## 7. Daily Practices for Well-Being", "")
-        
-        return {
-            "work_environment": work_environment,
-            "communication": communication,
-            "decision_making": decision_making,
-            "stress_management": stress_management,
-            "personal_development": personal_development,
-            "relationship_dynamics": relationship_dynamics,
-            "daily_practices": daily_practices,
-            "full_recommendations": response
-        }
-    
-    def _extract_section(self, text, start_marker, end_marker):
-        """
-        Extract a section of text between two markers.
-        
-        Args:
-            text (str): The text to extract from
-            start_marker (str): The marker indicating the start of the section
-            end_marker (str): The marker indicating the end of the section
-            
-        Returns:
-            str: The extracted section
-        """
-        try:
-            start_idx = text.index(start_marker) + len(start_marker)
-            if end_marker:
-                end_idx = text.index(end_marker, start_idx)
-                return text[start_idx:end_idx].strip()
-            else:
-                return text[start_idx:].strip()
-        except ValueError:
-            return ""
-    
-    def _extract_value(self, text, label, delimiter):
-        """
-        Extract a labeled value from text.
-        
-        Args:
-            text (str): The text to extract from
-            label (str): The label preceding the value
-            delimiter (str): The delimiter after the value
-            
-        Returns:
-            str: The extracted value
-        """
-        try:
-            start_idx = text.index(label) + len(label)
-            end_idx = text.index(delimiter, start_idx)
-            return text[start_idx:end_idx].strip()
-        except ValueError:
-            return ""
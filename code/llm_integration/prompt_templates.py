@@ -147,6 +147,43 @@ class PromptTemplates:
     Provide practical, actionable recommendations that the user can implement
     to optimize their environments and interactions.
     """
+    
+    MULTI_USER_RECOMMENDATIONS = """
+    Below are psychological profiles derived from the color preferences of
+    several users, each introduced by its user ID.
+    
+    For each user, please provide specific recommendations for:
+    
+    1. Optimal work environment (colors, layout, lighting)
+    2. Communication strategies that align with their color energy
+    3. Decision-making approaches that leverage their strengths
+    4. Stress management techniques suited to their profile
+    5. Personal development opportunities based on their color psychology
+    6. Relationship dynamics they might find most fulfilling
+    7. Daily practices that could enhance their well-being
+    
+    Provide practical, actionable recommendations that each user can implement
+    to optimize their environments and interactions.
+    
+    Respond to each user in turn, in the order given. Start each user's
+    recommendations with the line "=== USER <id> ===" and end them with the
+    line "=== END USER <id> ===", using that user's ID. Do not refer to the
+    other users.
+    
+    {user_profiles}
+    """
+    
+    SECTION_REPAIR = """
+    A previous response to the request below was missing some sections.
+    
+    Request:
+    {original_prompt}
+    
+    Provide only the following sections, each starting with its heading
+    exactly as written:
+    
+    {section_headings}
+    """
 
 def format_prompt(template, **kwargs):
     """
@@ -228,3 +265,42 @@ def create_recommendations_prompt(profile_summary):
         PromptTemplates.RECOMMENDATIONS,
         profile_summary=profile_summary
     )
+
+def create_multi_user_recommendations_prompt(profile_summaries):
+    """
+    Create a prompt for recommendations for several users at once.
+    
+    The shared instructions are sent once, followed by each user's profile
+    summary under its ID.
+    
+    Args:
+        profile_summaries (dict): User ID -> summary of the psychological profile
+        
+    Returns:
+        str: Formatted prompt for multi-user recommendations
+    """
+    user_profiles = '\n\n'.join(
+        f"### User {user_id}\n{summary}" for user_id, summary in profile_summaries.items()
+    )
+    
+    return format_prompt(
+        PromptTemplates.MULTI_USER_RECOMMENDATIONS,
+        user_profiles=user_profiles
+    )
+
+def create_section_repair_prompt(original_prompt, section_headings):
+    """
+    Create a follow-up prompt asking only for sections missing from a response.
+    
+    Args:
+        original_prompt (str): The prompt the incomplete response answered
+        section_headings (list): Headings of the missing sections
+        
+    Returns:
+        str: Formatted prompt for the missing sections
+    """
+    return format_prompt(
+        PromptTemplates.SECTION_REPAIR,
+        original_prompt=original_prompt.strip(),
+        section_headings='\n'.join(section_headings)
+    )
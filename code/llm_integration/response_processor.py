@@ -5,17 +5,477 @@ This module handles the processing and structuring of LLM responses
 for the Psycho-Color Analysis system.
 """
 
+import re
+import functools
+import threading
+from bisect import bisect_left
+from ..observability import traced, current_span
+
+class SectionIndex:
+    """
+    Index of marker positions in an LLM response, built in a single pass.
+    
+    All markers of interest are compiled into one case-insensitive pattern
+    and located with a single scan of the text, so repeated section lookups
+    do not lowercase or rescan the response.
+    """
+    
+    def __init__(self, text, markers):
+        """
+        Build the index for a response.
+        
+        Args:
+            text (str): The text to index
+            markers (iterable): Markers whose positions should be recorded
+        """
+        self.text = text
+        self._pattern, self._prefixes = self._compile(tuple(markers))
+        self.positions = {marker: [] for marker in self._prefixes}
+        self._scan(0, len(text))
+    
+    def _scan(self, start, stop):
+        """
+        Record every marker occurrence that starts within a range of the text.
+        
+        Args:
+            start (int): First position to scan
+            stop (int): Position at which to stop recording matches
+        """
+        # Resume one character after each hit so overlapping markers are
+        # still found; markers sharing a start position are covered by prefixes
+        match = self._pattern.search(self.text, start)
+        while match and match.start() < stop:
+            position = match.start()
+            for marker in self._prefixes.get(match.group().lower(), ()):
+                self.positions[marker].append(position)
+            match = self._pattern.search(self.text, position + 1)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _compile(markers):
+        """
+        Compile (or fetch from cache) the pattern for a set of markers.
+        
+        Patterns for the most recently used 256 marker tuples are kept, so
+        caller-supplied markers cannot grow the cache without bound.
+        
+        Args:
+            markers (tuple): Markers to match
+            
+        Returns:
+            tuple: Compiled pattern and a mapping from each lowercased marker
+                to the markers that also start at the same position (itself and
+                any markers that are prefixes of it)
+        """
+        # Longest alternatives first so a match also implies its prefixes
+        lowered = sorted({m.lower() for m in markers if m}, key=len, reverse=True)
+        if lowered:
+            pattern = re.compile("|".join(re.escape(m) for m in lowered), re.IGNORECASE)
+        else:
+            pattern = re.compile(r"(?!)")
+        prefixes = {m: [p for p in lowered if m.startswith(p)] for m in lowered}
+        return pattern, prefixes
+    
+    def find(self, marker, start=0):
+        """
+        Find the first occurrence of a marker at or after a position.
+        
+        Args:
+            marker (str): The marker to look up (must have been indexed)
+            start (int, optional): Position to start searching from
+            
+        Returns:
+            int: Position of the marker, or -1 if not found
+        """
+        positions = self.positions.get(marker.lower(), ())
+        i = bisect_left(positions, start)
+        if i < len(positions):
+            return positions[i]
+        return -1
+    
+    def section(self, start_marker, end_marker):
+        """
+        Extract the text between two indexed markers.
+        
+        Args:
+            start_marker (str): The marker indicating the start of the section
+            end_marker (str): The marker indicating the end of the section
+                (an empty string means the end of the text)
+                
+        Returns:
+            str: The extracted section, or "" if the start marker is missing
+        """
+        start_idx = self.find(start_marker)
+        if start_idx < 0:
+            return ""
+        start_idx += len(start_marker)
+        
+        if end_marker:
+            end_idx = self.find(end_marker, start_idx)
+            if end_idx >= 0:
+                return self.text[start_idx:end_idx].strip()
+        return self.text[start_idx:].strip()
+    
+    def bounds(self, start_marker, end_marker):
+        """
+        Locate the text between two indexed markers.
+        
+        Args:
+            start_marker (str): The marker indicating the start of the section
+            end_marker (str): The marker indicating the end of the section
+                (an empty string means the end of the text)
+                
+        Returns:
+            tuple: (start, end) offsets such that text[start:end] is the
+                section returned by section(); (0, 0) if the start marker is missing
+        """
+        start_idx = self.find(start_marker)
+        if start_idx < 0:
+            return 0, 0
+        start_idx += len(start_marker)
+        
+        end_idx = self.find(end_marker, start_idx) if end_marker else -1
+        if end_idx < 0:
+            end_idx = len(self.text)
+        
+        section = self.text[start_idx:end_idx]
+        stripped = section.lstrip()
+        start_idx += len(section) - len(stripped)
+        return start_idx, start_idx + len(stripped.rstrip())
+
+
+class StreamingSectionParser(SectionIndex):
+    """
+    Incremental section parser for token-streamed LLM responses.
+    
+    Text is fed in chunks as the provider emits it. A section is reported as
+    soon as its end marker has arrived, with exactly the text a full parse of
+    the finished response would produce for it.
+    
+    Chunks are kept in a list and only the unscanned tail, which is at most
+    one marker long plus the newest chunk, is searched for markers, so a
+    long stream is parsed in linear time. The chunks are joined only when a
+    completed section is extracted.
+    """
+    
+    def __init__(self, layout):
+        """
+        Initialize the streaming parser.
+        
+        Args:
+            layout (tuple): Section layout as (key, start marker, end marker) tuples
+        """
+        self.layout = layout
+        self._chunks = []
+        self._length = 0
+        # Text not yet scanned for markers, starting at position _scanned
+        self._tail = ""
+        self._scanned = 0
+        super().__init__("", [marker for _, start, end in layout for marker in (start, end)])
+        self._max_marker_length = max([len(marker) for marker in self._prefixes] or [1])
+        self._emitted = set()
+    
+    @property
+    def text(self):
+        """
+        Get the text received so far.
+        
+        Returns:
+            str: The concatenated chunks
+        """
+        if len(self._chunks) > 1:
+            self._chunks[:] = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+    
+    @text.setter
+    def text(self, value):
+        self._chunks = [value] if value else []
+        self._length = len(value)
+        self._tail = value
+        self._scanned = 0
+    
+    def _scan(self, start, stop):
+        """
+        Record marker occurrences that start within a range of the unscanned tail.
+        
+        Args:
+            start (int): First position to scan; not before the unscanned tail
+            stop (int): Position at which to stop recording matches
+        """
+        offset = self._scanned
+        match = self._pattern.search(self._tail, start - offset)
+        while match and match.start() + offset < stop:
+            position = match.start() + offset
+            for marker in self._prefixes.get(match.group().lower(), ()):
+                self.positions[marker].append(position)
+            match = self._pattern.search(self._tail, match.start() + 1)
+    
+    def feed(self, chunk):
+        """
+        Add a chunk of streamed text.
+        
+        Args:
+            chunk (str): The next piece of the response
+            
+        Returns:
+            list: (key, section text) tuples for sections completed by this chunk
+        """
+        if chunk:
+            self._chunks.append(chunk)
+            self._length += len(chunk)
+            self._tail += chunk
+        # Only positions where every marker fits in the buffer can be scanned safely
+        return self._advance(self._length - self._max_marker_length + 1, final=False)
+    
+    def close(self):
+        """
+        Finish the stream.
+        
+        Returns:
+            list: (key, section text) tuples for every section not yet reported
+        """
+        return self._advance(self._length, final=True)
+    
+    def _advance(self, scan_to, final):
+        """
+        Scan newly available text and collect completed sections.
+        
+        Args:
+            scan_to (int): Position up to which marker starts can be recorded
+            final (bool): Whether the stream has ended
+            
+        Returns:
+            list: (key, section text) tuples for newly completed sections
+        """
+        if scan_to > self._scanned:
+            self._scan(self._scanned, scan_to)
+            self._tail = self._tail[scan_to - self._scanned:]
+            self._scanned = scan_to
+        
+        completed = []
+        for key, start_marker, end_marker in self.layout:
+            if key in self._emitted:
+                continue
+            if final or self._is_complete(start_marker, end_marker):
+                completed.append((key, self.section(start_marker, end_marker)))
+                self._emitted.add(key)
+        
+        return completed
+    
+    def _is_complete(self, start_marker, end_marker):
+        """
+        Check whether both markers of a section have been seen.
+        
+        Args:
+            start_marker (str): The marker indicating the start of the section
+            end_marker (str): The marker indicating the end of the section
+            
+        Returns:
+            bool: True if the section can no longer change
+        """
+        start_idx = self.find(start_marker)
+        if start_idx < 0 or not end_marker:
+            return False
+        return self.find(end_marker, start_idx + len(start_marker)) >= 0
+
+
+# Placeholder stored for fields that have not been materialized yet
+_PENDING = object()
+
+class ParsedResponse(dict):
+    """
+    Structured result of parsing an LLM response, with lazily materialized fields.
+    
+    Behaves like the plain dictionary returned by earlier versions, but each
+    field is only extracted and formatted from the raw response the first time
+    it is read. The raw response itself is kept once, in ``raw_response``.
+    Fields are built under a lock, so a result shared between threads never
+    exposes a field that another thread is still building.
+    """
+    
+    def __init__(self, raw_response, fields):
+        """
+        Initialize the parsed response.
+        
+        Args:
+            raw_response (str): The raw response from the LLM
+            fields (dict): Field values, or zero-argument callables that build them
+        """
+        super().__init__()
+        self.raw_response = raw_response
+        self._builders = {}
+        self._lock = threading.RLock()
+        
+        for key, value in fields.items():
+            if callable(value):
+                self._builders[key] = value
+                dict.__setitem__(self, key, _PENDING)
+            else:
+                dict.__setitem__(self, key, value)
+    
+    def _materialize(self, key):
+        """
+        Build a pending field and store its value.
+        
+        Args:
+            key (str): The field to build
+            
+        Returns:
+            object: The field value
+        """
+        with self._lock:
+            builder = self._builders.pop(key, None)
+            if builder is None:
+                return dict.__getitem__(self, key)
+            value = builder()
+            dict.__setitem__(self, key, value)
+            return value
+    
+    def _materialize_all(self):
+        """
+        Build every pending field.
+        """
+        # Holding the lock waits out fields other threads are building
+        with self._lock:
+            for key in list(self._builders):
+                self._materialize(key)
+    
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if value is _PENDING:
+            return self._materialize(key)
+        return value
+    
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._builders.pop(key, None)
+            dict.__setitem__(self, key, value)
+    
+    def __iter__(self):
+        # Overridden so dict(parsed) and {**parsed} go through __getitem__
+        return dict.__iter__(self)
+    
+    def __eq__(self, other):
+        self._materialize_all()
+        if isinstance(other, ParsedResponse):
+            other._materialize_all()
+        return dict.__eq__(self, other)
+    
+    def __ne__(self, other):
+        return not self == other
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        self._materialize_all()
+        return dict.__repr__(self)
+    
+    def __reduce__(self):
+        return (dict, (dict(self.items()),))
+    
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+    
+    def items(self):
+        self._materialize_all()
+        return dict.items(self)
+    
+    def values(self):
+        self._materialize_all()
+        return dict.values(self)
+    
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            dict.pop(self, key)
+            return value
+        return dict.pop(self, key, *default)
+    
+    def popitem(self):
+        self._materialize_all()
+        return dict.popitem(self)
+    
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        dict.__setitem__(self, key, default)
+        return default
+    
+    def copy(self):
+        return dict(self.items())
+    
+    def __or__(self, other):
+        merged = self.copy()
+        merged.update(other)
+        return merged
+    
+    def __ror__(self, other):
+        merged = dict(other)
+        merged.update(self.items())
+        return merged
+    
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+
 class ResponseProcessor:
     """
     Processes and structures LLM responses for the Psycho-Color Analysis system.
     """
     
+    # Section layouts as (key, start marker, end marker) tuples
+    COLOR_PREFERENCE_SECTIONS = (
+        ("personality_traits", "personality traits", "emotional tendencies"),
+        ("emotional_tendencies", "emotional tendencies", "behavioral patterns"),
+        ("behavioral_patterns", "behavioral patterns", "strengths"),
+        ("strengths", "strengths", "growth areas"),
+        ("growth_areas", "growth areas", "")
+    )
+    
+    JUNG_ENERGY_SECTIONS = (
+        ("communication_style", "Communication Style:", "Decision-making Approach:"),
+        ("decision_making", "Decision-making Approach:", "Relationship Dynamics:"),
+        ("relationship_dynamics", "Relationship Dynamics:", "Work Preferences:"),
+        ("work_preferences", "Work Preferences:", "Stress Responses:"),
+        ("stress_responses", "Stress Responses:", "")
+    )
+    
+    COMPREHENSIVE_PROFILE_SECTIONS = (
+        ("personality_overview", "## 1. Personality Overview", "## 2."),
+        ("jung_energy", "## 2. Jung Color Energy Distribution", "## 3."),
+        ("emotional_landscape", "## 3. Emotional Landscape", "## 4."),
+        ("interpersonal_dynamics", "## 4. Interpersonal Dynamics", "## 5."),
+        ("environmental_preferences", "## 5. Environmental Preferences", "## 6."),
+        ("growth_opportunities", "## 6. Growth Opportunities", "## 7."),
+        ("practical_applications", "## 7. Practical Applications", "")
+    )
+    
+    RECOMMENDATIONS_SECTIONS = (
+        ("work_environment", "## 1. Optimal Work Environment", "## 2."),
+        ("communication", "## 2. Communication Strategies", "## 3."),
+        ("decision_making", "## 3. Decision-Making Approaches", "## 4."),
+        ("stress_management", "## 4. Stress Management Techniques", "## 5."),
+        ("personal_development", "## 5. Personal Development Opportunities", "## 6."),
+        ("relationship_dynamics", "## 6. Relationship Dynamics", "## 7."),
+        ("daily_practices", "## 7. Daily Practices for Well-Being", "")
+    )
+    
+    WORK_ENVIRONMENT_SECTIONS = (
+        ("colors", "**Colors:**", "**Layout:**"),
+        ("layout", "**Layout:**", "**Lighting:**"),
+        ("lighting", "**Lighting:**", "")
+    )
+    
     def __init__(self):
         """
         Initialize the response processor.
         """
         pass
     
+    @traced("response_processor.process_color_preference_analysis")
     def process_color_preference_analysis(self, raw_response):
         """
         Process and structure the raw LLM response for color preference analysis.
@@ -24,27 +484,24 @@ class ResponseProcessor:
             raw_response (str): The raw response from the LLM
             
         Returns:
-            dict: Structured analysis results
+            ParsedResponse: Structured analysis results
         """
-        # Extract key sections from the response
-        personality_traits = self._extract_section(raw_response, "personality traits", "emotional tendencies")
-        emotional_tendencies = self._extract_section(raw_response, "emotional tendencies", "behavioral patterns")
-        behavioral_patterns = self._extract_section(raw_response, "behavioral patterns", "strengths")
-        strengths = self._extract_section(raw_response, "strengths", "growth areas")
-        growth_areas = self._extract_section(raw_response, "growth areas", "")
+        current_span().set_attribute("response_chars", len(raw_response))
         
-        # Create a structured dictionary
-        structured_response = {
-            "personality_traits": self._format_list(personality_traits),
-            "emotional_tendencies": self._format_list(emotional_tendencies),
-            "behavioral_patterns": self._format_list(behavioral_patterns),
-            "strengths": self._format_list(strengths),
-            "growth_areas": self._format_list(growth_areas),
-            "full_analysis": raw_response
-        }
+        # Index the key sections of the response
+        read = self._section_reader(raw_response, self.COLOR_PREFERENCE_SECTIONS)
         
-        return structured_response
+        # Create a structured result; sections are formatted on first access
+        return ParsedResponse(raw_response, {
+            "personality_traits": lambda: self._format_list(read("personality_traits")),
+            "emotional_tendencies": lambda: self._format_list(read("emotional_tendencies")),
+            "behavioral_patterns": lambda: self._format_list(read("behavioral_patterns")),
+            "strengths": lambda: self._format_list(read("strengths")),
+            "growth_areas": lambda: self._format_list(read("growth_areas")),
+            "full_analysis": raw_response
+        })
     
+    @traced("response_processor.process_jung_energy_analysis")
     def process_jung_energy_analysis(self, raw_response):
         """
         Process and structure the raw LLM response for Jung's Color Energy analysis.
@@ -53,35 +510,22 @@ class ResponseProcessor:
             raw_response (str): The raw response from the LLM
             
         Returns:
-            dict: Structured analysis results
-        """
-        # Extract primary and secondary color energies
-        primary_energy = self._extract_value(raw_response, "Primary Color Energy:", "\n")
-        secondary_energy = self._extract_value(raw_response, "Secondary Color Energy:", "\n")
-        
-        # Extract different aspects of the analysis
-        communication_style = self._extract_section(raw_response, "Communication Style:", "Decision-making Approach:")
-        decision_making = self._extract_section(raw_response, "Decision-making Approach:", "Relationship Dynamics:")
-        relationship_dynamics = self._extract_section(raw_response, "Relationship Dynamics:", "Work Preferences:")
-        work_preferences = self._extract_section(raw_response, "Work Preferences:", "Stress Responses:")
-        stress_responses = self._extract_section(raw_response, "Stress Responses:", "")
-        
-        # Create a structured dictionary
-        structured_response = {
-            "primary_energy": primary_energy,
-            "secondary_energy": secondary_energy,
-            "energy_distribution": {
-                "communication_style": communication_style,
-                "decision_making": decision_making,
-                "relationship_dynamics": relationship_dynamics,
-                "work_preferences": work_preferences,
-                "stress_responses": stress_responses
-            },
-            "full_analysis": raw_response
-        }
+            ParsedResponse: Structured analysis results
+        """
+        current_span().set_attribute("response_chars", len(raw_response))
         
-        return structured_response
+        # Index the different aspects of the analysis
+        read = self._section_reader(raw_response, self.JUNG_ENERGY_SECTIONS)
+        
+        # Create a structured result; sections are extracted on first access
+        return ParsedResponse(raw_response, {
+            "primary_energy": lambda: self._extract_value(raw_response, "Primary Color Energy:", "\n"),
+            "secondary_energy": lambda: self._extract_value(raw_response, "Secondary Color Energy:", "\n"),
+            "energy_distribution": lambda: {key: read(key) for key, _, _ in self.JUNG_ENERGY_SECTIONS},
+            "full_analysis": raw_response
+        })
     
+    @traced("response_processor.process_comprehensive_profile")
     def process_comprehensive_profile(self, raw_response):
         """
         Process and structure the raw LLM response for comprehensive profile analysis.
@@ -90,39 +534,35 @@ class ResponseProcessor:
             raw_response (str): The raw response from the LLM
             
         Returns:
-            dict: Structured comprehensive profile
-        """
-        # Extract different sections of the profile
-        personality_overview = self._extract_section(raw_response, "## 1. Personality Overview", "## 2.")
-        jung_energy = self._extract_section(raw_response, "## 2. Jung Color Energy Distribution", "## 3.")
-        emotional_landscape = self._extract_section(raw_response, "## 3. Emotional Landscape", "## 4.")
-        interpersonal_dynamics = self._extract_section(raw_response, "## 4. Interpersonal Dynamics", "## 5.")
-        environmental_preferences = self._extract_section(raw_response, "## 5. Environmental Preferences", "## 6.")
-        growth_opportunities = self._extract_section(raw_response, "## 6. Growth Opportunities", "## 7.")
-        practical_applications = self._extract_section(raw_response, "## 7. Practical Applications", "")
-        
-        # Extract primary and secondary energies from Jung energy section
-        primary_energy = self._extract_value(jung_energy, "Primary Energy:", "\n")
-        secondary_energy = self._extract_value(jung_energy, "Secondary Energy:", "\n")
-        
-        # Create a structured dictionary
-        structured_response = {
-            "personality_overview": personality_overview,
-            "jung_energy": {
-                "primary_energy": primary_energy,
-                "secondary_energy": secondary_energy,
-                "full_description": jung_energy
-            },
-            "emotional_landscape": emotional_landscape,
-            "interpersonal_dynamics": interpersonal_dynamics,
-            "environmental_preferences": environmental_preferences,
-            "growth_opportunities": growth_opportunities,
-            "practical_applications": practical_applications,
-            "full_profile": raw_response
-        }
+            ParsedResponse: Structured comprehensive profile
+        """
+        current_span().set_attribute("response_chars", len(raw_response))
         
-        return structured_response
+        # Index the different sections of the profile
+        read = self._section_reader(raw_response, self.COMPREHENSIVE_PROFILE_SECTIONS)
+        
+        def jung_energy():
+            # Extract primary and secondary energies from Jung energy section
+            description = read("jung_energy")
+            return {
+                "primary_energy": self._extract_value(description, "Primary Energy:", "\n"),
+                "secondary_energy": self._extract_value(description, "Secondary Energy:", "\n"),
+                "full_description": description
+            }
+        
+        # Create a structured result; sections are extracted on first access
+        return ParsedResponse(raw_response, {
+            "personality_overview": lambda: read("personality_overview"),
+            "jung_energy": jung_energy,
+            "emotional_landscape": lambda: read("emotional_landscape"),
+            "interpersonal_dynamics": lambda: read("interpersonal_dynamics"),
+            "environmental_preferences": lambda: read("environmental_preferences"),
+            "growth_opportunities": lambda: read("growth_opportunities"),
+            "practical_applications": lambda: read("practical_applications"),
+            "full_profile": raw_response
+        })
     
+    @traced("response_processor.process_recommendations")
     def process_recommendations(self, raw_response):
         """
         Process and structure the raw LLM response for recommendations.
@@ -131,37 +571,155 @@ class ResponseProcessor:
             raw_response (str): The raw response from the LLM
             
         Returns:
-            dict: Structured recommendations
-        """
-        # Extract different recommendation sections
-        work_environment = self._extract_section(raw_response, "## 1. Optimal Work Environment", "## 2.")
-        communication = self._extract_section(raw_response, "## 2. Communication Strategies", "## 3.")
-        decision_making = self._extract_section(raw_response, "## 3. Decision-Making Approaches", "## 4.")
-        stress_management = self._extract_section(raw_response, "## 4. Stress Management Techniques", "## 5.")
-        personal_development = self._extract_section(raw_response, "## 5. Personal Development Opportunities", "## 6.")
-        relationship_dynamics = self._extract_section(raw_response, "## 6. Relationship Dynamics", "## 7.")
-        daily_practices = self._extract_section(raw_response, "## 7. Daily Practices for Well-Being", "")
-        
-        # Extract color recommendations from work environment section
-        colors = self._extract_section(work_environment, "**Colors:**", "**Layout:**")
-        
-        # Create a structured dictionary
-        structured_response = {
-            "environment": {
-                "colors": colors,
-                "layout": self._extract_section(work_environment, "**Layout:**", "**Lighting:**"),
-                "lighting": self._extract_section(work_environment, "**Lighting:**", "")
-            },
-            "communication_strategies": self._format_list(communication),
-            "decision_making_approaches": self._format_list(decision_making),
-            "stress_management": self._format_list(stress_management),
-            "personal_development": self._format_list(personal_development),
-            "relationship_dynamics": self._format_list(relationship_dynamics),
-            "daily_practices": self._format_list(daily_practices),
+            ParsedResponse: Structured recommendations
+        """
+        current_span().set_attribute("response_chars", len(raw_response))
+        
+        # Index the different recommendation sections
+        read = self._section_reader(raw_response, self.RECOMMENDATIONS_SECTIONS)
+        
+        # Create a structured result; sections are formatted on first access
+        return ParsedResponse(raw_response, {
+            "environment": lambda: self._extract_sections(read("work_environment"), self.WORK_ENVIRONMENT_SECTIONS),
+            "communication_strategies": lambda: self._format_list(read("communication")),
+            "decision_making_approaches": lambda: self._format_list(read("decision_making")),
+            "stress_management": lambda: self._format_list(read("stress_management")),
+            "personal_development": lambda: self._format_list(read("personal_development")),
+            "relationship_dynamics": lambda: self._format_list(read("relationship_dynamics")),
+            "daily_practices": lambda: self._format_list(read("daily_practices")),
             "full_recommendations": raw_response
-        }
+        })
+    
+    def section_bounds(self, raw_response, layout):
+        """
+        Locate every section of a layout in a response.
+        
+        Args:
+            raw_response (str): The raw response from the LLM
+            layout (tuple): Section layout as (key, start marker, end marker) tuples
+            
+        Returns:
+            dict: (start, end) offsets of each section keyed by section key
+        """
+        index = SectionIndex(raw_response, [marker for _, start, end in layout for marker in (start, end)])
+        return {key: index.bounds(start, end) for key, start, end in layout}
+    
+    def find_missing_sections(self, raw_response, layout):
+        """
+        Find the sections of a layout that are missing or empty in a response.
+        
+        Args:
+            raw_response (str): The raw response from the LLM
+            layout (tuple): Section layout as (key, start marker, end marker) tuples
+            
+        Returns:
+            list: Keys of the missing sections, in layout order
+        """
+        sections = self._extract_sections(raw_response, layout)
+        return [key for key, _, _ in layout if not sections[key]]
+    
+    def merge_sections(self, raw_response, repair_response, layout):
+        """
+        Fill the missing sections of a response from a follow-up response.
+        
+        The merged response keeps any text before the first section and
+        lists every section under its heading in layout order, taking each
+        section from the original response where it is present and from the
+        follow-up otherwise.
+        
+        Args:
+            raw_response (str): The original, incomplete response
+            repair_response (str): Response to a follow-up asking for the
+                missing sections
+            layout (tuple): Section layout as (key, start marker, end marker) tuples
+            
+        Returns:
+            str: The merged response
+        """
+        original = self._extract_sections(raw_response, layout)
+        repaired = self._extract_sections(repair_response, layout)
+        
+        index = SectionIndex(raw_response, [start for _, start, _ in layout])
+        found = [index.find(start) for _, start, _ in layout]
+        preamble = raw_response[:min([p for p in found if p >= 0] or [len(raw_response)])].strip()
+        
+        parts = [preamble] if preamble else []
+        for key, start, _ in layout:
+            parts.append(f"{start}\n\n{original[key] or repaired[key]}")
+        return "\n\n".join(parts) + "\n"
+    
+    def split_user_responses(self, raw_response, user_ids):
+        """
+        Split a multi-user response into each user's part.
+        
+        Each user's part must be delimited by "=== USER <id> ===" and
+        "=== END USER <id> ===" lines. Users whose part is missing or
+        unterminated (for example because the response was truncated) are
+        left out of the result.
+        
+        Args:
+            raw_response (str): The raw multi-user response from the LLM
+            user_ids (list): IDs of the users in the prompt
+            
+        Returns:
+            dict: User ID -> that user's part of the response
+        """
+        bounds = [(user_id, f"=== USER {user_id} ===", f"=== END USER {user_id} ===") for user_id in user_ids]
+        index = SectionIndex(raw_response, [marker for _, start, end in bounds for marker in (start, end)])
+        
+        parts = {}
+        for user_id, start_marker, end_marker in bounds:
+            start_idx = index.find(start_marker)
+            if start_idx < 0:
+                continue
+            start_idx += len(start_marker)
+            end_idx = index.find(end_marker, start_idx)
+            if end_idx >= 0:
+                parts[user_id] = raw_response[start_idx:end_idx].strip()
+        return parts
+    
+    def stream_sections(self, layout):
+        """
+        Create an incremental parser for a streamed response.
+        
+        Args:
+            layout (tuple): Section layout as (key, start marker, end marker) tuples,
+                e.g. COMPREHENSIVE_PROFILE_SECTIONS
+                
+        Returns:
+            StreamingSectionParser: Parser that reports sections as they complete
+        """
+        return StreamingSectionParser(layout)
+    
+    def _section_reader(self, text, layout):
+        """
+        Index a text once and return a function that reads sections by key.
+        
+        Args:
+            text (str): The text to index
+            layout (tuple): Section layout as (key, start marker, end marker) tuples
+            
+        Returns:
+            callable: Function mapping a section key to the extracted section
+        """
+        markers = [marker for _, start, end in layout for marker in (start, end)]
+        index = SectionIndex(text, markers)
+        bounds = {key: (start, end) for key, start, end in layout}
+        return lambda key: index.section(*bounds[key])
+    
+    def _extract_sections(self, text, layout):
+        """
+        Extract every section of a layout using a single index of the text.
         
-        return structured_response
+        Args:
+            text (str): The text to extract from
+            layout (tuple): Section layout as (key, start marker, end marker) tuples
+            
+        Returns:
+            dict: Extracted sections keyed by section key
+        """
+        read = self._section_reader(text, layout)
+        return {key: read(key) for key, _, _ in layout}
     
     def _extract_section(self, text, start_marker, end_marker):
         """
@@ -175,20 +733,7 @@ class ResponseProcessor:
         Returns:
             str: The extracted section
         """
-        try:
-            start_idx = text.lower().index(start_marker.lower())
-            start_idx = start_idx + len(start_marker)
-            
-            if end_marker:
-                try:
-                    end_idx = text.lower().index(end_marker.lower(), start_idx)
-                    return text[start_idx:end_idx].strip()
-                except ValueError:
-                    return text[start_idx:].strip()
-            else:
-                return text[start_idx:].strip()
-        except ValueError:
-            return ""
+        return SectionIndex(text, (start_marker, end_marker)).section(start_marker, end_marker)
     
     def _extract_value(self, text, label, delimiter):
         """
@@ -0,0 +1,137 @@
+"""
+Model Routing Module for Psycho-Color Analysis System
+
+This module chooses the model for each type of LLM call. Each call type
+has its own list of model tiers, most capable first, so short outputs
+such as recommendation lists can go to a faster model than the
+comprehensive profile. When a call has a latency budget, the router
+downgrades to the first tier expected to answer within it, using a
+moving average of the latencies observed for each model.
+
+Routing is opt-in: without a router every call uses the client's model.
+Services enable it with the MODEL_ROUTES environment variable, read by
+ModelRouter.from_environment.
+"""
+
+import os
+import json
+import threading
+
+# LLM call types made by the framework
+COLOR_PREFERENCE = "color_preference"
+JUNG_ENERGY = "jung_energy"
+COMPREHENSIVE_PROFILE = "comprehensive_profile"
+RECOMMENDATIONS = "recommendations"
+
+CALL_TYPES = (COLOR_PREFERENCE, JUNG_ENERGY, COMPREHENSIVE_PROFILE, RECOMMENDATIONS)
+
+class ModelRouter:
+    """
+    Routes each LLM call type to a model tier within a latency budget.
+    """
+    
+    # Weight of each new observation in the latency moving average
+    SMOOTHING = 0.2
+    
+    def __init__(self, routes, expected_latency=None):
+        """
+        Initialize the router.
+        
+        Args:
+            routes (dict): Call type -> list of models in order of preference.
+                Call types without a route use the first route's models.
+            expected_latency (dict, optional): Model -> initial latency
+                estimate in seconds, refined as calls complete. Models
+                without an estimate are assumed to fit any budget until
+                their first call completes.
+        """
+        if not routes or not all(routes.values()):
+            raise ValueError("Every route needs at least one model")
+        
+        self.routes = {call_type: list(models) for call_type, models in routes.items()}
+        self._default = next(iter(self.routes.values()))
+        self._latency = dict(expected_latency or {})
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def single_model(cls, model):
+        """
+        Create a router that sends every call type to one model.
+        
+        Args:
+            model (str): The model to use
+            
+        Returns:
+            ModelRouter: The router
+        """
+        return cls({call_type: [model] for call_type in CALL_TYPES})
+    
+    @classmethod
+    def from_environment(cls):
+        """
+        Create a router configured by environment variables.
+        
+        MODEL_ROUTES holds a JSON object of call type -> list of models, and
+        the optional MODEL_EXPECTED_LATENCY a JSON object of model ->
+        initial latency estimate in seconds.
+        
+        Returns:
+            ModelRouter: The configured router, or None if MODEL_ROUTES is
+                not set
+        """
+        routes = os.environ.get("MODEL_ROUTES")
+        if not routes:
+            return None
+        
+        expected_latency = os.environ.get("MODEL_EXPECTED_LATENCY")
+        return cls(json.loads(routes), json.loads(expected_latency) if expected_latency else None)
+    
+    def route(self, call_type, latency_budget=None):
+        """
+        Choose the model for a call.
+        
+        Args:
+            call_type (str): Type of the call, e.g. RECOMMENDATIONS
+            latency_budget (float, optional): Seconds the call may take
+            
+        Returns:
+            str: The most preferred model expected to fit the budget, or the
+                fastest model for the call type if none is
+        """
+        models = self.routes.get(call_type, self._default)
+        if latency_budget is None:
+            return models[0]
+        
+        with self._lock:
+            for model in models:
+                if self._latency.get(model, 0.0) <= latency_budget:
+                    return model
+            return min(models, key=lambda model: self._latency.get(model, float("inf")))
+    
+    def record(self, model, seconds):
+        """
+        Record the observed latency of a completed call.
+        
+        Args:
+            model (str): The model that served the call
+            seconds (float): How long the call took
+        """
+        with self._lock:
+            previous = self._latency.get(model)
+            if previous is None:
+                self._latency[model] = seconds
+            else:
+                self._latency[model] = previous + self.SMOOTHING * (seconds - previous)
+    
+    def expected_latency(self, model):
+        """
+        Get the current latency estimate for a model.
+        
+        Args:
+            model (str): The model
+            
+        Returns:
+            float: Estimated seconds per call, or None if unknown
+        """
+        with self._lock:
+            return self._latency.get(model)
@@ -0,0 +1,206 @@
+"""
+LLM Scheduling Module for Psycho-Color Analysis System
+
+This module schedules LLM calls between priority classes so that bulk
+traffic (re-generation, backfills) cannot starve interactive user
+requests of LLM capacity.
+
+Each class has a weight and a number of reserved concurrency slots. When
+classes compete for free slots, slots are granted by weighted fair
+queuing, so each class with waiting calls receives capacity in
+proportion to its weight. A class's reserved slots are never given to
+another class, so interactive requests always find capacity even while a
+backfill saturates the rest.
+
+The class of a call is taken from the calling context:
+    
+    with llm_priority(BATCH):
+        profile_generator.generate_profile(analysis_results)
+"""
+
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+_current_priority = ContextVar("llm_priority", default=INTERACTIVE)
+
+@contextmanager
+def llm_priority(priority_class):
+    """
+    Run LLM calls made in this context under a priority class.
+    
+    Args:
+        priority_class (str): Priority class name, e.g. INTERACTIVE or BATCH
+    """
+    token = _current_priority.set(priority_class)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+def current_priority():
+    """
+    Get the priority class of the calling context.
+    
+    Returns:
+        str: The priority class name; INTERACTIVE unless set otherwise
+    """
+    return _current_priority.get()
+
+class PriorityScheduler:
+    """
+    Concurrency limiter with weighted fair queuing between priority classes.
+    """
+    
+    def __init__(self, capacity, classes=None):
+        """
+        Initialize the scheduler.
+        
+        Args:
+            capacity (int): Maximum number of concurrent calls across all classes
+            classes (dict, optional): Priority class name -> {"weight": int,
+                "reserved": int}. Defaults to interactive traffic with weight
+                4 and a quarter of the capacity reserved, at least one slot
+                but never every slot, and batch traffic with weight 1 and no
+                reservation.
+        """
+        if classes is None:
+            classes = {
+                INTERACTIVE: {"weight": 4, "reserved": min(max(1, capacity // 4), capacity - 1)},
+                BATCH: {"weight": 1, "reserved": 0}
+            }
+        
+        if sum(config.get("reserved", 0) for config in classes.values()) > capacity:
+            raise ValueError("Reserved slots exceed scheduler capacity")
+        
+        self.capacity = capacity
+        self.weights = {name: config.get("weight", 1) for name, config in classes.items()}
+        self.reserved = {name: config.get("reserved", 0) for name, config in classes.items()}
+        
+        self._lock = threading.Condition()
+        self._running = {name: 0 for name in classes}
+        self._waiting = {name: deque() for name in classes}
+        self._virtual_time = {name: 0.0 for name in classes}
+    
+    @contextmanager
+    def slot(self, priority_class=None):
+        """
+        Hold a concurrency slot for the duration of the context.
+        
+        Args:
+            priority_class (str, optional): Priority class of the call;
+                defaults to the class of the calling context
+        """
+        priority_class = priority_class or current_priority()
+        self.acquire(priority_class)
+        try:
+            yield
+        finally:
+            self.release(priority_class)
+    
+    def acquire(self, priority_class):
+        """
+        Wait for a concurrency slot.
+        
+        If the wait is interrupted, the call gives up its place in the queue,
+        or the slot if it was granted in the meantime.
+        
+        Args:
+            priority_class (str): Priority class of the call
+        """
+        if priority_class not in self._waiting:
+            raise ValueError(f"Unknown priority class: {priority_class}")
+        
+        ticket = [False]
+        with self._lock:
+            # A class returning from idle starts level with the active
+            # classes rather than spending credit saved while idle
+            if not self._waiting[priority_class] and not self._running[priority_class]:
+                active = [self._virtual_time[name] for name in self._waiting
+                          if self._waiting[name] or self._running[name]]
+                if active:
+                    self._virtual_time[priority_class] = max(self._virtual_time[priority_class], min(active))
+            
+            self._waiting[priority_class].append(ticket)
+            self._dispatch()
+            try:
+                while not ticket[0]:
+                    self._lock.wait()
+            except BaseException:
+                if ticket[0]:
+                    self._running[priority_class] -= 1
+                    self._dispatch()
+                else:
+                    waiting = self._waiting[priority_class]
+                    del waiting[next(index for index, other in enumerate(waiting) if other is ticket)]
+                raise
+    
+    def release(self, priority_class):
+        """
+        Return a concurrency slot.
+        
+        Args:
+            priority_class (str): Priority class of the call
+        """
+        with self._lock:
+            self._running[priority_class] -= 1
+            self._dispatch()
+    
+    def stats(self):
+        """
+        Get the running and waiting call counts per class.
+        
+        Returns:
+            dict: Priority class name -> {"running": int, "waiting": int}
+        """
+        with self._lock:
+            return {
+                name: {"running": self._running[name], "waiting": len(self._waiting[name])}
+                for name in self._waiting
+            }
+    
+    def _admissible(self, priority_class):
+        """
+        Check whether a class may take a free slot without using another
+        class's reservation. Must be called with the lock held.
+        
+        Args:
+            priority_class (str): Priority class name
+            
+        Returns:
+            bool: True if a slot may be granted to the class
+        """
+        free = self.capacity - sum(self._running.values())
+        if free <= 0:
+            return False
+        if self._running[priority_class] < self.reserved[priority_class]:
+            return True
+        
+        held_back = sum(max(0, self.reserved[name] - self._running[name])
+                        for name in self._running if name != priority_class)
+        return free > held_back
+    
+    def _dispatch(self):
+        """
+        Grant free slots to waiting calls, lowest virtual time first. Must be
+        called with the lock held.
+        """
+        granted = False
+        while True:
+            candidates = [name for name in self._waiting
+                          if self._waiting[name] and self._admissible(name)]
+            if not candidates:
+                break
+            
+            name = min(candidates, key=lambda candidate: self._virtual_time[candidate])
+            self._waiting[name].popleft()[0] = True
+            self._running[name] += 1
+            self._virtual_time[name] += 1.0 / self.weights[name]
+            granted = True
+        
+        if granted:
+            self._lock.notify_all()
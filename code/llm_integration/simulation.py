@@ -0,0 +1,242 @@
+"""
+Simulation Module for Psycho-Color Analysis System
+
+This module simulates an LLM provider for development and load testing
+without network access. The simulated provider delivers the responses
+written by LLMIntegration's simulator with the behavior of a real service:
+a time to first token, a token rate, occasional very slow responses, error
+and rate limit responses, and variation in response length. Every aspect
+is configurable, and the default provider responds instantly and never
+fails.
+
+Named latency profiles can be selected for a whole process through the
+LLM_SIMULATION environment variable, e.g. LLM_SIMULATION=typical, with
+LLM_SIMULATION_ERROR_RATE and LLM_SIMULATION_RATE_LIMIT_RATE adding
+failures.
+"""
+
+import os
+import math
+import time
+import random
+import re
+import threading
+from .errors import LLMServiceError, LLMRateLimitError, LLMTimeoutError
+
+# Named latency profiles; values in seconds and tokens per second
+LATENCY_PROFILES = {
+    "instant": {},
+    "fast": {"time_to_first_token": 0.2, "tokens_per_second": 150.0, "tail_probability": 0.01},
+    "typical": {"time_to_first_token": 0.6, "tokens_per_second": 40.0, "tail_probability": 0.02},
+    "slow": {"time_to_first_token": 2.0, "tokens_per_second": 15.0, "tail_probability": 0.05}
+}
+
+_TOKEN_PATTERN = re.compile(r"\s*\S+")
+
+class SimulatedProvider:
+    """
+    Simulated LLM service with configurable latency, failures and response sizes.
+    """
+    
+    def __init__(self, time_to_first_token=0.0, jitter=0.5, tokens_per_second=None, tail_probability=0.0,
+                 tail_alpha=1.5, error_rate=0.0, rate_limit_rate=0.0, retry_after=1.0, size_variation=0.0,
+                 timeout=None, seed=None, sleep=time.sleep):
+        """
+        Initialize the simulated provider.
+        
+        Args:
+            time_to_first_token (float, optional): Median seconds before the first token
+            jitter (float, optional): Spread of the time to first token, as
+                the sigma of a log-normal distribution around the median
+            tokens_per_second (float, optional): Token rate after the first
+                token; tokens arrive with no delay if not provided
+            tail_probability (float, optional): Probability that a response is
+                slowed down by a heavy-tailed factor
+            tail_alpha (float, optional): Shape of the Pareto distribution of
+                the slowdown factor; smaller values give heavier tails
+            error_rate (float, optional): Probability of a 500 error response
+            rate_limit_rate (float, optional): Probability of a 429 response
+            retry_after (float, optional): Retry-After seconds of 429 responses
+            size_variation (float, optional): Maximum relative change in
+                response length; shorter responses are cut off, as when the
+                token limit is reached, and longer ones repeat content lines
+            timeout (float, optional): Seconds after which a call fails with
+                LLMTimeoutError, like a client read timeout
+            seed (int, optional): Seed making the simulated behavior reproducible
+            sleep (callable, optional): Function used to wait
+        """
+        self.time_to_first_token = time_to_first_token
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.tail_probability = tail_probability
+        self.tail_alpha = tail_alpha
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.size_variation = size_variation
+        self.timeout = timeout
+        self.sleep = sleep
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_profile(cls, name, **overrides):
+        """
+        Create a provider from a named latency profile.
+        
+        Args:
+            name (str): Name of a profile in LATENCY_PROFILES
+            **overrides: Constructor arguments replacing the profile's values
+            
+        Returns:
+            SimulatedProvider: The provider
+        """
+        if name not in LATENCY_PROFILES:
+            raise ValueError(f"Unknown latency profile: {name}")
+        return cls(**{**LATENCY_PROFILES[name], **overrides})
+    
+    @classmethod
+    def from_environment(cls):
+        """
+        Create a provider configured by environment variables.
+        
+        Returns:
+            SimulatedProvider: The provider for LLM_SIMULATION, or an instant
+                provider if it is not set
+        """
+        return cls.from_profile(
+            os.environ.get("LLM_SIMULATION", "instant"),
+            error_rate=float(os.environ.get("LLM_SIMULATION_ERROR_RATE", 0)),
+            rate_limit_rate=float(os.environ.get("LLM_SIMULATION_RATE_LIMIT_RATE", 0))
+        )
+    
+    def complete(self, prompt, respond):
+        """
+        Simulate a completion call.
+        
+        Args:
+            prompt (str): The prompt sent to the LLM
+            respond (callable): Function producing the full response for a prompt
+            
+        Returns:
+            str: The response
+        """
+        tokens, first_token_delay, token_delay = self._plan(prompt, respond)
+        self._wait(first_token_delay + token_delay * (len(tokens) - 1))
+        return "".join(tokens)
+    
+    def stream(self, prompt, respond):
+        """
+        Simulate a streaming call.
+        
+        Args:
+            prompt (str): The prompt sent to the LLM
+            respond (callable): Function producing the full response for a prompt
+            
+        Yields:
+            str: Tokens of the response as they arrive
+        """
+        tokens, first_token_delay, token_delay = self._plan(prompt, respond)
+        self._wait(first_token_delay)
+        elapsed = first_token_delay
+        for index, token in enumerate(tokens):
+            if index and token_delay:
+                self._check_timeout(elapsed + token_delay, elapsed)
+                self.sleep(token_delay)
+                elapsed += token_delay
+            yield token
+    
+    def _plan(self, prompt, respond):
+        """
+        Decide how a call behaves, raising its error if it fails.
+        
+        Args:
+            prompt (str): The prompt sent to the LLM
+            respond (callable): Function producing the full response for a prompt
+            
+        Returns:
+            tuple: (response tokens, seconds before the first token, seconds
+                between tokens)
+        """
+        with self._lock:
+            outcome = self._random.random()
+            first_token_delay = self._sample_first_token_delay()
+            size_factor = 1.0 + self._random.uniform(-self.size_variation, self.size_variation)
+            seed = self._random.random()
+        
+        if outcome < self.rate_limit_rate:
+            self.sleep(first_token_delay / 2)
+            raise LLMRateLimitError("Simulated rate limit exceeded", retry_after=self.retry_after)
+        if outcome < self.rate_limit_rate + self.error_rate:
+            self.sleep(first_token_delay / 2)
+            raise LLMServiceError("Simulated service error", status_code=500)
+        
+        tokens = _TOKEN_PATTERN.findall(respond(prompt))
+        if size_factor != 1.0:
+            tokens = _resize(tokens, size_factor, random.Random(seed))
+        
+        token_delay = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        return tokens, first_token_delay, token_delay
+    
+    def _sample_first_token_delay(self):
+        """
+        Sample the time to first token; the caller holds the lock.
+        
+        Returns:
+            float: Seconds before the first token
+        """
+        if not self.time_to_first_token:
+            return 0.0
+        delay = self.time_to_first_token * math.exp(self._random.gauss(0.0, self.jitter))
+        if self._random.random() < self.tail_probability:
+            delay *= self._random.paretovariate(self.tail_alpha)
+        return delay
+    
+    def _wait(self, seconds):
+        """
+        Wait for simulated latency, failing if it exceeds the timeout.
+        
+        Args:
+            seconds (float): Seconds to wait
+        """
+        self._check_timeout(seconds)
+        if seconds:
+            self.sleep(seconds)
+    
+    def _check_timeout(self, elapsed, waited=0.0):
+        """
+        Fail if a call would take longer than the timeout, after waiting it out.
+        
+        Args:
+            elapsed (float): Seconds the call would have taken
+            waited (float, optional): Seconds already waited
+        """
+        if self.timeout is not None and elapsed > self.timeout:
+            self.sleep(self.timeout - waited)
+            raise LLMTimeoutError(f"Simulated call timed out after {self.timeout} seconds")
+
+def _resize(tokens, factor, rng):
+    """
+    Change the length of a response.
+    
+    Args:
+        tokens (list): Tokens of the response
+        factor (float): Relative length of the result
+        rng (random.Random): Random source
+        
+    Returns:
+        list: Tokens of the resized response
+    """
+    target = max(1, int(len(tokens) * factor))
+    if target <= len(tokens):
+        return tokens[:target]
+    
+    # Repeat whole content lines so section headings stay intact
+    lines = [line for line in "".join(tokens).split("\n") if line.strip() and not line.lstrip().startswith(("#", "**"))]
+    if not lines:
+        return tokens
+    
+    resized = list(tokens)
+    while len(resized) < target:
+        resized.extend(_TOKEN_PATTERN.findall("\n" + rng.choice(lines)))
+    return resized
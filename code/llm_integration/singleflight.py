@@ -0,0 +1,86 @@
+"""
+Request Coalescing Module for Psycho-Color Analysis System
+
+This module coalesces identical concurrent calls so that the work,
+including any LLM calls, runs once and its result is shared by every
+caller waiting on the same key.
+"""
+
+import threading
+
+class _Call:
+    """
+    An in-progress call and the callers waiting on it.
+    """
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time, fanning the result out to
+    every concurrent caller with the same key.
+    """
+    
+    def __init__(self):
+        """
+        Initialize the call group.
+        """
+        self._lock = threading.Lock()
+        self._calls = {}
+    
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Call a function, or wait for an identical call already in progress.
+        
+        Args:
+            key (hashable): Key identifying identical calls
+            fn (callable): Function to call
+            *args: Positional arguments for the function
+            **kwargs: Keyword arguments for the function
+            
+        Returns:
+            tuple: (result, shared) where shared is True if the result was
+                delivered to more than one caller. Callers receiving a shared
+                mutable result should copy it before modifying it.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                shared = call.waiters > 0
+            call.done.set()
+        
+        return call.result, shared
+    
+    def in_flight(self):
+        """
+        Get the number of keys with a call in progress.
+        
+        Returns:
+            int: Number of in-progress calls
+        """
+        with self._lock:
+            return len(self._calls)
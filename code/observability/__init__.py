@@ -0,0 +1,45 @@
+"""
+__init__.py file for the Observability package
+
+This file makes the Observability components available as a package.
+"""
+
+from .tracing import (
+    Span,
+    SpanSink,
+    InMemorySink,
+    OpenTelemetrySink,
+    span,
+    traced,
+    current_span,
+    set_sink,
+    get_sink
+)
+from .metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    REGISTRY,
+    render_metrics
+)
+from .profiling import SamplingProfiler
+
+__all__ = [
+    'Span',
+    'SpanSink',
+    'InMemorySink',
+    'OpenTelemetrySink',
+    'span',
+    'traced',
+    'current_span',
+    'set_sink',
+    'get_sink',
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'MetricsRegistry',
+    'REGISTRY',
+    'render_metrics',
+    'SamplingProfiler'
+]
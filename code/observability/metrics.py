@@ -0,0 +1,508 @@
+"""
+Metrics Module for Psycho-Color Analysis System
+
+This module keeps counters, gauges and latency histograms for the analysis
+pipeline and renders them in the Prometheus text exposition format, served
+by the HTTP server at /metrics or returned by render_metrics.
+
+Histograms record values in log-linear buckets in the manner of HDR
+histograms: every power of two is split into a fixed number of
+sub-buckets, so percentiles are accurate to a fixed relative error (about
+3% with the default 32 sub-buckets) over any range of values, in bounded
+memory. The Prometheus output aggregates them into a fixed set of
+cumulative buckets.
+
+Values that are only known at scrape time, such as queue depths, are
+filled in by collectors: functions registered under a key that the
+registry runs before rendering.
+"""
+
+import math
+import threading
+
+# Cumulative bucket bounds exported for latency histograms, in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _format_value(value):
+    """
+    Format a sample value for the exposition format.
+    
+    Args:
+        value (float): The value
+        
+    Returns:
+        str: The formatted value
+    """
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+def _format_labels(labelnames, values, extra=None):
+    """
+    Format a label set for the exposition format.
+    
+    Args:
+        labelnames (tuple): Label names
+        values (tuple): Label values in the same order
+        extra (tuple, optional): Additional (name, value) label
+        
+    Returns:
+        str: The label set in braces, or an empty string if there are no labels
+    """
+    pairs = list(zip(labelnames, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _escape(value):
+    """
+    Escape a label value for the exposition format.
+    
+    Args:
+        value (str): The label value
+        
+    Returns:
+        str: The value with backslashes, quotes and newlines escaped
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class _Metric:
+    """
+    Base class of metrics with optional labels.
+    """
+    
+    kind = None
+    
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        Initialize the metric.
+        
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple, optional): Names of the labels
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def _key(self, labels):
+        """
+        Get the key of a label set.
+        
+        Args:
+            labels (dict): Label names and values
+            
+        Returns:
+            tuple: Label values in label name order
+        """
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    def render(self):
+        """
+        Render the metric in the exposition format.
+        
+        Returns:
+            list: Lines of the metric
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_samples(key, value))
+        return lines
+    
+    def _render_samples(self, key, value):
+        """
+        Render the samples of one label set.
+        
+        Args:
+            key (tuple): Label values
+            value: Stored value
+            
+        Returns:
+            list: Sample lines
+        """
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+class Counter(_Metric):
+    """
+    Monotonically increasing count.
+    """
+    
+    kind = "counter"
+    
+    def inc(self, amount=1, **labels):
+        """
+        Increase the counter.
+        
+        Args:
+            amount (float, optional): Non-negative amount to add
+            **labels: Label values
+        """
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def value(self, **labels):
+        """
+        Get the current count.
+        
+        Args:
+            **labels: Label values
+            
+        Returns:
+            float: The count
+        """
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down.
+    """
+    
+    kind = "gauge"
+    
+    def set(self, value, **labels):
+        """
+        Set the gauge.
+        
+        Args:
+            value (float): The value
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+    
+    def inc(self, amount=1, **labels):
+        """
+        Increase the gauge.
+        
+        Args:
+            amount (float, optional): Amount to add
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def dec(self, amount=1, **labels):
+        """
+        Decrease the gauge.
+        
+        Args:
+            amount (float, optional): Amount to subtract
+            **labels: Label values
+        """
+        self.inc(-amount, **labels)
+    
+    def value(self, **labels):
+        """
+        Get the current value.
+        
+        Args:
+            **labels: Label values
+            
+        Returns:
+            float: The value
+        """
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+class _HistogramData:
+    """
+    Log-linear bucket counts of one label set.
+    """
+    
+    __slots__ = ("buckets", "count", "sum", "min", "max")
+    
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+class Histogram(_Metric):
+    """
+    Distribution of values, such as latencies, with fixed relative precision.
+    """
+    
+    kind = "histogram"
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, sub_buckets=32):
+        """
+        Initialize the histogram.
+        
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple, optional): Names of the labels
+            buckets (tuple, optional): Upper bounds of the exported cumulative buckets
+            sub_buckets (int, optional): Buckets per power of two; the
+                relative error of percentiles is at most 1 / sub_buckets
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.sub_buckets = sub_buckets
+    
+    def _index(self, value):
+        """
+        Get the log-linear bucket of a value.
+        
+        Args:
+            value (float): The value
+            
+        Returns:
+            int: Bucket index, or None for values at or below zero
+        """
+        if value <= 0:
+            return None
+        mantissa, exponent = math.frexp(value)
+        return exponent * self.sub_buckets + int((mantissa - 0.5) * 2 * self.sub_buckets)
+    
+    def _upper_bound(self, index):
+        """
+        Get the upper bound of a log-linear bucket.
+        
+        Args:
+            index (int): Bucket index, or None for the zero bucket
+            
+        Returns:
+            float: Largest value in the bucket
+        """
+        if index is None:
+            return 0.0
+        exponent, sub_bucket = divmod(index, self.sub_buckets)
+        return math.ldexp(0.5 + (sub_bucket + 1) / (2 * self.sub_buckets), exponent)
+    
+    def observe(self, value, **labels):
+        """
+        Record a value.
+        
+        Args:
+            value (float): The value, e.g. seconds taken
+            **labels: Label values
+        """
+        key = self._key(labels)
+        index = self._index(value)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = _HistogramData()
+            data.buckets[index] = data.buckets.get(index, 0) + 1
+            data.count += 1
+            data.sum += value
+            if value < data.min:
+                data.min = value
+            if value > data.max:
+                data.max = value
+    
+    def count(self, **labels):
+        """
+        Get the number of recorded values.
+        
+        Args:
+            **labels: Label values
+            
+        Returns:
+            int: The count
+        """
+        with self._lock:
+            data = self._values.get(self._key(labels))
+            return data.count if data is not None else 0
+    
+    def percentile(self, pct, **labels):
+        """
+        Get a percentile of the recorded values.
+        
+        Args:
+            pct (float): Percentile between 0 and 100
+            **labels: Label values
+            
+        Returns:
+            float: Upper bound of the bucket holding the percentile, limited
+                to the range of recorded values, or None if there are none
+        """
+        with self._lock:
+            data = self._values.get(self._key(labels))
+            if data is None:
+                return None
+            rank = max(1, math.ceil(data.count * pct / 100))
+            seen = 0
+            for index in sorted(data.buckets, key=lambda index: -1 if index is None else index):
+                seen += data.buckets[index]
+                if seen >= rank:
+                    return min(max(self._upper_bound(index), data.min), data.max)
+    
+    def _render_samples(self, key, data):
+        lines = []
+        cumulative = 0
+        indexes = sorted(data.buckets, key=lambda index: -1 if index is None else index)
+        position = 0
+        for bound in self.buckets + (math.inf,):
+            while position < len(indexes) and self._upper_bound(indexes[position]) <= bound:
+                cumulative += data.buckets[indexes[position]]
+                position += 1
+            if bound == math.inf:
+                cumulative = data.count
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(float(bound))))} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(data.sum)}")
+        lines.append(f"{self.name}_count{labels} {data.count}")
+        return lines
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together.
+    """
+    
+    def __init__(self):
+        """
+        Initialize the registry.
+        """
+        self._metrics = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+    
+    def _get_or_create(self, metric_class, name, documentation, labelnames, **options):
+        """
+        Get a registered metric, creating it on first use.
+        
+        Args:
+            metric_class (type): Counter, Gauge or Histogram
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple): Names of the labels
+            **options: Further arguments of the metric class
+            
+        Returns:
+            _Metric: The metric
+        """
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, documentation, labelnames, **options)
+            elif not isinstance(metric, metric_class) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with another type or labels")
+            return metric
+    
+    def counter(self, name, documentation, labelnames=()):
+        """
+        Get or create a counter.
+        
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple, optional): Names of the labels
+            
+        Returns:
+            Counter: The counter
+        """
+        return self._get_or_create(Counter, name, documentation, labelnames)
+    
+    def gauge(self, name, documentation, labelnames=()):
+        """
+        Get or create a gauge.
+        
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple, optional): Names of the labels
+            
+        Returns:
+            Gauge: The gauge
+        """
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+    
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """
+        Get or create a histogram.
+        
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple, optional): Names of the labels
+            buckets (tuple, optional): Upper bounds of the exported cumulative buckets
+            
+        Returns:
+            Histogram: The histogram
+        """
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+    
+    def register_collector(self, key, collector):
+        """
+        Register a function updating metrics before each render.
+        
+        Args:
+            key (hashable): Key of the collector; a collector registered
+                under the same key is replaced
+            collector (callable): Zero-argument function
+        """
+        with self._lock:
+            self._collectors[key] = collector
+    
+    def unregister_collector(self, key):
+        """
+        Remove a collector.
+        
+        Args:
+            key (hashable): Key the collector was registered under
+        """
+        with self._lock:
+            self._collectors.pop(key, None)
+    
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+        
+        Returns:
+            str: The exposition
+        """
+        with self._lock:
+            collectors = list(self._collectors.values())
+            metrics = sorted(self._metrics.items())
+        
+        for collector in collectors:
+            collector()
+        
+        lines = []
+        for _, metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Registry used by the pipeline's instrumentation
+REGISTRY = MetricsRegistry()
+
+def render_metrics():
+    """
+    Render the pipeline's metrics in the Prometheus text exposition format.
+    
+    Returns:
+        str: The exposition
+    """
+    return REGISTRY.render()
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens in a text, at four characters per token.
+    
+    Args:
+        text (str): The text
+        
+    Returns:
+        int: Estimated token count
+    """
+    return (len(text) + 3) // 4
@@ -0,0 +1,245 @@
+"""
+Profiling Module for Psycho-Color Analysis System
+
+This module profiles a sampled fraction of requests with cProfile and
+tracemalloc, so that CPU and memory regressions show up under production
+traffic without profiling every request. Profiles of sampled requests are
+aggregated, and every few samples a report of the hottest functions and
+the lines allocating the most memory is written to a local directory that
+keeps only the newest reports.
+
+Only one request is profiled at a time; a request selected while another
+is being profiled runs unprofiled. Allocation figures come from a process
+wide tracemalloc trace, so allocations made by other threads during a
+sampled request are included.
+"""
+
+import io
+import os
+import time
+import pstats
+import random
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+class SamplingProfiler:
+    """
+    Profiles a random fraction of requests and writes aggregated reports.
+    """
+    
+    def __init__(self, directory, sample_rate=0.01, report_every=100, max_reports=20,
+                 top=30, trace_allocations=True, seed=None):
+        """
+        Initialize the profiler.
+        
+        Args:
+            directory (str): Directory reports are written to
+            sample_rate (float, optional): Fraction of requests profiled
+            report_every (int, optional): Sampled requests aggregated into
+                each report
+            max_reports (int, optional): Reports kept; older ones are deleted
+            top (int, optional): Functions and allocation sites listed in
+                each report
+            trace_allocations (bool, optional): Also trace memory allocations
+                of sampled requests with tracemalloc
+            seed (int, optional): Seed for request sampling
+        """
+        if not 0 <= sample_rate <= 1:
+            raise ValueError(f"sample_rate must be between 0 and 1, got {sample_rate}")
+        
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.report_every = report_every
+        self.max_reports = max_reports
+        self.top = top
+        self.trace_allocations = trace_allocations
+        self._random = random.Random(seed)
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._reset()
+    
+    @classmethod
+    def from_environment(cls):
+        """
+        Create a profiler configured by environment variables.
+        
+        Returns:
+            SamplingProfiler: A profiler writing to PROFILE_DIR, or None if
+                PROFILE_SAMPLE_RATE is not set
+        """
+        sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+        if not sample_rate:
+            return None
+        
+        return cls(
+            os.environ.get("PROFILE_DIR", "profiles"),
+            sample_rate=sample_rate,
+            report_every=int(os.environ.get("PROFILE_REPORT_EVERY", 100)),
+            max_reports=int(os.environ.get("PROFILE_MAX_REPORTS", 20))
+        )
+    
+    def _reset(self):
+        """
+        Start a new aggregation period.
+        """
+        self._stats = None
+        self._allocations = {}
+        self._samples = {}
+        self._peak_bytes = 0
+        self._started_at = time.time()
+    
+    @contextmanager
+    def sample(self, name):
+        """
+        Profile the enclosed request if it is selected for sampling.
+        
+        Args:
+            name (str): Name of the profiled operation, used in reports
+            
+        Yields:
+            bool: True if the request is being profiled
+        """
+        if self._random.random() >= self.sample_rate or not self._active.acquire(blocking=False):
+            yield False
+            return
+        
+        try:
+            tracing = self.trace_allocations and not tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.start()
+            if self.trace_allocations:
+                tracemalloc.reset_peak()
+            
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield True
+            finally:
+                profile.disable()
+                snapshot = tracemalloc.take_snapshot() if self.trace_allocations else None
+                peak = tracemalloc.get_traced_memory()[1] if self.trace_allocations else 0
+                if tracing:
+                    tracemalloc.stop()
+                self._record(name, profile, snapshot, peak)
+        finally:
+            self._active.release()
+    
+    def _record(self, name, profile, snapshot, peak):
+        """
+        Add a sampled request to the current aggregation period.
+        
+        Args:
+            name (str): Name of the profiled operation
+            profile (cProfile.Profile): CPU profile of the request
+            snapshot (tracemalloc.Snapshot): Memory still allocated at the end
+                of the request, or None if allocations are not traced
+            peak (int): Peak traced memory in bytes during the request
+        """
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+            
+            self._samples[name] = self._samples.get(name, 0) + 1
+            self._peak_bytes = max(self._peak_bytes, peak)
+            
+            if snapshot is not None:
+                snapshot = snapshot.filter_traces([
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, __file__)
+                ])
+                for stat in snapshot.statistics("lineno"):
+                    frame = stat.traceback[0]
+                    site = f"{frame.filename}:{frame.lineno}"
+                    size, count = self._allocations.get(site, (0, 0))
+                    self._allocations[site] = (size + stat.size, count + stat.count)
+            
+            if sum(self._samples.values()) >= self.report_every:
+                self._write_report()
+    
+    def flush(self):
+        """
+        Write a report of the requests sampled since the last report.
+        
+        Returns:
+            str: Path of the report, or None if no requests were sampled
+        """
+        with self._lock:
+            if not self._samples:
+                return None
+            return self._write_report()
+    
+    def _write_report(self):
+        """
+        Write the current aggregation period to a report and start a new one.
+        
+        Returns:
+            str: Path of the report
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self._sequence += 1
+        stem = os.path.join(
+            self.directory,
+            f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._sequence:06d}"
+        )
+        
+        self._stats.dump_stats(stem + ".pstats")
+        with open(stem + ".txt", "w", encoding="utf-8") as report:
+            report.write(self._format_report())
+        
+        self._reset()
+        self._rotate()
+        return stem + ".txt"
+    
+    def _format_report(self):
+        """
+        Format the current aggregation period as text.
+        
+        Returns:
+            str: Report with sample counts, hot functions and allocation sites
+        """
+        samples = sum(self._samples.values())
+        lines = [
+            f"Sampled requests: {samples} ({', '.join(f'{name}={count}' for name, count in sorted(self._samples.items()))})",
+            f"Sample rate: {self.sample_rate}",
+            f"Period: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self._started_at))} to {time.strftime('%Y-%m-%d %H:%M:%S')}",
+            "",
+            f"Hot functions (top {self.top} by cumulative time)",
+            ""
+        ]
+        
+        output = io.StringIO()
+        self._stats.stream = output
+        self._stats.sort_stats("cumulative").print_stats(self.top)
+        lines.append(output.getvalue().strip("\n"))
+        
+        if self.trace_allocations:
+            lines.extend([
+                "",
+                f"Allocations retained at the end of requests (top {self.top} sites)",
+                f"Peak traced memory: {self._peak_bytes} bytes",
+                "",
+                f"{'bytes/request':>14} {'blocks/request':>15}  site"
+            ])
+            ranked = sorted(self._allocations.items(), key=lambda item: item[1][0], reverse=True)
+            for site, (size, count) in ranked[:self.top]:
+                lines.append(f"{size / samples:>14.0f} {count / samples:>15.1f}  {site}")
+        
+        return "\n".join(lines) + "\n"
+    
+    def _rotate(self):
+        """
+        Delete the oldest reports beyond max_reports.
+        """
+        reports = sorted(name[:-len(".txt")] for name in os.listdir(self.directory)
+                         if name.startswith("profile-") and name.endswith(".txt"))
+        for stem in reports[:-self.max_reports]:
+            for extension in (".txt", ".pstats"):
+                try:
+                    os.remove(os.path.join(self.directory, stem + extension))
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,330 @@
+"""
+Tracing Module for Psycho-Color Analysis System
+
+This module records nestable timing spans for the stages of the analysis
+pipeline. A span has a name, a start and end time, a parent (the span that
+was active when it started) and attributes such as prompt size, model or
+whether a cache was hit. Finished spans are handed to a pluggable sink:
+InMemorySink keeps them for tests and inspection, and OpenTelemetrySink
+forwards them to an OpenTelemetry tracer.
+
+Tracing is disabled until a sink is installed with set_sink. While it is
+disabled, span() returns a shared no-op span and traced functions call
+straight through, so instrumentation costs a few hundred nanoseconds per
+span.
+"""
+
+import time
+import random
+import functools
+import threading
+from contextvars import ContextVar
+
+# Sink receiving spans; tracing is disabled while it is None
+_sink = None
+
+# Span active in the current context
+_current_span = ContextVar("psycho_color_span", default=None)
+
+class Span:
+    """
+    A timed operation within a trace.
+    """
+    
+    __slots__ = ("name", "attributes", "parent", "trace_id", "span_id", "start_ns", "end_ns", "error", "sink_data", "_sink", "_start_counter", "_token")
+    
+    def __init__(self, name, sink, attributes=None):
+        """
+        Initialize the span; it starts when entered as a context manager.
+        
+        Args:
+            name (str): Name of the operation, e.g. "llm.request"
+            sink (SpanSink): Sink receiving the span
+            attributes (dict, optional): Initial attributes
+        """
+        self.name = name
+        self.attributes = dict(attributes) if attributes else {}
+        self.parent = None
+        self.trace_id = None
+        self.span_id = random.getrandbits(64)
+        self.start_ns = None
+        self.end_ns = None
+        self.error = None
+        self.sink_data = None
+        self._sink = sink
+        self._start_counter = None
+        self._token = None
+    
+    def set_attribute(self, key, value):
+        """
+        Set an attribute of the span.
+        
+        Args:
+            key (str): Attribute name
+            value: Attribute value; a string, number or boolean
+        """
+        self.attributes[key] = value
+    
+    def set_attributes(self, **attributes):
+        """
+        Set several attributes of the span.
+        
+        Args:
+            **attributes: Attribute names and values
+        """
+        self.attributes.update(attributes)
+    
+    @property
+    def duration(self):
+        """
+        Duration of the finished span.
+        
+        Returns:
+            float: Seconds between start and end, or None if not finished
+        """
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e9
+    
+    def to_dict(self):
+        """
+        Convert the span to a dictionary.
+        
+        Returns:
+            dict: Name, IDs, times in nanoseconds since the epoch, attributes and error
+        """
+        return {
+            "name": self.name,
+            "trace_id": f"{self.trace_id:032x}",
+            "span_id": f"{self.span_id:016x}",
+            "parent_id": f"{self.parent.span_id:016x}" if self.parent is not None else None,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "attributes": dict(self.attributes),
+            "error": self.error
+        }
+    
+    def __enter__(self):
+        self.parent = _current_span.get()
+        self.trace_id = self.parent.trace_id if self.parent is not None else random.getrandbits(128)
+        self.start_ns = time.time_ns()
+        self._start_counter = time.perf_counter_ns()
+        self._token = _current_span.set(self)
+        self._sink.on_start(self)
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Durations come from the monotonic counter; start_ns anchors them in wall time
+        self.end_ns = self.start_ns + time.perf_counter_ns() - self._start_counter
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc_value}"
+        _current_span.reset(self._token)
+        self._sink.on_end(self)
+        return False
+    
+    def __repr__(self):
+        return f"Span({self.name!r}, duration={self.duration}, attributes={self.attributes!r})"
+
+class _NoopSpan:
+    """
+    Span returned while tracing is disabled; every operation does nothing.
+    """
+    
+    __slots__ = ()
+    
+    name = None
+    attributes = {}
+    
+    def set_attribute(self, key, value):
+        pass
+    
+    def set_attributes(self, **attributes):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+NOOP_SPAN = _NoopSpan()
+
+def span(name, **attributes):
+    """
+    Create a span to be used as a context manager.
+    
+    Args:
+        name (str): Name of the operation
+        **attributes: Initial attributes
+        
+    Returns:
+        Span: The span, or a no-op span if tracing is disabled
+    """
+    sink = _sink
+    if sink is None:
+        return NOOP_SPAN
+    return Span(name, sink, attributes)
+
+def traced(name):
+    """
+    Decorate a function to run in a span.
+    
+    Args:
+        name (str): Name of the span
+        
+    Returns:
+        callable: The decorator
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            sink = _sink
+            if sink is None:
+                return function(*args, **kwargs)
+            with Span(name, sink):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def current_span():
+    """
+    Get the span active in the current context.
+    
+    Returns:
+        Span: The active span, or a no-op span if there is none
+    """
+    active = _current_span.get()
+    return active if active is not None else NOOP_SPAN
+
+def set_sink(sink):
+    """
+    Install the sink receiving spans, enabling or disabling tracing.
+    
+    Args:
+        sink (SpanSink): The sink, or None to disable tracing
+        
+    Returns:
+        SpanSink: The previously installed sink
+    """
+    global _sink
+    previous = _sink
+    _sink = sink
+    return previous
+
+def get_sink():
+    """
+    Get the installed sink.
+    
+    Returns:
+        SpanSink: The sink, or None if tracing is disabled
+    """
+    return _sink
+
+class SpanSink:
+    """
+    Receives spans as they start and end.
+    """
+    
+    def on_start(self, span):
+        """
+        Handle a span that has started.
+        
+        Args:
+            span (Span): The span
+        """
+    
+    def on_end(self, span):
+        """
+        Handle a span that has ended.
+        
+        Args:
+            span (Span): The span
+        """
+
+class InMemorySink(SpanSink):
+    """
+    Keeps finished spans in memory.
+    """
+    
+    def __init__(self):
+        """
+        Initialize the sink.
+        """
+        self.spans = []
+        self._lock = threading.Lock()
+    
+    def on_end(self, span):
+        """
+        Keep a finished span.
+        
+        Args:
+            span (Span): The span
+        """
+        with self._lock:
+            self.spans.append(span)
+    
+    def find(self, name):
+        """
+        Get the finished spans with a name.
+        
+        Args:
+            name (str): Span name
+            
+        Returns:
+            list: The spans, in order of completion
+        """
+        with self._lock:
+            return [span for span in self.spans if span.name == name]
+    
+    def clear(self):
+        """
+        Drop all finished spans.
+        """
+        with self._lock:
+            self.spans.clear()
+
+class OpenTelemetrySink(SpanSink):
+    """
+    Forwards spans to an OpenTelemetry tracer.
+    
+    Requires the opentelemetry-api package; exporters are configured
+    through the OpenTelemetry SDK as usual.
+    """
+    
+    def __init__(self, tracer=None):
+        """
+        Initialize the sink.
+        
+        Args:
+            tracer (opentelemetry.trace.Tracer, optional): Tracer creating the
+                spans; the global tracer provider's is used if not provided
+        """
+        from opentelemetry import trace
+        
+        self._trace = trace
+        self.tracer = tracer if tracer is not None else trace.get_tracer("psycho_color")
+    
+    def on_start(self, span):
+        """
+        Start the OpenTelemetry span, as a child of the parent's.
+        
+        Args:
+            span (Span): The span
+        """
+        context = None
+        if span.parent is not None and span.parent.sink_data is not None:
+            context = self._trace.set_span_in_context(span.parent.sink_data)
+        span.sink_data = self.tracer.start_span(span.name, context=context, start_time=span.start_ns)
+    
+    def on_end(self, span):
+        """
+        Record the attributes and status and end the OpenTelemetry span.
+        
+        Args:
+            span (Span): The span
+        """
+        otel_span = span.sink_data
+        otel_span.set_attributes(span.attributes)
+        if span.error is not None:
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.error))
+        otel_span.end(end_time=span.end_ns)
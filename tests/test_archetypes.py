@@ -0,0 +1,102 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from code.color_analysis.archetypes import ArchetypeTable, archetype_key, build_archetype_table
+from code.color_analysis.data_processor import ColorDataProcessor
+from code.color_analysis.profile_generator import ProfileGenerator
+
+class TestArchetypes(unittest.TestCase):
+    """
+    Test cases for pre-generated archetype profiles.
+    """
+    
+    def setUp(self):
+        """
+        Set up test fixtures.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.table = ArchetypeTable(os.path.join(self.directory, "archetypes.db"))
+        self.data_processor = ColorDataProcessor()
+        self.samples = [{"color_ranking": ["blue", "green", "yellow", "red"]}] * 3 + [{"color_ranking": ["red", "yellow"]}]
+    
+    def tearDown(self):
+        """
+        Remove the table file.
+        """
+        self.table.close()
+        shutil.rmtree(self.directory)
+    
+    def analyze(self, color_data):
+        """
+        Run the deterministic color analysis.
+        """
+        return self.data_processor.analyze_color_data(self.data_processor.process_color_preferences(color_data))
+    
+    def test_archetype_key(self):
+        """
+        Test that the archetype ignores variables the LLM input does not depend on.
+        """
+        blue = self.analyze({"color_ranking": ["blue", "green"]})
+        navy = self.analyze({"color_ranking": ["navy", "sage"]})
+        red = self.analyze({"color_ranking": ["red", "yellow"]})
+        
+        self.assertEqual(archetype_key(blue), archetype_key(navy))
+        self.assertNotEqual(archetype_key(blue), archetype_key(red))
+    
+    def test_build_generates_frequent_archetypes(self):
+        """
+        Test that the build generates the most frequent archetypes only.
+        """
+        generated = build_archetype_table(self.table, self.samples, ProfileGenerator(api_key="mock_key"), top=1)
+        
+        self.assertEqual(generated, 1)
+        self.assertEqual(len(self.table), 1)
+        self.assertIn(archetype_key(self.analyze(self.samples[0])), self.table)
+        
+        # Covered archetypes are skipped unless rebuilding
+        self.assertEqual(build_archetype_table(self.table, self.samples, ProfileGenerator(api_key="mock_key")), 1)
+        self.assertEqual(len(self.table), 2)
+    
+    def test_generator_serves_from_table(self):
+        """
+        Test that covered archetypes are served without LLM calls and
+        uncovered ones fall back to the LLM.
+        """
+        build_archetype_table(self.table, self.samples, ProfileGenerator(api_key="mock_key"), top=1)
+        
+        generator = ProfileGenerator(api_key="mock_key", archetype_table=self.table)
+        calls = []
+        generate_llm_content = generator._generate_llm_content
+        
+        def record(profile_data):
+            calls.append(profile_data)
+            return generate_llm_content(profile_data)
+        
+        generator._generate_llm_content = record
+        
+        covered = self.analyze(self.samples[0])
+        served = generator.generate_profile(covered)
+        self.assertEqual(calls, [])
+        
+        expected = ProfileGenerator(api_key="mock_key").generate_profile(covered)
+        self.assertEqual(served, expected)
+        
+        # Per-user analysis values are taken from the request, not the archetype
+        variant = self.analyze({"color_ranking": ["blue", "green", "red", "yellow"]})
+        self.assertEqual(archetype_key(variant), archetype_key(covered))
+        self.assertEqual(
+            generator.generate_profile(variant)["jung_color_energies"]["energy_distribution"],
+            variant["jung_color_energies"]["energy_distribution"]
+        )
+        
+        generator.generate_profile(self.analyze(self.samples[-1]))
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+from contextlib import redirect_stdout, redirect_stderr
+from io import StringIO
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.harness import SCHEMA_VERSION, measure, percentile, run_benchmarks
+from benchmarks.gate import compare, format_report, mann_whitney_p, main as gate_main
+from benchmarks.run import BENCHMARKS
+from benchmarks.workload import SyntheticWorkload
+from code.color_analysis.data_processor import ColorDataProcessor
+
+class TestBenchmarkHarness(unittest.TestCase):
+    """
+    Test cases for the benchmark harness.
+    """
+    
+    def test_percentile(self):
+        """
+        Test nearest-rank percentiles.
+        """
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 90), 7)
+    
+    def test_measure(self):
+        """
+        Test that a measurement reports latency, throughput and allocations.
+        """
+        result = measure(lambda: [0] * 1000, iterations=50)
+        
+        self.assertEqual(result["iterations"], 50)
+        latency = result["latency_ns"]
+        self.assertLessEqual(latency["min"], latency["p50"])
+        self.assertLessEqual(latency["p50"], latency["p99"])
+        self.assertLessEqual(latency["p99"], latency["max"])
+        self.assertGreater(result["ops_per_sec"], 0)
+        self.assertGreaterEqual(result["allocations"]["peak_bytes"], 8000)
+        self.assertEqual(len(result["round_p50_ns"]), 5)
+    
+    def test_pipeline_benchmarks(self):
+        """
+        Test that every pipeline benchmark runs and the results serialize to JSON.
+        """
+        results = run_benchmarks(BENCHMARKS, iterations=2)
+        
+        self.assertEqual(set(results["benchmarks"]), {name for name, _, _ in BENCHMARKS})
+        self.assertEqual(json.loads(json.dumps(results)), results)
+        
+        filtered = run_benchmarks(BENCHMARKS, iterations=2, name_filter="color_analyzer.")
+        self.assertEqual(len(filtered["benchmarks"]), 5)
+
+
+def gate_results(round_p50_ns, peak_bytes=1000, name="stage"):
+    """
+    Build benchmark results for one benchmark.
+    
+    Args:
+        round_p50_ns (list): Median latency of each round
+        peak_bytes (int, optional): Peak allocated bytes
+        name (str, optional): Benchmark name
+        
+    Returns:
+        dict: Results in the form returned by run_benchmarks
+    """
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "environment": {"python": "3"},
+        "benchmarks": {
+            name: {
+                "round_p50_ns": round_p50_ns,
+                "allocations": {"peak_bytes": peak_bytes, "retained_bytes_per_op": 0}
+            }
+        }
+    }
+
+
+class TestRegressionGate(unittest.TestCase):
+    """
+    Test cases for the benchmark regression gate.
+    """
+    
+    def test_mann_whitney_p(self):
+        """
+        Test exact and approximate one-sided p-values.
+        """
+        self.assertAlmostEqual(mann_whitney_p([1, 2, 3, 4, 5], [6, 7, 8, 9, 10]), 1 / 252)
+        self.assertAlmostEqual(mann_whitney_p([6, 7, 8, 9, 10], [1, 2, 3, 4, 5]), 1.0)
+        self.assertGreater(mann_whitney_p([5, 5, 5], [5, 5, 5]), 0.5)
+        self.assertLess(mann_whitney_p(list(range(20)), list(range(15, 35))), 0.001)
+        self.assertGreater(mann_whitney_p(list(range(20)), list(range(20))), 0.4)
+    
+    def test_compare(self):
+        """
+        Test that only large, significant changes are reported.
+        """
+        baseline = gate_results([100, 102, 98, 101, 99])
+        
+        def status(current, metric="median latency"):
+            rows = compare(baseline, current, tolerance=0.1, alpha=0.05)
+            return next(row["status"] for row in rows if row["metric"] == metric)
+        
+        self.assertEqual(status(gate_results([130, 128, 131, 129, 132])), "regressed")
+        self.assertEqual(status(gate_results([70, 72, 71, 69, 70])), "improved")
+        self.assertEqual(status(gate_results([104, 105, 103, 104, 106])), "unchanged")
+        self.assertEqual(status(gate_results([90, 300, 95, 100, 400])), "unchanged")
+        self.assertEqual(status(gate_results([100, 101, 99, 100, 100], peak_bytes=2000), "peak bytes"), "regressed")
+        self.assertEqual(status(gate_results([100, 101, 99, 100, 100], peak_bytes=1200), "peak bytes"), "unchanged")
+        
+        rows = compare(baseline, gate_results([100], name="other"))
+        self.assertEqual({row["benchmark"]: row["status"] for row in rows}, {"stage": "missing", "other": "new"})
+        
+        report = format_report(compare(baseline, gate_results([130, 128, 131, 129, 132])))
+        self.assertIn("100 ns   130 ns", report)
+        self.assertIn("+30.0%", report)
+        self.assertIn("REGRESSED", report)
+        self.assertTrue(report.endswith("1 regressed, 2 unchanged\n"))
+    
+    def test_exit_status(self):
+        """
+        Test that the command fails on regressions and passes otherwise.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            paths = {}
+            for name, rounds in (("baseline", [100, 102, 98, 101, 99]), ("same", [101, 99, 100, 102, 98]), ("slow", [150, 151, 149, 152, 150])):
+                paths[name] = os.path.join(directory, name + ".json")
+                with open(paths[name], "w", encoding="utf-8") as results_file:
+                    json.dump(gate_results(rounds), results_file)
+            
+            output = StringIO()
+            with redirect_stdout(output), redirect_stderr(StringIO()):
+                self.assertEqual(gate_main(["--baseline", paths["baseline"], "--results", paths["same"]]), 0)
+                self.assertEqual(gate_main(["--baseline", paths["baseline"], "--results", paths["slow"]]), 1)
+            self.assertIn("REGRESSED", output.getvalue())
+            
+            with open(paths["same"], "w", encoding="utf-8") as results_file:
+                json.dump(dict(gate_results([100]), schema_version=1), results_file)
+            with self.assertRaises(ValueError):
+                gate_main(["--baseline", paths["baseline"], "--results", paths["same"]])
+    
+    def test_committed_baseline(self):
+        """
+        Test that the committed baseline covers every pipeline benchmark.
+        """
+        with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "baseline.json"), encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        
+        self.assertEqual(baseline["schema_version"], SCHEMA_VERSION)
+        self.assertEqual(set(baseline["benchmarks"]), {name for name, _, _ in BENCHMARKS})
+
+
+class TestSyntheticWorkload(unittest.TestCase):
+    """
+    Test cases for the synthetic workload generator.
+    """
+    
+    def test_reproducible(self):
+        """
+        Test that the same seed generates the same workload.
+        """
+        first = list(SyntheticWorkload(seed=3).generate(200))
+        second = list(SyntheticWorkload(seed=3).generate(200))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, list(SyntheticWorkload(seed=4).generate(200)))
+    
+    def test_payloads_cover_input_schema(self):
+        """
+        Test that payloads use every input field and process without errors.
+        """
+        data_processor = ColorDataProcessor()
+        fields = set()
+        for payload in SyntheticWorkload(seed=1, typo_rate=0).generate(500):
+            fields.update(payload)
+            processed_data = data_processor.process_color_preferences(payload)
+            for color in processed_data["color_ranking"]:
+                self.assertIn(color, ColorDataProcessor.COLOR_MAPPINGS)
+        
+        self.assertEqual(fields, {
+            "primary_color", "secondary_color", "color_ranking", "work_color", "relaxation_color",
+            "social_color", "creative_color", "stress_color", "color_emotion_associations"
+        })
+    
+    def test_zipf_skew(self):
+        """
+        Test that ranking popularity follows the configured skew.
+        """
+        def top_share(zipf_exponent):
+            workload = SyntheticWorkload(seed=2, distinct_rankings=100, zipf_exponent=zipf_exponent, alias_rate=0, typo_rate=0, string_ranking_rate=0)
+            rankings = [tuple(payload["color_ranking"]) for payload in workload.generate(2000)]
+            return rankings.count(workload.rankings[0]) / len(rankings)
+        
+        self.assertGreater(top_share(1.5), 0.3)
+        self.assertLess(top_share(0), 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
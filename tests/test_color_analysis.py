@@ -1,6 +1,9 @@
 import unittest
 import sys
 import os
+import copy
+import json
+import pickle
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -76,7 +79,7 @@ class TestColorAnalyzer(unittest.TestCase):
         
         for dimension in dimensions:
             self.assertTrue(dimension in result["dimension_scores"])
-            
+        
         # Verify dimension scores are within range (-100 to 100)
         for dimension, score in result["dimension_scores"].items():
             self.assertTrue(-100 <= score <= 100)
@@ -160,6 +163,44 @@ class TestColorAnalyzer(unittest.TestCase):
         }
         
         self.assertFalse(self.analyzer._has_contextual_data(color_data))
+    
+    def test_framework_tables_are_frozen(self):
+        """
+        Test that results share the framework tables without exposing them to mutation.
+        """
+        with self.assertRaises(TypeError):
+            ColorAnalyzer.JUNG_COLORS["Cool Blue"] = {}
+        with self.assertRaises(TypeError):
+            ColorAnalyzer.PERSONALITY_DIMENSIONS["task_people"]["task_oriented"] = ()
+        with self.assertRaises(TypeError):
+            ColorDataProcessor.COLOR_MAPPINGS["red"] = ()
+        
+        first = self.analyzer.analyze_jung_energies({"primary_color": "blue"})
+        second = self.analyzer.analyze_jung_energies({"color_ranking": ["navy", "red"]})
+        self.assertIs(first["primary_traits"], second["primary_traits"])
+        self.assertIs(copy.deepcopy(first)["primary_traits"], first["primary_traits"])
+        with self.assertRaises(AttributeError):
+            first["primary_traits"].append("changed")
+        
+        emotions = self.analyzer.analyze_emotional_tendencies({"primary_color": "red", "secondary_color": "gray"})
+        self.assertIs(emotions["primary_emotions"], ColorAnalyzer.COLOR_EMOTIONS["red"])
+        self.assertEqual(emotions["secondary_emotions"], ())
+        
+        # Results still serialize for caches, queues and worker processes
+        self.assertEqual(json.loads(json.dumps(first))["primary_traits"][0], "analytical")
+        self.assertEqual(pickle.loads(pickle.dumps(first)), first)
+        self.assertIs(sys.intern("action-oriented"), ColorAnalyzer.JUNG_COLORS["Fiery Red"]["traits"][-1])
+        
+        # So do the tables and any value passed on from them
+        for table in (ColorAnalyzer.JUNG_COLORS, ColorAnalyzer.PERSONALITY_DIMENSIONS, ColorDataProcessor.COLOR_MAPPINGS):
+            self.assertIs(copy.deepcopy(table), table)
+            restored = pickle.loads(pickle.dumps(table))
+            self.assertEqual(restored, table)
+            with self.assertRaises(TypeError):
+                restored.clear()
+        energy = ColorAnalyzer.JUNG_COLORS["Cool Blue"]
+        self.assertEqual(json.loads(json.dumps(energy))["colors"][0], "blue")
+        self.assertEqual(pickle.loads(pickle.dumps(energy)), energy)
 
 
 class TestDataProcessor(unittest.TestCase):
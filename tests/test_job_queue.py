@@ -0,0 +1,242 @@
+import unittest
+import sys
+import os
+import time
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from code.color_analysis.job_queue import JobQueue, ProfileWorker, start_workers
+from code.color_analysis.api import PsychoColorAPI
+from code.llm_integration import LLMServiceError
+
+class TestJobQueue(unittest.TestCase):
+    """
+    Test cases for the durable JobQueue.
+    """
+    
+    def setUp(self):
+        """
+        Set up test fixtures.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "jobs.db")
+        self.queue = JobQueue(self.path, visibility_timeout=60, max_attempts=2, retry_delay=0)
+    
+    def tearDown(self):
+        """
+        Remove the queue database.
+        """
+        shutil.rmtree(self.directory)
+    
+    def test_priority_order_and_persistence(self):
+        """
+        Test that jobs are claimed by priority, then age, and survive reopening.
+        """
+        low = self.queue.enqueue({"n": 1})
+        high = self.queue.enqueue({"n": 2}, priority=5)
+        later = self.queue.enqueue({"n": 3})
+        
+        reopened = JobQueue(self.path)
+        self.assertEqual(reopened.stats(), {"queued": 3})
+        self.assertEqual([reopened.claim()["job_id"] for _ in range(3)], [high, low, later])
+        self.assertIsNone(reopened.claim())
+    
+    def test_idempotency_key(self):
+        """
+        Test that resubmitting with the same key returns the existing job.
+        """
+        first = self.queue.enqueue({"n": 1}, idempotency_key="request-1")
+        second = self.queue.enqueue({"n": 2}, idempotency_key="request-1")
+        
+        self.assertEqual(first, second)
+        self.assertEqual(self.queue.get(first)["payload"], {"n": 1})
+        self.assertEqual(self.queue.stats(), {"queued": 1})
+    
+    def test_failed_transaction_rolls_back(self):
+        """
+        Test that a transaction that raises leaves the queue unchanged and unlocked.
+        """
+        job_id = self.queue.enqueue({"n": 1})
+        with self.assertRaises(RuntimeError):
+            with self.queue._transaction() as db:
+                db.execute("UPDATE jobs SET priority = 9")
+                raise RuntimeError("interrupted")
+        
+        self.assertEqual(self.queue.get(job_id)["priority"], 0)
+        self.queue.enqueue({"n": 2})
+        self.assertEqual(self.queue.stats(), {"queued": 2})
+    
+    def test_complete(self):
+        """
+        Test completing a claimed job.
+        """
+        job_id = self.queue.enqueue({"n": 1})
+        job = self.queue.claim()
+        self.assertEqual(job["status"], "running")
+        self.assertEqual(job["attempts"], 1)
+        
+        self.assertTrue(self.queue.complete(job, {"ok": True}))
+        stored = self.queue.get(job_id)
+        self.assertEqual(stored["status"], "complete")
+        self.assertEqual(stored["result"], {"ok": True})
+    
+    def test_retries_then_fails(self):
+        """
+        Test that failed jobs are retried until attempts run out.
+        """
+        job_id = self.queue.enqueue({"n": 1})
+        
+        self.assertTrue(self.queue.fail(self.queue.claim(), "first error"))
+        self.assertEqual(self.queue.get(job_id)["status"], "queued")
+        
+        job = self.queue.claim()
+        self.assertEqual(job["attempts"], 2)
+        self.assertTrue(self.queue.fail(job, "second error"))
+        
+        stored = self.queue.get(job_id)
+        self.assertEqual(stored["status"], "failed")
+        self.assertEqual(stored["error"], "second error")
+        self.assertIsNone(self.queue.claim())
+    
+    def test_visibility_timeout(self):
+        """
+        Test that abandoned jobs are reclaimed and stale leases are rejected.
+        """
+        queue = JobQueue(self.path, visibility_timeout=0.05, max_attempts=2)
+        job_id = queue.enqueue({"n": 1})
+        abandoned = queue.claim()
+        self.assertIsNone(queue.claim())
+        
+        time.sleep(0.1)
+        reclaimed = queue.claim()
+        self.assertEqual(reclaimed["job_id"], job_id)
+        self.assertEqual(reclaimed["attempts"], 2)
+        
+        self.assertFalse(queue.complete(abandoned, {"late": True}))
+        self.assertTrue(queue.complete(reclaimed, {"ok": True}))
+        
+        # A job abandoned on its last attempt fails
+        queue.enqueue({"n": 2})
+        queue.claim()
+        time.sleep(0.1)
+        queue.claim()
+        time.sleep(0.1)
+        self.assertIsNone(queue.claim())
+        self.assertEqual(queue.stats(), {"complete": 1, "failed": 1})
+
+
+class TestProfileWorkers(unittest.TestCase):
+    """
+    Test cases for profile workers and the API's durable job mode.
+    """
+    
+    def setUp(self):
+        """
+        Set up test fixtures.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "jobs.db")
+        self.queue = JobQueue(self.path)
+        self.api = PsychoColorAPI(api_key="mock_key", job_queue=self.queue)
+    
+    def tearDown(self):
+        """
+        Remove the queue database.
+        """
+        shutil.rmtree(self.directory)
+    
+    def test_worker_generates_profile(self):
+        """
+        Test that a worker completes a job submitted through the API.
+        """
+        job = self.api.submit_color_preferences({"primary_color": "blue", "secondary_color": "green"}, idempotency_key="a")
+        self.assertEqual(job["status"], "pending")
+        self.assertEqual(job["analysis_results"]["jung_color_energies"]["primary_energy"], "Cool Blue")
+        self.assertEqual(self.api.submit_color_preferences({"primary_color": "red"}, idempotency_key="a")["job_id"], job["job_id"])
+        
+        worker = ProfileWorker(self.queue, api_key="mock_key")
+        self.assertTrue(worker.run_once())
+        self.assertFalse(worker.run_once())
+        
+        finished = self.api.get_profile_job(job["job_id"])
+        self.assertEqual(finished["status"], "complete")
+        self.assertTrue(len(finished["profile"]["personality_overview"]) > 0)
+        self.assertIsNone(self.api.get_profile_job("missing"))
+    
+    def test_llm_failure_is_retried(self):
+        """
+        Test that a failed LLM call schedules a retry instead of storing a template profile.
+        """
+        job = self.api.submit_color_preferences({"primary_color": "blue"})
+        worker = ProfileWorker(self.queue, api_key="mock_key")
+        
+        def fail(profile_data):
+            raise LLMServiceError("LLM unavailable", status_code=503)
+        
+        worker.profile_generator._generate_llm_content = fail
+        self.assertTrue(worker.run_once())
+        
+        stored = self.queue.get(job["job_id"])
+        self.assertEqual(stored["status"], "queued")
+        self.assertEqual(stored["attempts"], 1)
+        self.assertEqual(stored["error"], "LLM unavailable")
+    
+    def test_worker_survives_database_errors(self):
+        """
+        Test that a database error does not stop the worker loop.
+        """
+        worker = ProfileWorker(self.queue, api_key="mock_key", poll_interval=0.01)
+        stop_event = threading.Event()
+        calls = []
+        
+        def run_once():
+            calls.append(None)
+            if len(calls) == 1:
+                raise sqlite3.OperationalError("database is locked")
+            stop_event.set()
+            return True
+        
+        worker.run_once = run_once
+        with self.assertLogs("code.color_analysis.job_queue", "ERROR"):
+            worker.run(stop_event)
+        self.assertEqual(len(calls), 2)
+    
+    def test_compact_results(self):
+        """
+        Test that compact stored profiles are expanded when the job is read.
+        """
+        job = self.api.submit_color_preferences({"primary_color": "blue", "secondary_color": "green"})
+        self.assertTrue(ProfileWorker(self.queue, api_key="mock_key", compact=True).run_once())
+        
+        stored = self.queue.get(job["job_id"])["result"]
+        self.assertEqual(stored["format"], "compact-profile-v1")
+        self.assertNotIn("personality_overview", stored)
+        
+        finished = self.api.get_profile_job(job["job_id"])
+        self.assertEqual(finished["status"], "complete")
+        self.assertEqual(finished["profile"]["full_profile"], stored["profile_text"])
+        self.assertTrue(len(finished["profile"]["recommendations"]["daily_practices"]) > 0)
+    
+    def test_worker_processes(self):
+        """
+        Test that worker processes drain the queue.
+        """
+        job = self.api.submit_color_preferences({"primary_color": "red", "secondary_color": "yellow"})
+        workers, stop_event = start_workers(self.path, processes=2, api_key="mock_key")
+        try:
+            finished = self.api.get_profile_job(job["job_id"], wait=10)
+        finally:
+            stop_event.set()
+            for worker in workers:
+                worker.join(5)
+        
+        self.assertEqual(finished["status"], "complete")
+        self.assertIn("recommendations", finished["profile"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,12 @@
 import unittest
 import sys
 import os
+import copy
+import json
+import time
+import tempfile
+import threading
+from unittest import mock
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -8,9 +14,18 @@ from code.llm_integration.prompt_templates import (
     create_color_preference_prompt,
     create_jung_energy_prompt,
     create_comprehensive_profile_prompt,
-    create_recommendations_prompt
+    create_recommendations_prompt,
+    create_multi_user_recommendations_prompt
 )
-from code.llm_integration.response_processor import ResponseProcessor
+from code.llm_integration.response_processor import ResponseProcessor, SectionIndex, ParsedResponse, StreamingSectionParser
+from code.llm_integration.framework import LLMFramework
+from code.llm_integration.singleflight import SingleFlight
+from code.llm_integration.llm_integration import LLMIntegration
+from code.llm_integration.routing import ModelRouter, COMPREHENSIVE_PROFILE, RECOMMENDATIONS
+from code.llm_integration.batch import BatchBackend, LocalBatchBackend, write_batch_file, read_batch_file
+from code.llm_integration.scheduler import PriorityScheduler, llm_priority, current_priority, INTERACTIVE, BATCH
+from code.llm_integration.simulation import SimulatedProvider
+from code.llm_integration.errors import LLMServiceError, LLMRateLimitError, LLMTimeoutError
 
 class TestPromptTemplates(unittest.TestCase):
     """
@@ -383,5 +398,882 @@ class TestResponseProcessor(unittest.TestCase):
         self.assertTrue("key2" in result)
 
 
+class TestSectionIndex(unittest.TestCase):
+    """
+    Test cases for the SectionIndex class.
+    """
+    
+    def test_prefix_markers_share_position(self):
+        """
+        Test that a marker and its prefix are both indexed at the same position.
+        """
+        text = "## 1. Overview\nIntro text\n## 2. Jung Color Energy Distribution\nBlue\n## 3. End"
+        index = SectionIndex(text, ["## 1. Overview", "## 2.", "## 2. Jung Color Energy Distribution", "## 3."])
+        
+        self.assertEqual(index.find("## 2."), index.find("## 2. Jung Color Energy Distribution"))
+        self.assertEqual(index.section("## 1. Overview", "## 2."), "Intro text")
+        self.assertEqual(index.section("## 2. Jung Color Energy Distribution", "## 3."), "Blue")
+    
+    def test_pattern_cache_is_bounded(self):
+        """
+        Test that compiled patterns are cached with a bounded size.
+        """
+        for i in range(300):
+            SectionIndex("text", [f"marker {i}:"])
+        
+        info = SectionIndex._compile.cache_info()
+        self.assertEqual(info.maxsize, 256)
+        self.assertLessEqual(info.currsize, 256)
+        self.assertIs(SectionIndex("a", ["x"])._pattern, SectionIndex("b", ["x"])._pattern)
+    
+    def test_case_insensitive_lookup(self):
+        """
+        Test that markers are matched regardless of case.
+        """
+        text = "Personality Traits: calm\nGROWTH AREAS: patience"
+        index = SectionIndex(text, ["personality traits", "growth areas"])
+        
+        self.assertEqual(index.section("personality traits", "growth areas"), ": calm")
+        self.assertEqual(index.section("growth areas", ""), ": patience")
+    
+    def test_missing_markers(self):
+        """
+        Test that missing start markers yield empty sections and missing end
+        markers run to the end of the text.
+        """
+        text = "Strengths: focus and care"
+        index = SectionIndex(text, ["strengths", "growth areas", "weaknesses"])
+        
+        self.assertEqual(index.find("weaknesses"), -1)
+        self.assertEqual(index.section("weaknesses", ""), "")
+        self.assertEqual(index.section("strengths", "growth areas"), ": focus and care")
+
+
+class TestParsedResponse(unittest.TestCase):
+    """
+    Test cases for single-stage, lazily materialized response parsing.
+    """
+    
+    def test_fields_materialize_on_access(self):
+        """
+        Test that field builders only run when the field is read.
+        """
+        calls = []
+        
+        def build():
+            calls.append("built")
+            return ["calm", "trust"]
+        
+        result = ParsedResponse("raw text", {"emotions": build, "full_analysis": "raw text"})
+        
+        # Keys are visible without building any field
+        self.assertTrue("emotions" in result)
+        self.assertEqual(len(result), 2)
+        self.assertEqual(calls, [])
+        
+        self.assertEqual(result["emotions"], ["calm", "trust"])
+        self.assertEqual(result.get("emotions"), ["calm", "trust"])
+        self.assertEqual(calls, ["built"])
+        
+        # Conversions see materialized values
+        self.assertEqual(dict(result), {"emotions": ["calm", "trust"], "full_analysis": "raw text"})
+        self.assertEqual(json.loads(json.dumps(result))["emotions"], ["calm", "trust"])
+        
+        # Two lazy results compare by their materialized values
+        first = ParsedResponse("raw text", {"emotions": lambda: ["calm"]})
+        second = ParsedResponse("raw text", {"emotions": lambda: ["calm"]})
+        self.assertEqual({"profile": first}, {"profile": second})
+    
+    def test_concurrent_materialization(self):
+        """
+        Test that readers never see a field while another thread builds it.
+        """
+        def slow_build():
+            time.sleep(0.05)
+            return ["calm"]
+        
+        result = ParsedResponse("raw text", {"emotions": slow_build, "traits": slow_build})
+        seen = []
+        threads = [
+            threading.Thread(target=lambda: seen.append(result["emotions"])),
+            threading.Thread(target=lambda: seen.append(result.get("emotions"))),
+            threading.Thread(target=lambda: seen.append(dict(result.items())["traits"])),
+            threading.Thread(target=lambda: seen.append(copy.deepcopy(result)["emotions"]))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(seen, [["calm"]] * 4)
+    
+    def test_section_bounds(self):
+        """
+        Test that section offsets locate the same text as section extraction.
+        """
+        processor = ResponseProcessor()
+        response = "## 1. Personality Overview\n  Calm and focused.  \n## 2. Jung Color Energy Distribution\nBlue."
+        layout = ResponseProcessor.COMPREHENSIVE_PROFILE_SECTIONS
+        
+        sections = processor._extract_sections(response, layout)
+        for key, (start, end) in processor.section_bounds(response, layout).items():
+            self.assertEqual(response[start:end], sections[key])
+        self.assertEqual(processor.section_bounds(response, layout)["emotional_landscape"], (0, 0))
+    
+    def test_framework_parses_once(self):
+        """
+        Test that the framework returns the processor's structured result directly.
+        """
+        framework = LLMFramework()
+        result = framework.generate_comprehensive_profile({"primary_energy": "Cool Blue"})
+        
+        self.assertTrue(isinstance(result, ParsedResponse))
+        self.assertTrue("analytical thinking" in result["personality_overview"])
+        self.assertTrue(result["jung_energy"]["full_description"].startswith("**Primary Energy"))
+        self.assertEqual(result["full_profile"], result.raw_response)
+        
+        recommendations = framework.generate_recommendations("Individual with primary Cool Blue energy.")
+        self.assertTrue("Soft blues" in recommendations["environment"]["colors"])
+        self.assertTrue(len(recommendations["communication_strategies"]) > 0)
+
+
+class TestStreamingSectionParser(unittest.TestCase):
+    """
+    Test cases for incremental parsing of streamed responses.
+    """
+    
+    def setUp(self):
+        """
+        Set up test fixtures.
+        """
+        self.layout = ResponseProcessor.COMPREHENSIVE_PROFILE_SECTIONS
+        self.response = (
+            "# Profile\n## 1. Personality Overview\nThoughtful and calm.\n"
+            "## 2. Jung Color Energy Distribution\nCool Blue leads.\n"
+            "## 3. Emotional Landscape\nSteady.\n"
+            "## 7. Practical Applications\nPlan ahead."
+        )
+    
+    def test_sections_emitted_as_completed(self):
+        """
+        Test that a section is reported as soon as the next header arrives.
+        """
+        parser = StreamingSectionParser(self.layout)
+        next_header = self.response.index("## 2.")
+        header_end = self.response.index("\n", next_header)
+        
+        self.assertEqual(parser.feed(self.response[:next_header]), [])
+        
+        completed = parser.feed(self.response[next_header:header_end])
+        self.assertEqual(completed, [("personality_overview", "Thoughtful and calm.")])
+    
+    def test_matches_full_parse_for_any_chunking(self):
+        """
+        Test that streamed sections equal a full parse regardless of chunk size.
+        """
+        expected = ResponseProcessor()._extract_sections(self.response, self.layout)
+        
+        for chunk_size in (1, 2, 3, 7, 50, len(self.response)):
+            parser = StreamingSectionParser(self.layout)
+            sections = []
+            for i in range(0, len(self.response), chunk_size):
+                sections.extend(parser.feed(self.response[i:i + chunk_size]))
+            sections.extend(parser.close())
+            
+            self.assertEqual(dict(sections), expected)
+            self.assertEqual(len(sections), len(self.layout))
+    
+    def test_scans_only_unparsed_tail(self):
+        """
+        Test that each chunk is scanned with a bounded overlap, not the whole text.
+        """
+        parser = StreamingSectionParser(self.layout)
+        body = self.response + "\nMore detail." * 500
+        for i in range(0, len(body), 5):
+            parser.feed(body[i:i + 5])
+            self.assertLess(len(parser._tail), parser._max_marker_length + 5)
+        
+        self.assertEqual(parser.text, body)
+        self.assertTrue(parser.close()[-1][1].endswith("More detail."))
+    
+    def test_framework_streams_profile(self):
+        """
+        Test that the framework streams every section of a simulated profile.
+        """
+        sections = dict(LLMFramework().stream_comprehensive_profile({"primary_energy": "Cool Blue"}))
+        
+        self.assertEqual(set(sections), set(key for key, _, _ in self.layout))
+        self.assertTrue("analytical thinking" in sections["personality_overview"])
+    
+    def test_slow_consumer_releases_slot(self):
+        """
+        Test that the scheduler slot is released once the provider finishes,
+        before the caller has consumed the stream.
+        """
+        integration = LLMIntegration(api_key="mock_key")
+        sections = integration.stream_recommendations("summary")
+        next(sections)
+        
+        deadline = time.monotonic() + 5
+        while integration.scheduler.stats()[INTERACTIVE]["running"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(integration.scheduler.stats()[INTERACTIVE]["running"], 0)
+        
+        self.assertTrue(len(dict(sections)) > 0)
+        
+        # Streams keep the priority class of the calling context
+        with llm_priority(BATCH):
+            seen = []
+            simulate = integration._simulate_llm_response
+            integration._simulate_llm_response = lambda prompt: seen.append(integration.scheduler.stats()[BATCH]["running"]) or simulate(prompt)
+            list(integration.stream_recommendations("summary"))
+        self.assertEqual(seen, [1])
+
+
+class TestSingleFlight(unittest.TestCase):
+    """
+    Test cases for coalescing identical concurrent calls.
+    """
+    
+    def run_concurrently(self, group, key, fn, count=8):
+        """
+        Call group.do from several threads at once and collect the outcomes.
+        """
+        outcomes = []
+        
+        def worker():
+            try:
+                outcomes.append(group.do(key, fn))
+            except Exception as e:
+                outcomes.append(e)
+        
+        threads = [threading.Thread(target=worker) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+    
+    def test_concurrent_calls_share_one_execution(self):
+        """
+        Test that concurrent calls with the same key run the function once.
+        """
+        calls = []
+        
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return "result"
+        
+        outcomes = self.run_concurrently(SingleFlight(), "prompt", slow)
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([result for result, _ in outcomes], ["result"] * 8)
+        self.assertTrue(all(shared for _, shared in outcomes))
+    
+    def test_errors_reach_every_waiter(self):
+        """
+        Test that a failure is raised to every coalesced caller and not cached.
+        """
+        group = SingleFlight()
+        
+        def failing():
+            time.sleep(0.1)
+            raise RuntimeError("provider unavailable")
+        
+        outcomes = self.run_concurrently(group, "prompt", failing, count=4)
+        self.assertTrue(all(isinstance(outcome, RuntimeError) for outcome in outcomes))
+        
+        # A later call runs again
+        self.assertEqual(group.do("prompt", lambda: "ok"), ("ok", False))
+        self.assertEqual(group.in_flight(), 0)
+
+
+class TestPriorityScheduler(unittest.TestCase):
+    """
+    Test cases for scheduling LLM calls between priority classes.
+    """
+    
+    def wait_for_waiting(self, scheduler, counts):
+        """
+        Wait until the scheduler has the given number of waiting calls per class.
+        """
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            stats = scheduler.stats()
+            if all(stats[name]["waiting"] == count for name, count in counts.items()):
+                return
+            time.sleep(0.01)
+        self.fail(f"Waiting calls never reached {counts}: {scheduler.stats()}")
+    
+    def test_reserved_slots(self):
+        """
+        Test that batch calls cannot take the slots reserved for interactive calls.
+        """
+        scheduler = PriorityScheduler(4, {
+            INTERACTIVE: {"weight": 4, "reserved": 1},
+            BATCH: {"weight": 1, "reserved": 0}
+        })
+        for _ in range(3):
+            scheduler.acquire(BATCH)
+        
+        blocked = threading.Thread(target=scheduler.acquire, args=(BATCH,))
+        blocked.start()
+        self.wait_for_waiting(scheduler, {BATCH: 1})
+        
+        # The reserved slot is still free for an interactive call
+        scheduler.acquire(INTERACTIVE)
+        self.assertEqual(scheduler.stats()[INTERACTIVE], {"running": 1, "waiting": 0})
+        
+        scheduler.release(BATCH)
+        blocked.join(5)
+        self.assertEqual(scheduler.stats()[BATCH], {"running": 3, "waiting": 0})
+    
+    def test_default_reservation_leaves_batch_capacity(self):
+        """
+        Test that the default reservation never takes every slot.
+        """
+        self.assertEqual(PriorityScheduler(1).reserved, {INTERACTIVE: 0, BATCH: 0})
+        self.assertEqual(PriorityScheduler(2).reserved[INTERACTIVE], 1)
+        self.assertEqual(PriorityScheduler(8).reserved[INTERACTIVE], 2)
+        
+        scheduler = PriorityScheduler(1)
+        scheduler.acquire(BATCH)
+        self.assertEqual(scheduler.stats()[BATCH], {"running": 1, "waiting": 0})
+    
+    def test_interrupted_wait_leaves_queue(self):
+        """
+        Test that a wait that raises removes the call from the queue.
+        """
+        scheduler = PriorityScheduler(1)
+        scheduler.acquire(BATCH)
+        
+        def interrupt():
+            raise KeyboardInterrupt()
+        
+        scheduler._lock.wait = interrupt
+        with self.assertRaises(KeyboardInterrupt):
+            scheduler.acquire(BATCH)
+        del scheduler._lock.wait
+        self.assertEqual(scheduler.stats()[BATCH], {"running": 1, "waiting": 0})
+        
+        scheduler.release(BATCH)
+        scheduler.acquire(INTERACTIVE)
+        self.assertEqual(scheduler.stats()[INTERACTIVE], {"running": 1, "waiting": 0})
+    
+    def test_weighted_fair_queuing(self):
+        """
+        Test that waiting classes receive slots in proportion to their weights.
+        """
+        scheduler = PriorityScheduler(1, {
+            INTERACTIVE: {"weight": 3, "reserved": 0},
+            BATCH: {"weight": 1, "reserved": 0}
+        })
+        order = []
+        
+        def call(priority_class):
+            scheduler.acquire(priority_class)
+            order.append(priority_class)
+            scheduler.release(priority_class)
+        
+        scheduler.acquire(INTERACTIVE)
+        threads = [threading.Thread(target=call, args=(BATCH,)) for _ in range(4)]
+        threads += [threading.Thread(target=call, args=(INTERACTIVE,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        self.wait_for_waiting(scheduler, {BATCH: 4, INTERACTIVE: 8})
+        
+        scheduler.release(INTERACTIVE)
+        for thread in threads:
+            thread.join(5)
+        
+        # Batch calls are not starved, but interactive calls get three slots for each batch slot
+        self.assertEqual(len(order), 12)
+        self.assertIn(BATCH, order[:2])
+        self.assertEqual(order[:8].count(INTERACTIVE), 6)
+    
+    def test_priority_context(self):
+        """
+        Test that LLM calls are scheduled under the class of the calling context.
+        """
+        integration = LLMIntegration(api_key="mock_key")
+        seen = []
+        simulate = integration._simulate_llm_response
+        
+        def record(prompt):
+            seen.append({name: stats["running"] for name, stats in integration.scheduler.stats().items()})
+            return simulate(prompt)
+        
+        integration._simulate_llm_response = record
+        self.assertEqual(current_priority(), INTERACTIVE)
+        with llm_priority(BATCH):
+            self.assertEqual(current_priority(), BATCH)
+            integration.generate_recommendations("summary")
+        integration.generate_recommendations("summary")
+        
+        self.assertEqual(current_priority(), INTERACTIVE)
+        self.assertEqual(seen, [{INTERACTIVE: 0, BATCH: 1}, {INTERACTIVE: 1, BATCH: 0}])
+    
+    def test_invalid_configuration(self):
+        """
+        Test rejection of unknown classes and over-reserved capacity.
+        """
+        with self.assertRaises(ValueError):
+            PriorityScheduler(2, {INTERACTIVE: {"reserved": 2}, BATCH: {"reserved": 1}})
+        with self.assertRaises(ValueError):
+            PriorityScheduler(2).acquire("nightly")
+
+
+class TestBatchMode(unittest.TestCase):
+    """
+    Test cases for batch submission of bulk LLM work.
+    """
+    
+    def setUp(self):
+        """
+        Set up test fixtures.
+        """
+        self.framework = LLMFramework(llm_integration=LLMIntegration(api_key="mock_key"))
+        self.directory = tempfile.TemporaryDirectory()
+        self.batch_path = os.path.join(self.directory.name, "batch.jsonl")
+    
+    def tearDown(self):
+        """
+        Remove batch files.
+        """
+        self.directory.cleanup()
+    
+    def test_batch_file_format(self):
+        """
+        Test that batch files hold one chat completion request per line.
+        """
+        count = write_batch_file(self.batch_path, [("a", "first"), ("b", "second")], "gpt-4", "system")
+        requests = list(read_batch_file(self.batch_path))
+        
+        self.assertEqual(count, 2)
+        self.assertEqual([r["custom_id"] for r in requests], ["a", "b"])
+        self.assertEqual(requests[0]["url"], "/v1/chat/completions")
+        self.assertEqual(requests[1]["body"]["model"], "gpt-4")
+        self.assertEqual(requests[1]["body"]["messages"][-1], {"role": "user", "content": "second"})
+    
+    def test_profile_batch(self):
+        """
+        Test that a profile batch yields a parsed profile for every user.
+        """
+        integration = self.framework.llm_integration
+        priorities = []
+        simulate = integration._simulate_llm_response
+        
+        def record(prompt):
+            priorities.append(current_priority())
+            return simulate(prompt)
+        
+        integration._simulate_llm_response = record
+        profiles = {f"user-{i}": {"color_ranking": ["blue", "green"], "user": i} for i in range(20)}
+        results = list(self.framework.run_profile_batch(profiles, batch_path=self.batch_path))
+        
+        self.assertEqual(sorted(custom_id for custom_id, _, _ in results), sorted(profiles))
+        self.assertTrue(all(error is None for _, _, error in results))
+        self.assertTrue(all(len(profile["personality_overview"]) > 0 for _, profile, _ in results))
+        self.assertEqual(len(list(read_batch_file(self.batch_path))), 20)
+        self.assertEqual(set(priorities), {BATCH})
+    
+    def test_backend_errors_and_temporary_file(self):
+        """
+        Test that failed requests are reported and temporary batch files removed.
+        """
+        backend = FailingBatchBackend()
+        results = list(self.framework.run_recommendations_batch({"a": "summary", "b": "summary"}, backend=backend))
+        
+        self.assertFalse(os.path.exists(backend.batch_path))
+        self.assertEqual(results[0][0], "a")
+        self.assertIn("environment", results[0][1])
+        self.assertEqual(results[1], ("b", None, "rate limited"))
+
+
+class FailingBatchBackend(BatchBackend):
+    """
+    Batch backend that answers the first request and fails the rest.
+    """
+    
+    def submit(self, batch_path):
+        self.batch_path = batch_path
+        self.requests = list(read_batch_file(batch_path))
+        return "batch-1"
+    
+    def results(self, batch_id):
+        integration = LLMIntegration(api_key="mock_key")
+        first = self.requests[0]
+        yield {"custom_id": first["custom_id"], "response": integration._generate_response(first["body"]["messages"][-1]["content"])}
+        for request in self.requests[1:]:
+            yield {"custom_id": request["custom_id"], "error": "rate limited"}
+
+
+class TestMultiUserRecommendations(unittest.TestCase):
+    """
+    Test cases for packing several users' recommendations into one call.
+    """
+    
+    def setUp(self):
+        """
+        Set up test fixtures.
+        """
+        self.integration = LLMIntegration(api_key="mock_key")
+        self.prompts = []
+        request_completion = self.integration._request_completion
+        
+        def record(prompt):
+            self.prompts.append(prompt)
+            return request_completion(prompt)
+        
+        self.integration._request_completion = record
+    
+    def test_prompt_shares_instructions(self):
+        """
+        Test that the instructions appear once, followed by every user.
+        """
+        prompt = create_multi_user_recommendations_prompt({"1": "Cool Blue {energy}", "2": "Fiery Red"})
+        
+        self.assertEqual(prompt.count("Optimal work environment"), 1)
+        self.assertIn("### User 1\nCool Blue {energy}", prompt)
+        self.assertIn("### User 2\nFiery Red", prompt)
+    
+    def test_split_user_responses(self):
+        """
+        Test demultiplexing, including a truncated final user.
+        """
+        response = "=== USER 1 ===\nfirst\n=== END USER 1 ===\n=== USER 10 ===\ntenth\n=== END USER 10 ===\n=== USER 2 ===\ncut off"
+        parts = ResponseProcessor().split_user_responses(response, ["1", "2", "10"])
+        
+        self.assertEqual(parts, {"1": "first", "10": "tenth"})
+    
+    def test_users_packed_into_calls(self):
+        """
+        Test that users are packed into calls and results match single-user calls.
+        """
+        summaries = {f"user-{i}": f"Summary {i}" for i in range(5)}
+        results = self.integration.generate_recommendations_for_users(summaries, users_per_call=2)
+        
+        self.assertEqual(len(self.prompts), 3)
+        self.assertEqual(list(results), list(summaries))
+        expected = self.integration.generate_recommendations("Summary 0")
+        for recommendations in results.values():
+            self.assertEqual(recommendations["communication_strategies"], expected["communication_strategies"])
+            self.assertEqual(recommendations["environment"], expected["environment"])
+    
+    def test_missing_user_falls_back_to_single_call(self):
+        """
+        Test that a user dropped from the response is retried on its own.
+        """
+        record = self.integration._request_completion
+        self.integration._request_completion = lambda prompt: record(prompt).split("=== USER 2 ===")[0]
+        
+        results = self.integration.generate_recommendations_for_users({"a": "A", "b": "B"})
+        
+        self.assertEqual(len(self.prompts), 2)
+        self.assertNotIn("=== USER", self.prompts[1])
+        self.assertTrue(len(results["b"]["communication_strategies"]) > 0)
+
+
+class TestSectionRepair(unittest.TestCase):
+    """
+    Test cases for re-asking for missing sections.
+    """
+    
+    def setUp(self):
+        """
+        Set up test fixtures.
+        """
+        self.processor = ResponseProcessor()
+        self.integration = LLMIntegration(api_key="mock_key")
+        self.full = self.integration._simulate_llm_response(create_comprehensive_profile_prompt({"primary_color": "blue"}))
+        
+        # A completion that stops part-way through the fourth section
+        self.truncated = self.full[:self.full.index("## 4. Interpersonal Dynamics") + len("## 4. Interpersonal")]
+    
+    def test_find_missing_sections(self):
+        """
+        Test detection of missing and empty sections.
+        """
+        layout = ResponseProcessor.COMPREHENSIVE_PROFILE_SECTIONS
+        
+        self.assertEqual(self.processor.find_missing_sections(self.full, layout), [])
+        self.assertEqual(
+            self.processor.find_missing_sections(self.truncated, layout),
+            ["interpersonal_dynamics", "environmental_preferences", "growth_opportunities", "practical_applications"]
+        )
+    
+    def test_merge_sections(self):
+        """
+        Test that merged responses keep present sections and fill missing ones.
+        """
+        layout = ResponseProcessor.COMPREHENSIVE_PROFILE_SECTIONS
+        merged = self.processor.merge_sections(self.truncated, self.full, layout)
+        
+        self.assertTrue(merged.startswith("# Comprehensive Psychological Profile"))
+        self.assertEqual(self.processor.find_missing_sections(merged, layout), [])
+        
+        expected = self.processor.process_comprehensive_profile(self.full)
+        result = self.processor.process_comprehensive_profile(merged)
+        for key, _, _ in layout:
+            self.assertEqual(result[key], expected[key])
+    
+    def test_profile_generation_reasks_for_missing_sections(self):
+        """
+        Test that an incomplete completion triggers one follow-up for only the
+        missing sections.
+        """
+        prompts = []
+        
+        def request_completion(prompt):
+            prompts.append(prompt)
+            return self.truncated if len(prompts) == 1 else self.full
+        
+        self.integration._request_completion = request_completion
+        profile = self.integration.generate_comprehensive_profile({"primary_color": "blue"})
+        
+        self.assertEqual(len(prompts), 2)
+        self.assertIn("## 5. Environmental Preferences", prompts[1])
+        self.assertNotIn("## 1. Personality Overview", prompts[1].split("exactly as written:")[1])
+        self.assertTrue(len(profile["practical_applications"]) > 0)
+        
+        # Complete completions need no follow-up
+        prompts.clear()
+        self.integration._request_completion = lambda prompt: prompts.append(prompt) or self.full
+        self.integration.generate_comprehensive_profile({"primary_color": "green"})
+        self.assertEqual(len(prompts), 1)
+    
+    def test_failed_repair_keeps_partial_response(self):
+        """
+        Test that a failing follow-up returns the sections the first completion had.
+        """
+        prompts = []
+        
+        def request_completion(prompt):
+            prompts.append(prompt)
+            if len(prompts) == 1:
+                return self.truncated
+            raise LLMServiceError("Service unavailable", status_code=503)
+        
+        self.integration._request_completion = request_completion
+        with self.assertLogs("code.llm_integration.llm_integration", "WARNING"):
+            profile = self.integration.generate_comprehensive_profile({"primary_color": "blue"})
+        
+        self.assertEqual(len(prompts), 2)
+        expected = self.processor.process_comprehensive_profile(self.full)
+        self.assertEqual(profile["personality_overview"], expected["personality_overview"])
+        self.assertEqual(profile["practical_applications"], "")
+
+
+class TestModelRouter(unittest.TestCase):
+    """
+    Test cases for routing call types to model tiers.
+    """
+    
+    def setUp(self):
+        """
+        Set up test fixtures.
+        """
+        self.router = ModelRouter(
+            {
+                COMPREHENSIVE_PROFILE: ["gpt-4", "gpt-4o-mini", "gpt-3.5-turbo"],
+                RECOMMENDATIONS: ["gpt-3.5-turbo"]
+            },
+            expected_latency={"gpt-4": 8.0, "gpt-4o-mini": 3.0, "gpt-3.5-turbo": 1.0}
+        )
+    
+    def test_route_within_budget(self):
+        """
+        Test downgrading to the first tier that fits the latency budget.
+        """
+        self.assertEqual(self.router.route(COMPREHENSIVE_PROFILE), "gpt-4")
+        self.assertEqual(self.router.route(COMPREHENSIVE_PROFILE, latency_budget=10), "gpt-4")
+        self.assertEqual(self.router.route(COMPREHENSIVE_PROFILE, latency_budget=5), "gpt-4o-mini")
+        self.assertEqual(self.router.route(COMPREHENSIVE_PROFILE, latency_budget=0.1), "gpt-3.5-turbo")
+        self.assertEqual(self.router.route(RECOMMENDATIONS, latency_budget=0.1), "gpt-3.5-turbo")
+        
+        # Unrouted call types use the first route
+        self.assertEqual(self.router.route("jung_energy"), "gpt-4")
+    
+    def test_latency_estimates_follow_observations(self):
+        """
+        Test that observed latencies move the estimates.
+        """
+        self.router.record("gpt-4", 3.0)
+        self.assertAlmostEqual(self.router.expected_latency("gpt-4"), 7.0)
+        
+        for _ in range(30):
+            self.router.record("gpt-4", 3.0)
+        self.assertEqual(self.router.route(COMPREHENSIVE_PROFILE, latency_budget=5), "gpt-4")
+        
+        with self.assertRaises(ValueError):
+            ModelRouter({RECOMMENDATIONS: []})
+    
+    def test_models_without_estimates(self):
+        """
+        Test that models without a latency estimate never break routing.
+        """
+        router = ModelRouter({RECOMMENDATIONS: ["gpt-4", "gpt-3.5-turbo"]}, expected_latency={"gpt-3.5-turbo": 1.0})
+        self.assertEqual(router.route(RECOMMENDATIONS, latency_budget=-1), "gpt-3.5-turbo")
+        
+        router = ModelRouter({RECOMMENDATIONS: ["gpt-4", "gpt-3.5-turbo"]})
+        self.assertEqual(router.route(RECOMMENDATIONS, latency_budget=-1), "gpt-4")
+    
+    def test_from_environment(self):
+        """
+        Test that routing is configured only when MODEL_ROUTES is set.
+        """
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertIsNone(ModelRouter.from_environment())
+        
+        environment = {
+            "MODEL_ROUTES": json.dumps({RECOMMENDATIONS: ["gpt-4o-mini"], COMPREHENSIVE_PROFILE: ["gpt-4", "gpt-4o-mini"]}),
+            "MODEL_EXPECTED_LATENCY": json.dumps({"gpt-4": 8.0})
+        }
+        with mock.patch.dict(os.environ, environment, clear=True):
+            router = ModelRouter.from_environment()
+        self.assertEqual(router.route(RECOMMENDATIONS), "gpt-4o-mini")
+        self.assertEqual(router.route(COMPREHENSIVE_PROFILE, latency_budget=5), "gpt-4o-mini")
+    
+    def test_framework_routes_calls(self):
+        """
+        Test that the framework sends each call type to its routed model.
+        """
+        framework = LLMFramework(api_key="mock_key", llm_integration=LLMIntegration(api_key="mock_key"), router=self.router)
+        
+        recommendations = framework.generate_recommendations("summary")
+        self.assertIn("environment", recommendations)
+        self.assertIsNotNone(self.router.expected_latency("gpt-3.5-turbo"))
+        self.assertEqual(self.router.expected_latency("gpt-4"), 8.0)
+        
+        framework.generate_comprehensive_profile({"primary_color": "blue"}, latency_budget=5)
+        self.assertNotEqual(self.router.expected_latency("gpt-4o-mini"), 3.0)
+        self.assertEqual(self.router.expected_latency("gpt-4"), 8.0)
+        
+        # Without a router every call uses the framework's own client
+        default = LLMFramework(api_key="mock_key")
+        self.assertIs(default._client(default.router.route(RECOMMENDATIONS)), default.llm_integration)
+
+
+class TestSimulatedProvider(unittest.TestCase):
+    """
+    Test cases for the simulated LLM service.
+    """
+    
+    def setUp(self):
+        """
+        Set up test fixtures.
+        """
+        self.waits = []
+        self.response = "## 1. First\n\nOne two three.\n\n## 2. Second\n\nFour five six."
+        self.respond = lambda prompt: self.response
+    
+    def provider(self, **options):
+        """
+        Create a provider recording its waits instead of sleeping.
+        """
+        return SimulatedProvider(seed=1, sleep=self.waits.append, **options)
+    
+    def test_default_is_instant(self):
+        """
+        Test that the default provider returns the response without waiting.
+        """
+        provider = self.provider()
+        self.assertEqual(provider.complete("prompt", self.respond), self.response)
+        self.assertEqual("".join(provider.stream("prompt", self.respond)), self.response)
+        self.assertEqual(self.waits, [])
+    
+    def test_latency(self):
+        """
+        Test time to first token and token rate, in full and streamed calls.
+        """
+        provider = self.provider(time_to_first_token=0.5, jitter=0, tokens_per_second=10)
+        provider.complete("prompt", self.respond)
+        self.assertAlmostEqual(self.waits.pop(), 0.5 + 0.1 * 11)
+        
+        tokens = list(provider.stream("prompt", self.respond))
+        self.assertEqual(len(tokens), 12)
+        self.assertEqual(self.waits[0], 0.5)
+        self.assertEqual(self.waits[1:], [0.1] * 11)
+    
+    def test_heavy_tail(self):
+        """
+        Test that tail responses are slower than the median.
+        """
+        provider = self.provider(time_to_first_token=1.0, jitter=0, tail_probability=1.0)
+        for _ in range(20):
+            provider.complete("prompt", self.respond)
+        self.assertTrue(all(wait >= 1.0 for wait in self.waits))
+        self.assertGreater(max(self.waits), 2.0)
+    
+    def test_errors_and_rate_limits(self):
+        """
+        Test that configured failure rates raise provider errors.
+        """
+        with self.assertRaises(LLMRateLimitError) as context:
+            self.provider(rate_limit_rate=1.0, retry_after=3).complete("prompt", self.respond)
+        self.assertEqual(context.exception.status_code, 429)
+        self.assertEqual(context.exception.retry_after, 3)
+        
+        with self.assertRaises(LLMServiceError):
+            list(self.provider(error_rate=1.0).stream("prompt", self.respond))
+        
+        provider = self.provider(error_rate=0.3)
+        failures = 0
+        for _ in range(200):
+            try:
+                provider.complete("prompt", self.respond)
+            except LLMServiceError:
+                failures += 1
+        self.assertTrue(30 < failures < 90)
+    
+    def test_timeout(self):
+        """
+        Test that calls slower than the timeout fail after waiting it out.
+        """
+        provider = self.provider(time_to_first_token=0.5, jitter=0, tokens_per_second=10, timeout=1.0)
+        with self.assertRaises(LLMTimeoutError):
+            provider.complete("prompt", self.respond)
+        self.assertEqual(self.waits, [1.0])
+        
+        self.waits.clear()
+        stream = provider.stream("prompt", self.respond)
+        with self.assertRaises(LLMTimeoutError):
+            for _ in stream:
+                pass
+        self.assertAlmostEqual(sum(self.waits), 1.0)
+    
+    def test_size_variation(self):
+        """
+        Test that response lengths vary while section headings stay intact.
+        """
+        provider = self.provider(size_variation=0.5)
+        lengths = set()
+        for _ in range(20):
+            response = provider.complete("prompt", self.respond)
+            lengths.add(len(response))
+            if len(response) > len(self.response):
+                self.assertTrue(response.startswith(self.response))
+                self.assertEqual(response.count("##"), 2)
+        self.assertGreater(len(lengths), 5)
+    
+    def test_integration_uses_simulator(self):
+        """
+        Test that the integration's calls go through its simulated provider.
+        """
+        integration = LLMIntegration(api_key="mock_key", simulator=self.provider(rate_limit_rate=1.0))
+        with self.assertRaises(LLMRateLimitError):
+            integration.generate_recommendations("summary")
+        
+        integration = LLMIntegration(api_key="mock_key", simulator=SimulatedProvider.from_profile("fast", tokens_per_second=5000, seed=2))
+        start = time.monotonic()
+        sections = list(integration.stream_recommendations("summary"))
+        self.assertGreater(time.monotonic() - start, 0.1)
+        self.assertEqual(len(sections), 7)
+        
+        with self.assertRaises(ValueError):
+            SimulatedProvider.from_profile("unknown")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import sys
+import os
+import random
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from code.observability.metrics import MetricsRegistry, REGISTRY, estimate_tokens
+from code.llm_integration import LLMIntegration, SimulatedProvider, LLMRateLimitError, get_shared_client, clear_shared_clients, INTERACTIVE
+
+class TestMetricsRegistry(unittest.TestCase):
+    """
+    Test cases for counters, gauges and histograms.
+    """
+    
+    def setUp(self):
+        """
+        Set up test fixtures.
+        """
+        self.registry = MetricsRegistry()
+    
+    def test_counters_and_gauges(self):
+        """
+        Test counting, labels and the exposition format.
+        """
+        requests = self.registry.counter("requests_total", "Requests.", ("status",))
+        requests.inc(status=200)
+        requests.inc(2, status=200)
+        requests.inc(status='bad "code"')
+        self.assertEqual(requests.value(status=200), 3)
+        self.assertIs(self.registry.counter("requests_total", "Requests.", ("status",)), requests)
+        
+        with self.assertRaises(ValueError):
+            requests.inc(-1, status=200)
+        with self.assertRaises(ValueError):
+            requests.inc(model="gpt-4")
+        with self.assertRaises(ValueError):
+            self.registry.gauge("requests_total", "Requests.")
+        
+        depth = self.registry.gauge("queue_depth", "Queue depth.")
+        self.registry.register_collector("queue", lambda: depth.set(7))
+        
+        text = self.registry.render()
+        self.assertIn("# TYPE requests_total counter", text)
+        self.assertIn('requests_total{status="200"} 3', text)
+        self.assertIn('requests_total{status="bad \\"code\\""} 1', text)
+        self.assertIn("queue_depth 7", text)
+        self.assertTrue(text.endswith("\n"))
+    
+    def test_histogram_percentiles(self):
+        """
+        Test that histogram percentiles stay within the relative error bound.
+        """
+        latency = self.registry.histogram("latency_seconds", "Latency.", ("model",), buckets=(0.01, 0.1, 1.0))
+        rng = random.Random(1)
+        values = sorted(rng.lognormvariate(-3, 1.5) for _ in range(5000))
+        for value in values:
+            latency.observe(value, model="a")
+        latency.observe(0, model="a")
+        
+        self.assertEqual(latency.count(model="a"), 5001)
+        for pct in (50, 90, 99):
+            exact = values[int(len(values) * pct / 100) - 1]
+            self.assertAlmostEqual(latency.percentile(pct, model="a") / exact, 1.0, delta=0.04)
+        self.assertEqual(latency.percentile(100, model="a"), values[-1])
+        self.assertIsNone(latency.percentile(50, model="b"))
+        
+        text = self.registry.render()
+        below = sum(1 for value in values if value <= 0.1) + 1
+        bucket = next(line for line in text.splitlines() if 'le="0.1"' in line)
+        self.assertAlmostEqual(int(bucket.split()[-1]), below, delta=below * 0.04)
+        self.assertIn('latency_seconds_bucket{model="a",le="+Inf"} 5001', text)
+        self.assertIn('latency_seconds_count{model="a"} 5001', text)
+    
+    def test_llm_metrics(self):
+        """
+        Test that LLM requests record outcomes and token counts.
+        """
+        requests = REGISTRY.counter("psycho_color_llm_requests_total", "", ("model", "outcome"))
+        tokens = REGISTRY.counter("psycho_color_llm_completion_tokens_total", "", ("model",))
+        
+        integration = LLMIntegration(model="metrics-test")
+        integration.generate_recommendations("summary")
+        self.assertEqual(requests.value(model="metrics-test", outcome="ok"), 1)
+        self.assertGreater(tokens.value(model="metrics-test"), 100)
+        
+        integration = LLMIntegration(model="metrics-test", simulator=SimulatedProvider(rate_limit_rate=1.0))
+        with self.assertRaises(LLMRateLimitError):
+            integration.generate_recommendations("summary")
+        self.assertEqual(requests.value(model="metrics-test", outcome="rate_limited"), 1)
+        
+        self.assertNotIn('model="metrics-test",priority="interactive"', REGISTRY.render())
+        
+        # Only shared clients report their scheduler, under their own collector
+        shared = get_shared_client(model="metrics-test")
+        LLMIntegration(model="metrics-test").scheduler.acquire(INTERACTIVE)
+        self.assertIn('psycho_color_llm_scheduler_requests{model="metrics-test",priority="interactive",state="running"} 0', REGISTRY.render())
+        
+        shared.scheduler.acquire(INTERACTIVE)
+        self.assertIn('psycho_color_llm_scheduler_requests{model="metrics-test",priority="interactive",state="running"} 1', REGISTRY.render())
+        shared.scheduler.release(INTERACTIVE)
+        
+        clear_shared_clients()
+        self.assertNotIn(("llm_scheduler", "openai", "metrics-test", None), REGISTRY._collectors)
+        self.assertEqual(estimate_tokens("abcdefgh"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,11 +2,18 @@ import unittest
 import sys
 import os
 import json
+import time
+import threading
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from code.color_analysis.profile_generator import ProfileGenerator
+from code.color_analysis.profile_generator import ProfileGenerator, CompactProfile
 from code.color_analysis.api import PsychoColorAPI
+from code.color_analysis.jobs import ProfileJobStore, JobStoreFull
+from code.color_analysis.data_processor import ColorDataProcessor
+from code.llm_integration import ResponseProcessor
+from code.llm_integration import get_shared_client, clear_shared_clients, LLMServiceError
+from code.llm_integration.routing import ModelRouter, COMPREHENSIVE_PROFILE, RECOMMENDATIONS
 
 class TestProfileGenerator(unittest.TestCase):
     """
@@ -274,6 +281,293 @@ class TestPsychoColorAPI(unittest.TestCase):
         self.assertTrue("growth_opportunities" in result)
 
 
+class TestRequestCoalescing(unittest.TestCase):
+    """
+    Test cases for coalescing identical concurrent analyses.
+    """
+    
+    def test_identical_requests_share_one_profile(self):
+        """
+        Test that concurrent identical requests generate the profile once and
+        each receive an independent copy.
+        """
+        api = PsychoColorAPI(api_key="mock_key")
+        api.profile_generator = SlowMockProfileGenerator()
+        
+        # Alias spellings normalize to the same canonical data
+        requests = [{"color_ranking": ["Navy", "sage"]}, {"color_ranking": ["blue", "green"]}] * 3
+        results = []
+        threads = [threading.Thread(target=lambda data=data: results.append(api.analyze_color_preferences(data))) for data in requests]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(api.profile_generator.calls, 1)
+        self.assertEqual(len(results), 6)
+        
+        results[0]["profile"]["personality_overview"] = "changed"
+        self.assertTrue(all(r["profile"]["personality_overview"] != "changed" for r in results[1:]))
+
+
+class TestProfileJobs(unittest.TestCase):
+    """
+    Test cases for instant analysis with background profile generation.
+    """
+    
+    def setUp(self):
+        """
+        Set up test fixtures.
+        """
+        self.api = PsychoColorAPI(api_key="mock_key")
+        self.api.profile_generator = SlowMockProfileGenerator()
+    
+    def test_submit_returns_analysis_before_profile(self):
+        """
+        Test that the analysis is returned at once and the profile can be
+        long-polled for.
+        """
+        start = time.monotonic()
+        job = self.api.submit_color_preferences({"primary_color": "blue", "secondary_color": "green"})
+        self.assertLess(time.monotonic() - start, 0.2)
+        
+        self.assertEqual(job["status"], "pending")
+        self.assertNotIn("profile", job)
+        self.assertEqual(job["analysis_results"]["jung_color_energies"]["primary_energy"], "Cool Blue")
+        
+        self.assertEqual(self.api.get_profile_job(job["job_id"])["status"], "pending")
+        
+        finished = self.api.get_profile_job(job["job_id"], wait=5)
+        self.assertEqual(finished["status"], "complete")
+        self.assertIn("personality_overview", finished["profile"])
+        self.assertEqual(self.api.profile_generator.calls, 1)
+    
+    def test_failed_and_unknown_jobs(self):
+        """
+        Test job failure reporting and unknown job IDs.
+        """
+        def fail(analysis_results):
+            raise RuntimeError("LLM unavailable")
+        
+        self.api.profile_generator.generate_profile = fail
+        job = self.api.submit_color_preferences({"primary_color": "red"})
+        
+        finished = self.api.get_profile_job(job["job_id"], wait=5)
+        self.assertEqual(finished["status"], "failed")
+        self.assertEqual(finished["error"], "LLM unavailable")
+        
+        self.assertIsNone(self.api.get_profile_job("missing"))
+    
+    def test_pending_jobs_are_bounded(self):
+        """
+        Test that submissions beyond max_pending are rejected until a job finishes.
+        """
+        store = ProfileJobStore(max_workers=1, max_pending=2)
+        release = threading.Event()
+        
+        jobs = [store.submit({}, release.wait, 5) for _ in range(2)]
+        with self.assertRaises(JobStoreFull):
+            store.submit({}, release.wait, 5)
+        
+        release.set()
+        self.assertTrue(all(job.wait(5) for job in jobs))
+        store.submit({}, release.wait, 5).wait(5)
+        self.assertEqual(store.stats(), {"complete": 3})
+
+
+class TestTemplateRenderer(unittest.TestCase):
+    """
+    Test cases for rendering profiles without the LLM.
+    """
+    
+    def setUp(self):
+        """
+        Set up test fixtures.
+        """
+        self.profile_generator = ProfileGenerator(api_key="mock_key")
+        data_processor = ColorDataProcessor()
+        processed_data = data_processor.process_color_preferences({"color_ranking": ["blue", "green", "yellow", "red"]})
+        self.analysis_results = data_processor.analyze_color_data(processed_data)
+    
+    def test_rendered_profile_matches_generated_structure(self):
+        """
+        Test that a rendered profile has the keys and section layout of a generated one.
+        """
+        def structure(value):
+            if isinstance(value, dict):
+                return {key: structure(item) for key, item in value.items()}
+            return type(value)
+        
+        rendered = self.profile_generator.render_profile(self.analysis_results)
+        generated = self.profile_generator.generate_profile(self.analysis_results)
+        self.assertEqual(structure(rendered), structure(generated))
+        
+        self.assertIn("Cool Blue", rendered["jung_color_energies"]["description"])
+        self.assertIn("solitude", rendered["personality_overview"])
+        self.assertEqual(rendered, self.profile_generator.render_profile(self.analysis_results))
+        
+        # The full texts parse back into the same sections
+        reparsed = ResponseProcessor().process_recommendations(rendered["recommendations"]["full_recommendations"])
+        self.assertEqual(reparsed["communication_strategies"], rendered["recommendations"]["communication_strategies"])
+        self.assertEqual(reparsed["environment"], rendered["recommendations"]["environment"])
+    
+    def test_fallback_when_llm_fails(self):
+        """
+        Test that the profile is rendered from templates when the LLM fails,
+        only if the fallback is enabled.
+        """
+        def fail(profile_data):
+            raise LLMServiceError("LLM unavailable", status_code=503)
+        
+        self.profile_generator._generate_llm_content = fail
+        with self.assertRaises(LLMServiceError):
+            self.profile_generator.generate_profile(self.analysis_results)
+        
+        self.profile_generator.template_fallback = True
+        profile = self.profile_generator.generate_profile(self.analysis_results)
+        self.assertEqual(profile.pop("source"), "template")
+        self.assertEqual(profile, self.profile_generator.render_profile(self.analysis_results))
+        
+        # Errors that are not LLM failures are never hidden
+        def broken(profile_data):
+            raise KeyError("personality_overview")
+        
+        self.profile_generator._generate_llm_content = broken
+        with self.assertRaises(KeyError):
+            self.profile_generator.generate_profile(self.analysis_results)
+    
+    def test_api_without_llm(self):
+        """
+        Test that the API renders profiles without calling the LLM when asked to.
+        """
+        api = PsychoColorAPI(api_key="mock_key")
+        api.profile_generator._generate_llm_content = None
+        
+        result = api.analyze_color_preferences({"color_ranking": ["red", "yellow"]}, use_llm=False)
+        self.assertIn("Fiery Red", result["profile"]["jung_color_energies"]["description"])
+
+
+class TestCompactProfile(unittest.TestCase):
+    """
+    Test cases for compact profiles.
+    """
+    
+    def setUp(self):
+        """
+        Set up test fixtures.
+        """
+        self.api = PsychoColorAPI(api_key="mock_key")
+        self.color_data = {"color_ranking": ["blue", "green", "yellow", "red"], "primary_color": "blue"}
+    
+    def test_materialize_matches_full_profile(self):
+        """
+        Test that a compact profile expands to the profile it was created from.
+        """
+        for use_llm in (True, False):
+            result = self.api.analyze_color_preferences(self.color_data, use_llm=use_llm)
+            compact = CompactProfile.from_profile(result["analysis_results"], result["profile"])
+            self.assertEqual(compact.materialize(), result["profile"])
+            
+            # The stored form is smaller than the full profile
+            stored = json.dumps(compact.to_dict())
+            self.assertLess(len(stored), len(json.dumps(result["profile"])) * 0.6)
+            
+            loaded = CompactProfile.from_dict(json.loads(stored), result["analysis_results"])
+            self.assertTrue(CompactProfile.is_compact(json.loads(stored)))
+            self.assertEqual(loaded.materialize(), result["profile"])
+    
+    def test_sections_are_views(self):
+        """
+        Test that sections are read from the stored responses by offset.
+        """
+        result = self.api.analyze_color_preferences(self.color_data, compact=True)
+        self.assertTrue(CompactProfile.is_compact(result["profile"]))
+        result = json.loads(json.dumps(result))
+        compact = CompactProfile.from_dict(result["profile"], result["analysis_results"])
+        self.assertIs(compact.analysis_results, result["analysis_results"])
+        
+        profile = compact.materialize()
+        self.assertEqual(compact.section("growth_opportunities"), profile["growth_opportunities"])
+        self.assertEqual(compact.section("jung_energy"), profile["jung_color_energies"]["description"])
+        self.assertTrue(compact.section("work_environment").startswith("**Colors:**"))
+        
+        start, end = compact.sections["profile"]["personality_overview"]
+        self.assertEqual(compact.profile_text[start:end], profile["personality_overview"])
+        
+        missing = CompactProfile(result["analysis_results"], "no sections here", "")
+        self.assertEqual(missing.section("personality_overview"), "")
+        self.assertEqual(missing.section("daily_practices"), "")
+        with self.assertRaises(KeyError):
+            missing.section("horoscope")
+
+
+class TestLatencyBudget(unittest.TestCase):
+    """
+    Test cases for routing profile calls within a latency budget.
+    """
+    
+    def test_tight_budget_uses_faster_tier(self):
+        """
+        Test that the API's latency budget sends profile calls to the faster tier.
+        """
+        routes = {
+            COMPREHENSIVE_PROFILE: ["gpt-4", "gpt-4o-mini"],
+            RECOMMENDATIONS: ["gpt-4", "gpt-4o-mini"]
+        }
+        expected_latency = {"gpt-4": 8.0, "gpt-4o-mini": 0.5}
+        
+        router = ModelRouter(routes, expected_latency)
+        api = PsychoColorAPI(api_key="mock_key", router=router, latency_budget=2.0)
+        result = api.analyze_color_preferences({"primary_color": "blue", "secondary_color": "green"})
+        
+        self.assertTrue(len(result["profile"]["personality_overview"]) > 0)
+        self.assertNotEqual(router.expected_latency("gpt-4o-mini"), 0.5)
+        self.assertEqual(router.expected_latency("gpt-4"), 8.0)
+        
+        # Without a budget the most capable tier is used
+        router = ModelRouter(routes, expected_latency)
+        PsychoColorAPI(api_key="mock_key", router=router).analyze_color_preferences({"primary_color": "red"})
+        self.assertNotEqual(router.expected_latency("gpt-4"), 8.0)
+        self.assertEqual(router.expected_latency("gpt-4o-mini"), 0.5)
+
+
+class TestSharedClients(unittest.TestCase):
+    """
+    Test cases for the process-wide LLM client registry.
+    """
+    
+    def tearDown(self):
+        """
+        Reset the registry between tests.
+        """
+        clear_shared_clients()
+    
+    def test_api_instances_share_llm_client(self):
+        """
+        Test that API instances with the same configuration share one client.
+        """
+        first = PsychoColorAPI(api_key="tenant_key")
+        second = PsychoColorAPI(api_key="tenant_key")
+        other = PsychoColorAPI(api_key="other_key")
+        
+        client = first.profile_generator.llm_framework.llm_integration
+        self.assertTrue(client is second.profile_generator.llm_framework.llm_integration)
+        self.assertTrue(client is get_shared_client(api_key="tenant_key"))
+        self.assertFalse(client is other.profile_generator.llm_framework.llm_integration)
+        
+        # Connection pool is created once and reused
+        self.assertTrue(client.session is client.session)
+    
+    def test_clear_shared_clients(self):
+        """
+        Test that clearing the registry creates fresh clients afterwards.
+        """
+        client = get_shared_client(api_key="tenant_key", model="gpt-4")
+        clear_shared_clients()
+        
+        self.assertFalse(client is get_shared_client(api_key="tenant_key", model="gpt-4"))
+
+
 # Mock classes for testing
 
 class MockLLMFramework:
@@ -281,7 +575,7 @@ class MockLLMFramework:
     Mock LLM Framework for testing.
     """
     
-    def generate_comprehensive_profile(self, profile_data):
+    def generate_comprehensive_profile(self, profile_data, latency_budget=None):
         """
         Mock method to generate a comprehensive profile.
         """
@@ -296,7 +590,7 @@ class MockLLMFramework:
             "full_profile": "Comprehensive analysis of your personality based on color preferences."
         }
     
-    def generate_recommendations(self, profile_summary):
+    def generate_recommendations(self, profile_summary, latency_budget=None):
         """
         Mock method to generate recommendations.
         """
@@ -348,5 +642,23 @@ class MockProfileGenerator:
         }
 
 
+
+class SlowMockProfileGenerator(MockProfileGenerator):
+    """
+    Mock Profile Generator that counts calls and takes time to respond.
+    """
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def generate_profile(self, analysis_results):
+        """
+        Mock method to generate a profile slowly.
+        """
+        self.calls += 1
+        time.sleep(0.2)
+        return super().generate_profile(analysis_results)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+import pstats
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from code.color_analysis import PsychoColorAPI
+from code.observability import SamplingProfiler
+
+class TestSamplingProfiler(unittest.TestCase):
+    """
+    Test cases for sampled request profiling.
+    """
+    
+    def setUp(self):
+        """
+        Set up test fixtures.
+        """
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tempdir.name, "profiles")
+        self.color_data = {"color_ranking": ["red", "yellow", "blue", "green"]}
+    
+    def tearDown(self):
+        """
+        Clean up test fixtures.
+        """
+        self.tempdir.cleanup()
+    
+    def test_reports_are_aggregated_and_rotated(self):
+        """
+        Test that sampled requests are aggregated into rotating reports.
+        """
+        profiler = SamplingProfiler(self.directory, sample_rate=1.0, report_every=2, max_reports=2)
+        api = PsychoColorAPI(profiler=profiler)
+        for _ in range(6):
+            api.analyze_color_preferences(self.color_data, use_llm=False)
+        
+        reports = sorted(os.listdir(self.directory))
+        self.assertEqual(len(reports), 4)
+        self.assertTrue(reports[0].endswith("-000002.pstats"))
+        
+        with open(os.path.join(self.directory, reports[-1]), encoding="utf-8") as report:
+            text = report.read()
+        self.assertIn("Sampled requests: 2 (analyze_color_preferences=2)", text)
+        self.assertIn("Hot functions", text)
+        self.assertIn("analyze_color_data", text)
+        self.assertIn("bytes/request", text)
+        
+        stats = pstats.Stats(os.path.join(self.directory, reports[-2]))
+        self.assertGreater(stats.total_calls, 0)
+    
+    def test_sampling(self):
+        """
+        Test that unsampled requests are not profiled and samples do not nest.
+        """
+        profiler = SamplingProfiler(self.directory, sample_rate=0.0)
+        api = PsychoColorAPI(profiler=profiler)
+        api.analyze_color_preferences(self.color_data, use_llm=False)
+        self.assertIsNone(profiler.flush())
+        self.assertFalse(os.path.exists(self.directory))
+        
+        profiler = SamplingProfiler(self.directory, sample_rate=1.0, trace_allocations=False)
+        with profiler.sample("outer") as outer:
+            with profiler.sample("inner") as inner:
+                sum(range(1000))
+        self.assertTrue(outer)
+        self.assertFalse(inner)
+        
+        with open(profiler.flush(), encoding="utf-8") as report:
+            text = report.read()
+        self.assertIn("Sampled requests: 1 (outer=1)", text)
+        self.assertNotIn("bytes/request", text)
+        
+        with self.assertRaises(ValueError):
+            SamplingProfiler(self.directory, sample_rate=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
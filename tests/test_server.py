@@ -0,0 +1,345 @@
+import unittest
+import sys
+import os
+import json
+import asyncio
+import threading
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from code.color_analysis.server import PsychoColorApp, format_event
+from code.color_analysis.jobs import ProfileJobStore
+
+def call_app(app, method, path, body=b""):
+    """
+    Drive an ASGI application with a single HTTP request.
+    
+    Returns:
+        tuple: (status, headers, list of body chunks)
+    """
+    return asyncio.run(request_app(app, method, path, body))
+
+async def request_app(app, method, path, body=b""):
+    """
+    Send a single HTTP request to an ASGI application from a running loop.
+    
+    Returns:
+        tuple: (status, headers, list of body chunks)
+    """
+    messages = []
+    request = [{"type": "http.request", "body": body, "more_body": False}]
+    
+    async def receive():
+        if request:
+            return request.pop(0)
+        return {"type": "http.disconnect"}
+    
+    async def send(message):
+        messages.append(message)
+    
+    path, _, query = path.partition("?")
+    scope = {"type": "http", "method": method, "path": path, "query_string": query.encode(), "headers": []}
+    await app(scope, receive, send)
+    
+    start = messages[0]
+    chunks = [m.get("body", b"") for m in messages[1:]]
+    return start["status"], dict(start["headers"]), chunks
+
+def parse_events(chunks):
+    """
+    Parse server-sent events from response body chunks.
+    """
+    events = []
+    for block in b"".join(chunks).decode("utf-8").split("\n\n"):
+        if not block:
+            continue
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+class TestStreamingEndpoint(unittest.TestCase):
+    """
+    Test cases for the server-sent events profile endpoint.
+    
+    Note: These tests run against the simulated LLM responses.
+    """
+    
+    def setUp(self):
+        """
+        Set up test fixtures.
+        """
+        self.app = PsychoColorApp()
+        self.color_data = {
+            "color_ranking": ["blue", "green", "purple", "red", "yellow"],
+            "work_color": "blue",
+            "relaxation_color": "green"
+        }
+    
+    def test_stream_sections_in_order(self):
+        """
+        Test that deterministic sections stream before the LLM sections.
+        """
+        status, headers, chunks = call_app(self.app, "POST", "/api/analyze/stream", json.dumps(self.color_data).encode())
+        
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b"content-type"], b"text/event-stream")
+        
+        # Each section arrives in its own body chunk
+        events = parse_events(chunks)
+        self.assertEqual(len(events), len(chunks))
+        names = [name for name, _ in events]
+        
+        self.assertEqual(names[:4], ["jung_color_energies", "personality_dimensions", "emotional_tendencies", "contextual_analysis"])
+        self.assertEqual(events[0][1]["primary_energy"], "Cool Blue")
+        self.assertTrue(names.index("personality_overview") < names.index("recommendations.work_environment"))
+        self.assertTrue("analytical thinking" in dict(events)["personality_overview"])
+        self.assertEqual(names[-1], "done")
+    
+    def test_invalid_requests(self):
+        """
+        Test error responses for bad bodies, methods and paths.
+        """
+        status, _, _ = call_app(self.app, "POST", "/api/analyze/stream", b"not json")
+        self.assertEqual(status, 400)
+        
+        status, _, _ = call_app(self.app, "GET", "/api/analyze/stream")
+        self.assertEqual(status, 405)
+        
+        status, _, _ = call_app(self.app, "GET", "/missing")
+        self.assertEqual(status, 404)
+    
+    def test_pipeline_error_is_generic(self):
+        """
+        Test that a failing pipeline ends the stream without exposing the error.
+        """
+        api = StreamingAPI(fail=True)
+        app = PsychoColorApp(api=api)
+        with self.assertLogs("code.color_analysis.server", "ERROR"):
+            status, _, chunks = call_app(app, "POST", "/api/analyze/stream", json.dumps(self.color_data).encode())
+        
+        self.assertEqual(status, 200)
+        events = parse_events(chunks)
+        self.assertEqual(events[-1], ("error", {"error": "Profile generation failed"}))
+        self.assertNotIn(b"internal detail", b"".join(chunks))
+        self.assertTrue(api.closed)
+    
+    def test_disconnect_closes_sections(self):
+        """
+        Test that a client disconnect closes the section iterator.
+        """
+        api = StreamingAPI()
+        app = PsychoColorApp(api=api)
+        messages = []
+        request = [{"type": "http.request", "body": json.dumps(self.color_data).encode(), "more_body": False}]
+        
+        async def receive():
+            return request.pop(0) if request else {"type": "http.disconnect"}
+        
+        async def send(message):
+            messages.append(message)
+            if len(messages) > 2:
+                raise OSError("client disconnected")
+        
+        scope = {"type": "http", "method": "POST", "path": "/api/analyze/stream", "query_string": b"", "headers": []}
+        with self.assertRaises(OSError):
+            asyncio.run(app(scope, receive, send))
+        
+        self.assertEqual(len(messages), 3)
+        self.assertTrue(api.closed)
+        self.assertEqual(app.in_flight, 0)
+    
+    def test_format_event(self):
+        """
+        Test server-sent event encoding.
+        """
+        self.assertEqual(format_event("done", {}), b"event: done\ndata: {}\n\n")
+        self.assertEqual(format_event("text", "a\nb"), b'event: text\ndata: "a\\nb"\n\n')
+
+
+class TestAnalyzeService(unittest.TestCase):
+    """
+    Test cases for the blocking analysis endpoint, load shedding and draining.
+    """
+    
+    def test_analyze_endpoint(self):
+        """
+        Test that /api/analyze returns the complete analysis and profile.
+        """
+        app = PsychoColorApp()
+        body = json.dumps({"primary_color": "blue", "secondary_color": "green"}).encode()
+        status, headers, chunks = call_app(app, "POST", "/api/analyze", body)
+        
+        self.assertEqual(status, 200)
+        result = json.loads(b"".join(chunks))
+        self.assertEqual(result["analysis_results"]["jung_color_energies"]["primary_energy"], "Cool Blue")
+        self.assertTrue(len(result["profile"]["personality_overview"]) > 0)
+        
+        status, _, chunks = call_app(app, "GET", "/health")
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(b"".join(chunks))["in_flight"], 0)
+    
+    def test_request_body_limit(self):
+        """
+        Test that bodies longer than max_body_bytes are rejected with a 413.
+        """
+        app = PsychoColorApp(max_body_bytes=64)
+        body = json.dumps({"primary_color": "blue", "notes": "x" * 100}).encode()
+        
+        for path in ("/api/analyze", "/api/analyze/stream", "/api/analyze/async"):
+            status, _, chunks = call_app(app, "POST", path, body)
+            self.assertEqual(status, 413)
+            self.assertTrue("64 bytes" in json.loads(b"".join(chunks))["error"])
+        
+        status, _, _ = call_app(app, "POST", "/api/analyze", json.dumps({"primary_color": "blue"}).encode())
+        self.assertEqual(status, 200)
+        self.assertEqual(app.in_flight, 0)
+    
+    def test_import_does_not_create_app(self):
+        """
+        Test that importing the server module leaves building the app to the entrypoint.
+        """
+        from code.color_analysis import server
+        
+        self.assertFalse(hasattr(server, "app"))
+        self.assertIsInstance(server.create_app(), PsychoColorApp)
+    
+    def test_async_analysis_and_job_polling(self):
+        """
+        Test that /api/analyze/async responds with the analysis and a job that
+        can be long-polled for the profile.
+        """
+        app = PsychoColorApp()
+        body = json.dumps({"primary_color": "blue", "secondary_color": "green"}).encode()
+        status, headers, chunks = call_app(app, "POST", "/api/analyze/async", body)
+        
+        self.assertEqual(status, 202)
+        job = json.loads(b"".join(chunks))
+        self.assertEqual(job["analysis_results"]["jung_color_energies"]["primary_energy"], "Cool Blue")
+        self.assertEqual(headers[b"location"], f"/api/jobs/{job['job_id']}".encode())
+        
+        status, _, chunks = call_app(app, "GET", f"/api/jobs/{job['job_id']}?wait=5")
+        self.assertEqual(status, 200)
+        finished = json.loads(b"".join(chunks))
+        self.assertEqual(finished["status"], "complete")
+        self.assertTrue(len(finished["profile"]["personality_overview"]) > 0)
+        
+        status, _, _ = call_app(app, "GET", f"/api/jobs/{job['job_id']}?wait=soon")
+        self.assertEqual(status, 400)
+        
+        status, _, _ = call_app(app, "GET", "/api/jobs/missing")
+        self.assertEqual(status, 404)
+    
+    def test_async_analysis_rejected_when_jobs_full(self):
+        """
+        Test that /api/analyze/async responds with a 503 when no job can be queued.
+        """
+        app = PsychoColorApp()
+        app.api.jobs = ProfileJobStore(max_pending=0)
+        status, headers, _ = call_app(app, "POST", "/api/analyze/async", json.dumps({"primary_color": "blue"}).encode())
+        
+        self.assertEqual(status, 503)
+        self.assertEqual(headers[b"retry-after"], b"1")
+    
+    def test_load_shedding_and_drain(self):
+        """
+        Test that requests beyond the in-flight bound get a 503 and that
+        shutdown waits for in-flight requests.
+        """
+        api = BlockingAPI()
+        app = PsychoColorApp(api=api, max_in_flight=1, worker_threads=1, drain_timeout=5)
+        body = json.dumps({"primary_color": "blue"}).encode()
+        
+        async def scenario():
+            first = asyncio.ensure_future(request_app(app, "POST", "/api/analyze", body))
+            while app.in_flight == 0:
+                await asyncio.sleep(0.01)
+            
+            # The only slot is taken, so the next request is shed
+            shed = await request_app(app, "POST", "/api/analyze", body)
+            
+            # Draining waits for the in-flight request to complete
+            drain = asyncio.ensure_future(app.drain())
+            await asyncio.sleep(0.05)
+            self.assertFalse(drain.done())
+            rejected = await request_app(app, "POST", "/api/analyze", body)
+            api.release.set()
+            
+            return await first, shed, rejected, await drain
+        
+        first, shed, rejected, drained = asyncio.run(scenario())
+        
+        self.assertEqual(first[0], 200)
+        self.assertEqual(shed[0], 503)
+        self.assertEqual(shed[1][b"retry-after"], b"1")
+        self.assertEqual(rejected[0], 503)
+        self.assertTrue(drained)
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    """
+    Test cases for the Prometheus metrics endpoint.
+    """
+    
+    def test_metrics_after_requests(self):
+        """
+        Test that /metrics reports request, analysis and LLM metrics.
+        """
+        app = PsychoColorApp()
+        body = json.dumps({"color_ranking": ["red", "yellow", "blue"]}).encode()
+        call_app(app, "POST", "/api/analyze", body)
+        call_app(app, "GET", "/missing")
+        call_app(app, "BREW", "/api/analyze")
+        
+        status, headers, chunks = call_app(app, "GET", "/metrics")
+        self.assertEqual(status, 200)
+        self.assertTrue(headers[b"content-type"].startswith(b"text/plain; version=0.0.4"))
+        
+        text = b"".join(chunks).decode("utf-8")
+        self.assertIn('psycho_color_http_requests_total{route="/api/analyze",method="POST",status="200"}', text)
+        self.assertIn('psycho_color_http_requests_total{route="unmatched",method="GET",status="404"}', text)
+        self.assertIn('psycho_color_http_requests_total{route="/api/analyze",method="other",status="405"}', text)
+        self.assertNotIn("BREW", text)
+        self.assertIn('psycho_color_analyses_total{mode="llm",outcome="ok"}', text)
+        self.assertIn('psycho_color_llm_request_seconds_bucket{model="gpt-4",le="+Inf"}', text)
+        self.assertIn('psycho_color_llm_call_seconds_count{call_type="comprehensive_profile",model="gpt-4"}', text)
+        self.assertIn('psycho_color_profile_jobs{queue="memory",status="pending"} 0', text)
+        self.assertIn("psycho_color_http_in_flight 0", text)
+
+
+class StreamingAPI:
+    """
+    API stand-in streaming endless sections and recording when the stream is closed.
+    """
+    
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.closed = False
+        self.jobs = ProfileJobStore(max_workers=1)
+    
+    def stream_color_preferences(self, color_data):
+        try:
+            yield "jung_color_energies", {}
+            if self.fail:
+                raise RuntimeError("internal detail")
+            while True:
+                yield "personality_overview", "text"
+        finally:
+            self.closed = True
+
+
+class BlockingAPI:
+    """
+    API stand-in whose analysis blocks until released.
+    """
+    
+    def __init__(self):
+        self.release = threading.Event()
+        self.jobs = ProfileJobStore(max_workers=1)
+    
+    def analyze_color_preferences(self, color_data):
+        self.release.wait(5)
+        return {"analysis_results": {}, "profile": {}}
+
+
+if __name__ == "__main__":
+    unittest.main()
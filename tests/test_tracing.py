@@ -0,0 +1,120 @@
+import unittest
+import sys
+import os
+import importlib.util
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from code.observability.tracing import InMemorySink, OpenTelemetrySink, NOOP_SPAN, span, traced, current_span, set_sink, get_sink
+from code.color_analysis.api import PsychoColorAPI
+
+class TestTracing(unittest.TestCase):
+    """
+    Test cases for tracing spans.
+    """
+    
+    def setUp(self):
+        """
+        Install an in-memory sink.
+        """
+        self.sink = InMemorySink()
+        self.previous = set_sink(self.sink)
+    
+    def tearDown(self):
+        """
+        Restore the previous sink.
+        """
+        set_sink(self.previous)
+    
+    def test_nested_spans(self):
+        """
+        Test that spans nest, carry attributes and record errors.
+        """
+        @traced("inner")
+        def inner():
+            current_span().set_attribute("step", 2)
+            raise ValueError("bad color")
+        
+        with span("outer", request=1) as outer:
+            with self.assertRaises(ValueError):
+                inner()
+            outer.set_attributes(done=True)
+        
+        inner_span, outer_span = self.sink.spans
+        self.assertIs(inner_span.parent, outer_span)
+        self.assertEqual(inner_span.trace_id, outer_span.trace_id)
+        self.assertEqual(inner_span.attributes, {"step": 2})
+        self.assertEqual(inner_span.error, "ValueError: bad color")
+        self.assertEqual(outer_span.attributes, {"request": 1, "done": True})
+        self.assertIsNone(outer_span.error)
+        self.assertLessEqual(inner_span.duration, outer_span.duration)
+        self.assertEqual(inner_span.to_dict()["parent_id"], outer_span.to_dict()["span_id"])
+        self.assertIs(current_span(), NOOP_SPAN)
+    
+    def test_disabled(self):
+        """
+        Test that nothing is recorded while tracing is disabled.
+        """
+        set_sink(None)
+        self.assertIsNone(get_sink())
+        
+        with span("ignored", size=1) as ignored:
+            ignored.set_attribute("key", "value")
+            self.assertIs(ignored, NOOP_SPAN)
+        self.assertEqual(traced("ignored")(lambda: 5)(), 5)
+        self.assertEqual(self.sink.spans, [])
+    
+    def test_pipeline_spans(self):
+        """
+        Test that an API call records a span for each pipeline stage.
+        """
+        api = PsychoColorAPI(api_key="mock_key")
+        api.analyze_color_preferences({"color_ranking": ["blue", "green", "yellow", "red"]})
+        
+        names = {recorded.name for recorded in self.sink.spans}
+        for name in (
+            "api.analyze_color_preferences",
+            "data_processor.process_color_preferences",
+            "color_analyzer.analyze_jung_energies",
+            "profile_generator.generate_profile",
+            "llm.generate",
+            "llm.request",
+            "response_processor.process_comprehensive_profile"
+        ):
+            self.assertIn(name, names)
+        
+        request = self.sink.find("llm.request")[0]
+        self.assertEqual(request.parent.name, "llm.generate")
+        self.assertEqual(request.attributes["model"], "gpt-4")
+        self.assertGreater(request.attributes["response_chars"], 0)
+        
+        root = self.sink.find("api.analyze_color_preferences")[0]
+        self.assertIsNone(root.parent)
+        self.assertEqual({recorded.trace_id for recorded in self.sink.spans}, {root.trace_id})
+        self.assertFalse(root.attributes["coalesced"])
+    
+    @unittest.skipUnless(importlib.util.find_spec("opentelemetry"), "opentelemetry is not installed")
+    def test_opentelemetry_sink(self):
+        """
+        Test that spans are forwarded to OpenTelemetry with their parents.
+        """
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+        
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        set_sink(OpenTelemetrySink(provider.get_tracer("test")))
+        
+        with span("outer"):
+            with span("inner", size=3):
+                pass
+        
+        inner, outer = exporter.get_finished_spans()
+        self.assertEqual(inner.parent.span_id, outer.context.span_id)
+        self.assertEqual(inner.attributes["size"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()